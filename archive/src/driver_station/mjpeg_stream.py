@@ -0,0 +1,399 @@
+"""This module reads frames from an MJPEG camera stream.
+
+NOTE: THIS RUNS ON THE DRIVER STATION, NOT ON THE ROBOT.
+
+DO NOT UPLOAD TO THE ROBOT!!
+
+One HTTP connection is kept open to the camera and a background thread
+reads the multipart stream.  Each JPEG is received straight into a reusable
+frame buffer, and the buffers are swapped between the reader and the
+caller, so only the newest frame is kept and no memory is allocated per
+frame.  Frames that arrive before the previous one was taken are dropped
+and counted.
+
+"""
+
+import base64
+import logging
+import socket
+import sys
+import threading
+import time
+import urlparse
+
+
+class MjpegFrame(object):
+    """A JPEG frame read from the stream.
+
+    The buffer is reused, so a frame is only valid until the next call to
+    MjpegStream.get_frame().
+
+    """
+    __slots__ = ('buffer', 'size', 'timestamp', 'number')
+
+    def __init__(self, capacity):
+        """Create a frame with an empty buffer.
+
+        Args:
+            capacity: the initial size of the buffer in bytes.
+
+        """
+        self.buffer = bytearray(capacity)   # The JPEG data
+        self.size = 0   # The number of bytes of JPEG data in the buffer
+        self.timestamp = None   # The time the frame finished arriving
+        self.number = 0 # The number of the frame in the stream
+
+    def reserve(self, size):
+        """Make sure the buffer can hold a number of bytes."""
+        if len(self.buffer) < size:
+            self.buffer = bytearray(size)
+
+
+class MjpegStream(object):
+    """Reads an MJPEG stream on a background thread."""
+
+    # Size of the buffer that part headers are read into
+    HEADER_SIZE = 8192
+    # Largest single read while searching for a boundary
+    READ_SIZE = 4096
+
+    connected = False
+
+    _logger = None
+    _url = None
+    _timeout = None
+    _retry = None
+    _thread = None
+    _condition = None
+    _running = False
+    _socket = None
+    _boundary = None
+    _header = None
+    _header_start = 0
+    _header_end = 0
+    _back = None
+    _ready = None
+    _front = None
+    _fresh = False
+    _frames = 0
+    _dropped = 0
+    _reconnects = 0
+
+    def __init__(self, url, timeout=2.0, retry=1.0, capacity=131072,
+                 log_handler=None):
+        """Create an MJPEG stream reader.
+
+        Args:
+            url: the http URL of the MJPEG stream.
+            timeout: the time to wait for data before reconnecting.
+            retry: the time to wait between connection attempts.
+            capacity: the initial size of the frame buffers in bytes.
+            log_handler: the logging handler to use, or None to log to
+                stdout.
+
+        """
+        self._logger = logging.getLogger(__name__)
+        handler = None
+        if log_handler:
+            handler = log_handler
+        else:
+            formatter = logging.Formatter('%(asctime)s - %(levelname)s:'
+                                          '%(name)s:%(message)s')
+            handler = logging.StreamHandler(stream=sys.stdout)
+            handler.setLevel(logging.DEBUG)
+            handler.setFormatter(formatter)
+        self._logger.addHandler(handler)
+        self._logger.setLevel(logging.DEBUG)
+
+        self.connected = False
+        self._url = url
+        self._timeout = timeout
+        self._retry = retry
+        self._condition = threading.Condition()
+        self._header = bytearray(self.HEADER_SIZE)
+        self._back = MjpegFrame(capacity)
+        self._ready = MjpegFrame(capacity)
+        self._front = MjpegFrame(capacity)
+
+    def start(self):
+        """Start reading the stream on a background thread."""
+        if self._thread:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mjpeg")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop reading and close the connection."""
+        self._running = False
+        # Wake the reader thread, which closes the connection itself
+        sock = self._socket
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(self._timeout + self._retry)
+        self._thread = None
+
+    def wait_connected(self, timeout):
+        """Wait until the stream is connected.
+
+        Args:
+            timeout: the longest time to wait in seconds.
+
+        Returns:
+            True if the stream is connected.
+
+        """
+        end = time.time() + timeout
+        with self._condition:
+            while not self.connected and self._running:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self.connected
+
+    def get_frame(self, timeout=None):
+        """Take the newest frame that has not been taken yet.
+
+        Args:
+            timeout: the longest time to wait for a new frame in seconds, or
+                None to return immediately.
+
+        Returns:
+            The MjpegFrame, which is valid until the next call, or None if
+            there was no new frame.
+
+        """
+        end = time.time() + (timeout or 0.0)
+        with self._condition:
+            while not self._fresh and self._running:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if not self._fresh:
+                return None
+            self._front, self._ready = self._ready, self._front
+            self._fresh = False
+            return self._front
+
+    def get_statistics(self):
+        """Return the stream statistics.
+
+        Returns:
+            A dictionary of the number of frames received, frames dropped
+            because a newer frame arrived before they were taken, and
+            reconnects.
+
+        """
+        with self._condition:
+            return {'frames': self._frames, 'dropped': self._dropped,
+                    'reconnects': self._reconnects}
+
+    def _run(self):
+        """Read frames, reconnecting after errors, until stopped."""
+        while self._running:
+            try:
+                self._connect()
+                with self._condition:
+                    self.connected = True
+                    self._condition.notify_all()
+                self._logger.info("Connected to camera stream")
+                while self._running:
+                    self._read_part()
+            except (IOError, ValueError) as excep:
+                if self._running:
+                    self._logger.warn("Camera stream error: " + str(excep))
+            self._close()
+            with self._condition:
+                if self.connected:
+                    self._reconnects += 1
+                self.connected = False
+            if self._running:
+                time.sleep(self._retry)
+
+    def _connect(self):
+        """Open the connection and read the response headers."""
+        url = urlparse.urlparse(self._url)
+        path = url.path or "/"
+        if url.query:
+            path += "?" + url.query
+        request = ["GET %s HTTP/1.0" % path, "Host: %s" % url.hostname]
+        if url.username:
+            credentials = base64.b64encode("%s:%s" % (url.username,
+                                                      url.password or ""))
+            request.append("Authorization: Basic %s" % credentials)
+        request = "\r\n".join(request) + "\r\n\r\n"
+
+        self._header_start = 0
+        self._header_end = 0
+        self._socket = socket.create_connection((url.hostname,
+                                                 url.port or 80),
+                                                self._timeout)
+        self._socket.sendall(request.encode('ascii'))
+
+        status, headers = self._read_headers()
+        if len(status.split()) < 2 or status.split()[1] != "200":
+            raise IOError("Camera returned " + status)
+        content_type = headers.get("content-type", "")
+        boundary = None
+        for parameter in content_type.split(";")[1:]:
+            name, separator, value = parameter.partition("=")
+            if name.strip().lower() == "boundary":
+                boundary = value.strip().strip('"')
+        if not content_type.startswith("multipart") or not boundary:
+            raise ValueError("Not an MJPEG stream: " + content_type)
+        if boundary.startswith("--"):
+            boundary = boundary[2:]
+        self._boundary = ("--" + boundary).encode('ascii')
+
+    def _close(self):
+        """Close the connection."""
+        sock = self._socket
+        self._socket = None
+        if sock:
+            try:
+                sock.close()
+            except socket.error:
+                pass
+
+    def _read_headers(self):
+        """Read a block of header lines ending with a blank line.
+
+        Returns:
+            A tuple of the first line and a dictionary of the headers with
+            lower case names.
+
+        """
+        while True:
+            index = self._header.find(b"\r\n\r\n", self._header_start,
+                                      self._header_end)
+            if index >= 0:
+                break
+            self._receive_header()
+        text = bytes(self._header[self._header_start:index]).decode('latin-1')
+        self._header_start = index + 4
+
+        lines = [line for line in text.split("\r\n") if line.strip()]
+        if not lines:
+            return "", {}
+        headers = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(":")
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+        return lines[0], headers
+
+    def _receive_header(self):
+        """Receive more data into the header buffer."""
+        if self._header_start:
+            remaining = self._header_end - self._header_start
+            self._header[0:remaining] = self._header[self._header_start:
+                                                     self._header_end]
+            self._header_start = 0
+            self._header_end = remaining
+        if self._header_end >= len(self._header):
+            raise ValueError("Camera stream headers are too long")
+        view = memoryview(self._header)[self._header_end:]
+        count = self._socket.recv_into(view)
+        if not count:
+            raise IOError("Camera closed the stream")
+        self._header_end += count
+
+    def _read_part(self):
+        """Read one part of the stream into the back frame and publish it."""
+        boundary = ""
+        while not boundary:
+            boundary, headers = self._read_headers()
+        if not boundary.encode('latin-1').startswith(self._boundary):
+            raise ValueError("Lost the stream boundary")
+        frame = self._back
+        length = headers.get("content-length")
+        if length and length.isdigit():
+            size = self._receive_body(frame, int(length))
+        else:
+            size = self._receive_until_boundary(frame)
+
+        frame.size = size
+        frame.timestamp = time.time()
+        with self._condition:
+            self._frames += 1
+            frame.number = self._frames
+            if self._fresh:
+                self._dropped += 1
+            self._back, self._ready = self._ready, self._back
+            self._fresh = True
+            self._condition.notify_all()
+
+    def _take_buffered(self, view, size):
+        """Move up to size bytes left in the header buffer into a view.
+
+        Returns:
+            The number of bytes moved.
+
+        """
+        buffered = min(size, self._header_end - self._header_start)
+        if buffered:
+            view[0:buffered] = self._header[self._header_start:
+                                            self._header_start + buffered]
+            self._header_start += buffered
+        return buffered
+
+    def _receive_body(self, frame, size):
+        """Receive a body of known length straight into a frame.
+
+        Returns:
+            The size of the body.
+
+        """
+        frame.reserve(size)
+        view = memoryview(frame.buffer)
+        received = self._take_buffered(view, size)
+        while received < size:
+            count = self._socket.recv_into(view[received:size])
+            if not count:
+                raise IOError("Camera closed the stream")
+            received += count
+        return size
+
+    def _receive_until_boundary(self, frame):
+        """Receive a body without a Content-Length up to the next boundary.
+
+        The data after the boundary is moved back into the header buffer.
+
+        Returns:
+            The size of the body.
+
+        """
+        marker = b"\r\n" + self._boundary
+        received = self._take_buffered(memoryview(frame.buffer),
+                                       len(frame.buffer))
+        searched = 0
+        while True:
+            index = frame.buffer.find(marker, searched, received)
+            if index >= 0:
+                break
+            searched = max(0, received - len(marker))
+            if len(frame.buffer) - received < self.READ_SIZE:
+                # Grow into a new buffer, since the caller may still hold a
+                # view of this one
+                frame.buffer = frame.buffer + bytearray(len(frame.buffer))
+            count = self._socket.recv_into(
+                memoryview(frame.buffer)[received:received + self.READ_SIZE])
+            if not count:
+                raise IOError("Camera closed the stream")
+            received += count
+
+        # Put the boundary and anything after it back for the next part
+        remaining = received - index
+        self._header[0:remaining] = frame.buffer[index:received]
+        self._header_start = 0
+        self._header_end = remaining
+        return index
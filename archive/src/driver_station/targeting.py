@@ -9,10 +9,27 @@ DO NOT UPLOAD TO THE ROBOT!!
 import cv2
 import logging
 import math
+import mjpeg_stream
 import numpy as np
+import stopwatch
 import sys
 import target
-import urllib2
+import time
+
+
+# The features calculated for every contour in a frame
+CONTOUR_FEATURES = [('x', np.int32),  # The bounding rectangle
+                    ('y', np.int32),
+                    ('w', np.int32),
+                    ('h', np.int32),
+                    ('contour_area', np.float64),
+                    ('bounding_area', np.int32),
+                    ('center_x', np.int32),
+                    ('center_y', np.int32),
+                    ('is_vertical', np.bool_),
+                    ('rectangularity', np.float64),
+                    ('aspect_ratio', np.float64),
+                    ('valid', np.bool_)]  # Passes both score thresholds
 
 
 class ContourInfo(object):
@@ -41,8 +58,9 @@ class Targeting(object):
     # Camera view angle (49 for 1013)
     #CAMERA_URL = ("http://10.0.94.11/axis-cgi/mjpg/video.cgi?"
     #              "resolution=640x480&dummy=param.mjpg")
-    #CAMERA_URL = r"http://10.0.94.11/mjpg/video.mjpg"
-    CAMERA_URL = r"http://10.0.94.11/jpg/image.jpg"
+    CAMERA_URL = r"http://10.0.94.11/mjpg/video.mjpg"
+    #CAMERA_URL = r"http://10.0.94.11/jpg/image.jpg"
+    CAMERA_TIMEOUT = 1.0
     CAMERA_VIEW_ANGLE = 49
     CAMERA_RES_HEIGHT = 640
     CAMERA_RES_WIDTH = 480
@@ -51,7 +69,12 @@ class Targeting(object):
     RECTANGULARITY_THRESHOLD = 40
     ASPECT_RATIO_THRESHOLD = 55
 
+    # Times every call of get_targets()
+    get_targets_timer = stopwatch.Stopwatch()
+
     _logger = None
+    _stream = None
+    _dropped = 0
 
     #_vcap = None
 
@@ -72,23 +95,26 @@ class Targeting(object):
             handler.setFormatter(formatter)
         self._logger.addHandler(handler)
         self._logger.setLevel(logging.DEBUG)
+        self._stream = mjpeg_stream.MjpegStream(self.CAMERA_URL,
+                                                log_handler=log_handler)
+        self._dropped = 0
 
     def open(self):
-        """Try opening a connection to the camera."""
+        """Start reading the camera stream and wait for it to connect.
+
+        The stream stays open and reconnects by itself, so this only needs
+        to be called once.
+
+        """
         #"""Try to open the Video Capture object linked to the camera."""
         #return self._vcap.open(self.CAMERA_URL)
-        retval = False
-        try:
-            stream = urllib2.urlopen(self.CAMERA_URL, None, 1)
-            stream.close()
-            retval = True
-        except Exception as excep:
-            self._logger.error("Exception connecting to camera: " + str(excep))
-        return retval
+        self._stream.start()
+        return self._stream.wait_connected(self.CAMERA_TIMEOUT)
 
-    #def close(self):
-        #"""Close the Video Capture object."""
+    def close(self):
+        """Stop reading the camera stream."""
         #self._vcap.release()
+        self._stream.stop()
 
     def get_image(self):
         """Get the latest frame."""
@@ -99,15 +125,21 @@ class Targeting(object):
         #else:
         #    return None
         #return cv2.imread('input.jpg')
-        img = None
-        try:
-            stream = urllib2.urlopen(self.CAMERA_URL, None, 1)
-            data = stream.read()
-            stream.close()
-            img = cv2.imdecode(np.fromstring(data, dtype=np.uint8),
-                               cv2.CV_LOAD_IMAGE_COLOR)
-        except Exception as excep:
-            self._logger.error("Exception getting image: " + str(excep))
+        frame = self._stream.get_frame(self.CAMERA_TIMEOUT)
+        if frame is None:
+            self._logger.error("No image from camera")
+            return None
+
+        # Decode straight from the stream's frame buffer
+        img = cv2.imdecode(np.frombuffer(frame.buffer, dtype=np.uint8,
+                                         count=frame.size),
+                           cv2.CV_LOAD_IMAGE_COLOR)
+        dropped = self._stream.get_statistics()['dropped']
+        self._logger.debug("Frame %d captured %.0fms ago, %d dropped" %
+                           (frame.number,
+                            (time.time() - frame.timestamp) * 1000.0,
+                            dropped - self._dropped))
+        self._dropped = dropped
         return img
 
     def score_aspect_ratio(self, contour_data):
@@ -165,6 +197,88 @@ class Targeting(object):
         return (contour_data.rectangularity > self.RECTANGULARITY_THRESHOLD and
                 contour_data.aspect_ratio > self.ASPECT_RATIO_THRESHOLD)
 
+    def score_aspect_ratios(self, widths, heights, is_vertical):
+        """Score the aspect ratios of many contours at once.
+
+        This gives the same scores as score_aspect_ratio().
+
+        Args:
+            widths: the array of bounding rectangle widths.
+            heights: the array of bounding rectangle heights.
+            is_vertical: the boolean array of which contours are vertical.
+
+        Returns:
+            The array of aspect ratio scores.
+
+        """
+        ideal_ratios = np.where(is_vertical, 4.0 / 32.0, 23.5 / 4.0)
+        # Long over short for a wide contour and short over long for a tall
+        # one are both the width over the height
+        ratios = (widths * 1.0 / heights) / ideal_ratios
+        return np.clip(100.0 * (1.0 - np.abs(1.0 - ratios)), 0.0, 100.0)
+
+    def get_contour_features(self, contours):
+        """Calculate the features of all contours in one pass.
+
+        Only the opencv calls are made per contour; the scores, validity and
+        vertical/horizontal classification are calculated on whole arrays.
+
+        Args:
+            contours: the List of opencv contours.
+
+        Returns:
+            A numpy structured array of CONTOUR_FEATURES with one record per
+            contour.
+
+        """
+        features = np.zeros(len(contours), dtype=CONTOUR_FEATURES)
+        if not len(contours):
+            return features
+
+        values = np.array([cv2.boundingRect(contour) +
+                           (cv2.contourArea(contour),)
+                           for contour in contours], dtype=np.float64)
+        features['x'] = values[:, 0]
+        features['y'] = values[:, 1]
+        features['w'] = values[:, 2]
+        features['h'] = values[:, 3]
+        features['contour_area'] = values[:, 4]
+        features['bounding_area'] = features['w'] * features['h']
+        features['center_x'] = features['x'] + features['w'] // 2
+        features['center_y'] = features['y'] + features['h'] // 2
+        features['is_vertical'] = features['w'] <= features['h']
+        features['rectangularity'] = (features['contour_area'] /
+                                      features['bounding_area'] * 100.0)
+        features['aspect_ratio'] = self.score_aspect_ratios(
+                                                    features['w'],
+                                                    features['h'],
+                                                    features['is_vertical'])
+        features['valid'] = ((features['rectangularity'] >
+                              self.RECTANGULARITY_THRESHOLD) &
+                             (features['aspect_ratio'] >
+                              self.ASPECT_RATIO_THRESHOLD))
+        return features
+
+    def _make_contour_info(self, contour, feature):
+        """Create the ContourInfo of a contour from its features."""
+        contour_data = ContourInfo()
+        contour_data.contour = contour
+        contour_data.contour_area = float(feature['contour_area'])
+        ((center_x, center_y), (width, height), angle) = cv2.minAreaRect(
+                                                                    contour)
+        contour_data.actual_width = width
+        contour_data.actual_height = height
+        contour_data.bounding_rect = (int(feature['x']), int(feature['y']),
+                                      int(feature['w']), int(feature['h']))
+        contour_data.bounding_area = int(feature['bounding_area'])
+        contour_data.center_mass = (int(feature['center_x']),
+                                    int(feature['center_y']))
+        contour_data.is_vertical = bool(feature['is_vertical'])
+        contour_data.rectangularity = float(feature['rectangularity'])
+        contour_data.aspect_ratio = float(feature['aspect_ratio'])
+        return contour_data
+
+    @get_targets_timer
     def get_targets(self):
         """Get an image, search it for targets, and return a list of Targets."""
         img = self.get_image()
@@ -200,43 +314,17 @@ class Targeting(object):
         # Only used for saving resulting image
         #color_img = cv2.cvtColor(erode, cv2.cv.CV_GRAY2BGR)
 
-        # Calculate basic information about each contour
-        contours_data = []
-        for contour in contours:
-            current_contour = ContourInfo()
-            current_contour.contour = contour
-            current_contour.contour_area = cv2.contourArea(contour)
-            ((center_x, center_y), (width, height), angle) = cv2.minAreaRect(
-                                                                        contour)
-            current_contour.actual_width = width
-            current_contour.actual_height = height
-            rect_x, rect_y, rect_w, rect_h = cv2.boundingRect(contour)
-            current_contour.bounding_rect = (rect_x, rect_y, rect_w, rect_h)
-            current_contour.bounding_area = rect_w * rect_h
-            center_x = rect_x + (rect_w / 2)
-            center_y = rect_y + (rect_h / 2)
-            current_contour.center_mass = (center_x, center_y)
-            ratio = (rect_w * 1.0) / rect_h
-            if ratio > 1.0:
-                current_contour.is_vertical = False
-            else:
-                current_contour.is_vertical = True
-            current_contour.rectangularity = ((current_contour.contour_area /
-                                               current_contour.bounding_area) *
-                                              100.0)
-            current_contour.aspect_ratio = self.score_aspect_ratio(
-                                                                current_contour)
-            contours_data.append(current_contour)
-
-        # Split contours by vertical/horizontal and remove invalid targets
-        vertical_contours = []
-        horizontal_contours = []
-        for contour_data in contours_data:
-            if self.is_valid_target(contour_data):
-                if contour_data.is_vertical:
-                    vertical_contours.append(contour_data)
-                else:
-                    horizontal_contours.append(contour_data)
+        # Calculate the features of every contour and keep the valid ones
+        features = self.get_contour_features(contours)
+        vertical = np.flatnonzero(features['valid'] & features['is_vertical'])
+        horizontal = np.flatnonzero(features['valid'] &
+                                    ~features['is_vertical'])
+        vertical_contours = [self._make_contour_info(contours[index],
+                                                     features[index])
+                             for index in vertical]
+        horizontal_contours = [self._make_contour_info(contours[index],
+                                                       features[index])
+                               for index in horizontal]
 
         # Draw each contour
         #for contour_data in vertical_contours:
@@ -247,33 +335,35 @@ class Targeting(object):
         #    cv2.drawContours(color_img, contour_data.contour, -1, (0,0,255),
         #                     thickness=2)
 
+        # Score how level every vertical contour's top is with every
+        # horizontal contour's center, so the distance to the contour is only
+        # measured for pairs that are level enough
+        vertical_scores = (1.0 - (np.abs(
+                            features['y'][vertical][:, np.newaxis] -
+                            features['center_y'][horizontal][np.newaxis, :]) /
+                            (4.0 * features['h'][horizontal][np.newaxis, :])))
+        candidates = vertical_scores > 0.8
+
         # Check each vertical contour for a matching horizontal contour
         matched_contours_data = []
-        for v_contour_data in vertical_contours:
-            v_rect_x, v_rect_y, v_rect_w, v_rect_h = v_contour_data.\
-                                                                bounding_rect
-            pair_found = False
-            for h_contour_data in horizontal_contours:
+        for v_index, v_contour_data in enumerate(vertical_contours):
+            for h_index in np.flatnonzero(candidates[v_index]):
+                h_contour_data = horizontal_contours[h_index]
                 h_rect_x, h_rect_y, h_rect_w, h_rect_h = h_contour_data.\
                                                                 bounding_rect
-                h_center_x, h_center_y = h_contour_data.center_mass
                 dist = cv2.pointPolygonTest(v_contour_data.contour,
                                             h_contour_data.center_mass, True)
                 pairing_ratio = (math.fabs(dist) / h_rect_w)
                 pairing_score = self.calculate_pairing_score(pairing_ratio)
-                vertical_score = (1.0 - (math.fabs(v_rect_y - h_center_y) /
-                                         (4.0 * h_rect_h)))
-                if vertical_score > 0.8 and pairing_score > 50:
+                if pairing_score > 50:
                     v_contour_data.paired_horizontal_contour_data = \
                                                                 h_contour_data
                     v_contour_data.pairing_distance = dist
                     v_contour_data.pairing_score = pairing_score
-                    v_contour_data.pairing_vertical_score = vertical_score
-                    matched_contours_data.append(v_contour_data)
-                    pair_found = True
+                    v_contour_data.pairing_vertical_score = float(
+                                            vertical_scores[v_index, h_index])
                     break
-            if not pair_found:
-                matched_contours_data.append(v_contour_data)
+            matched_contours_data.append(v_contour_data)
 
         # Turn each vertical/horizontal contour into a Target
         targets = []
@@ -0,0 +1,92 @@
+"""This module tests the asynclog module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import queue
+import threading
+import pytest
+import asynclog
+
+
+class Value(object):
+    """Records the thread that formats it."""
+
+    def __init__(self):
+        self.thread = None
+
+    def __str__(self):
+        self.thread = threading.current_thread()
+        return "value"
+
+
+class TestAsyncLog:
+    """Test the asynchronous log pipeline."""
+
+    def test_write(self, tmpdir):
+        path = tmpdir.join('test.log')
+        log = asynclog.get_logger('test_write', str(path))
+        log.debug("Count: %d", 5)
+        log.info("Done")
+        assert asynclog.flush() == True
+        lines = path.read().splitlines()
+        assert len(lines) == 2
+        assert lines[0].endswith("test_write - DEBUG - Count: 5")
+        assert lines[1].endswith("test_write - INFO - Done")
+
+    def test_formatted_by_writer(self, tmpdir):
+        log = asynclog.get_logger('test_lazy', str(tmpdir.join('lazy.log')))
+        value = Value()
+        log.debug("Value: %s", value)
+        assert asynclog.flush() == True
+        assert value.thread is not None
+        assert value.thread is not threading.current_thread()
+
+    def test_no_duplicate_handlers(self, tmpdir):
+        path = str(tmpdir.join('dup.log'))
+        log = asynclog.get_logger('test_dup', path)
+        again = asynclog.get_logger('test_dup', path)
+        assert again is log
+        assert len(log.handlers) == 1
+        log.debug("once")
+        asynclog.flush()
+        assert len(tmpdir.join('dup.log').read().splitlines()) == 1
+
+    def test_shared_file(self, tmpdir):
+        path = str(tmpdir.join('shared.log'))
+        first = asynclog.get_logger('test_first', path)
+        second = asynclog.get_logger('test_second', path)
+        assert first.handlers[0] is second.handlers[0]
+
+    def test_full_queue_drops(self, tmpdir, monkeypatch):
+        log = asynclog.get_logger('test_drop', str(tmpdir.join('drop.log')))
+        full = queue.Queue(1)
+        full.put(None)
+        monkeypatch.setattr(asynclog, '_queue', full)
+        dropped = asynclog.get_statistics()['dropped']
+        log.debug("lost")
+        log.debug("lost")
+        assert asynclog.get_statistics()['dropped'] == dropped + 2
+
+    def test_write_error_counted(self, tmpdir):
+        path = str(tmpdir.join('missing', 'error.log'))
+        log = asynclog.get_logger('test_error', path)
+        errors = asynclog.get_statistics()['errors']
+        log.debug("lost")
+        asynclog.flush()
+        assert asynclog.get_statistics()['errors'] == errors + 1
+
+    def test_write_after_shutdown(self, tmpdir):
+        path = tmpdir.join('late.log')
+        log = asynclog.get_logger('test_late', str(path))
+        log.debug("before")
+        asynclog.shutdown()
+        written = asynclog.get_statistics()['written']
+        log.debug("after")
+        assert asynclog.get_statistics()['written'] == written + 1
+        lines = path.read().splitlines()
+        assert len(lines) == 2
+        assert lines[1].endswith("test_late - DEBUG - after")
@@ -9,6 +9,17 @@
 import pytest
 import os
 import autoscript
+import timerwheel
+
+
+class FakeClock:
+    """Stand-in for a Stopwatch with a settable elapsed time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def elapsed_time_in_secs(self):
+        return self.now
 
 
 class TestAutoScriptCommand:
@@ -137,3 +148,405 @@ class TestAutoScript:
         assert c3 != None
         assert c4 == None
 
+
+    def test_parse_zero_argument(self, tmpdir):
+        path = tmpdir.join('zero.as')
+        path.write("cmd1,0,0.0,x\n")
+        a = autoscript.AutoScript()
+        commands = a.parse(str(path))
+        assert commands[0].parameters == [0, 0.0, 'x']
+        assert commands[0].line == 1
+
+
+class TestAutoScriptCompiler:
+    """Test the AutoScriptCompiler class."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        self.calls = []
+        self.compiler = autoscript.AutoScriptCompiler()
+        self.compiler.register("move", self.move, [float, int, float],
+                               self.start)
+        self.compiler.register("say", self.move, [str])
+
+    def move(self, *args):
+        self.calls.append(args)
+        return True
+
+    def start(self):
+        self.calls.append('start')
+
+    def _commands(self, tmpdir, text):
+        path = tmpdir.join('script.as')
+        path.write(text)
+        return str(path)
+
+    def test_compile(self, tmpdir):
+        path = self._commands(tmpdir, "move,1,3,0.5\nsay,hello\n")
+        instructions = self.compiler.compile_file(path)
+        assert len(instructions) == 2
+        assert instructions[0].command == 'move'
+        assert instructions[0].arguments == (1.0, 3, 0.5)
+        assert isinstance(instructions[0].arguments[0], float)
+        assert instructions[0].start_function == self.start
+        assert instructions[0].line == 1
+        assert instructions[1].arguments == ('hello',)
+        assert instructions[1].start_function == None
+
+    def test_compile_stops_at_end(self, tmpdir):
+        path = self._commands(tmpdir, "say,a\nend\nbogus\n")
+        assert len(self.compiler.compile_file(path)) == 1
+
+    def test_compile_trailing_columns(self, tmpdir):
+        path = self._commands(tmpdir, "move,1,3,0.5,,\n")
+        assert len(self.compiler.compile_file(path)) == 1
+
+    def test_compile_errors(self, tmpdir):
+        path = self._commands(tmpdir, "bogus\nmove,1,2\nmove,x,2.5,1\n")
+        with pytest.raises(autoscript.AutoScriptError) as info:
+            self.compiler.compile_file(path)
+        errors = info.value.errors
+        assert len(errors) == 4
+        assert 'line 1' in errors[0] and 'bogus' in errors[0]
+        assert 'line 2' in errors[1]
+        assert 'line 3' in errors[2] and 'line 3' in errors[3]
+
+    def test_compile_missing_file(self):
+        with pytest.raises(autoscript.AutoScriptError):
+            self.compiler.compile_file(os.path.realpath('test_asdfd.as'))
+
+    def test_compile_infinite_and_nan(self, tmpdir):
+        path = self._commands(tmpdir, "move,1,inf,0.5\nmove,nan,3,0.5\n"
+                                      "move,1,-inf,inf\n")
+        with pytest.raises(autoscript.AutoScriptError) as info:
+            self.compiler.compile_file(path)
+        errors = info.value.errors
+        assert len(errors) == 4
+        assert 'line 1: move argument 2 must be int' in errors[0]
+        assert 'line 2: move argument 1 must be float' in errors[1]
+
+    def test_compile_unreadable_file(self, tmpdir):
+        path = tmpdir.join('binary.as')
+        path.write_binary(b"say,\xff\xfe\n")
+        with pytest.raises(autoscript.AutoScriptError):
+            self.compiler.compile_file(str(path))
+        path = self._commands(tmpdir, "say," + "x" * 200000 + "\n")
+        with pytest.raises(autoscript.AutoScriptError):
+            self.compiler.compile_file(path)
+
+    def test_compile_check(self):
+        self.compiler.register("play", self.move, [str],
+                               check=lambda name: None if name == 'known'
+                               else "'%s' is not known" % name)
+        commands = [autoscript.AutoScriptCommand('play', ['known'], 1),
+                    autoscript.AutoScriptCommand('play', ['other'], 2)]
+        with pytest.raises(autoscript.AutoScriptError) as info:
+            self.compiler.compile(commands)
+        assert info.value.errors == ["line 2: play 'other' is not known"]
+
+    def test_get_commands(self):
+        assert self.compiler.get_commands() == ['move', 'say']
+
+
+class TestAutoScriptInterpreter:
+    """Test the AutoScriptInterpreter class."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        self.calls = []
+        self.remaining = {}
+        compiler = autoscript.AutoScriptCompiler()
+        compiler.register("run", self.run, [str, int], self.start)
+        self.compiler = compiler
+
+    def run(self, name, steps):
+        self.calls.append(name)
+        self.remaining[name] = self.remaining.get(name, steps) - 1
+        return self.remaining[name] <= 0
+
+    def start(self):
+        self.calls.append('start')
+
+    def test_step(self):
+        instructions = self.compiler.compile([
+                autoscript.AutoScriptCommand('run', ['a', 2], 1),
+                autoscript.AutoScriptCommand('run', ['b', 1], 2)])
+        interpreter = autoscript.AutoScriptInterpreter()
+        interpreter.start(instructions)
+        assert interpreter.running == True
+        assert interpreter.get_current_instruction().arguments == ('a', 2)
+        assert interpreter.step() == False
+        assert interpreter.step() == False
+        assert interpreter.get_current_instruction().arguments == ('b', 1)
+        assert interpreter.step() == True
+        assert interpreter.running == False
+        assert self.calls == ['start', 'a', 'a', 'start', 'b']
+        times = interpreter.get_instruction_times()
+        assert [i.line for i, t in times] == [1, 2]
+        assert all(t >= 0.0 for i, t in times)
+
+    def test_empty_script(self):
+        interpreter = autoscript.AutoScriptInterpreter()
+        interpreter.start([])
+        assert interpreter.running == False
+        assert interpreter.step() == True
+
+    def test_stop(self):
+        instructions = self.compiler.compile([
+                autoscript.AutoScriptCommand('run', ['a', 5], 1)])
+        interpreter = autoscript.AutoScriptInterpreter()
+        interpreter.start(instructions)
+        interpreter.step()
+        interpreter.stop()
+        assert interpreter.step() == True
+        assert interpreter.get_instruction_times() == []
+
+
+class TestAutoScriptBlocks:
+    """Test block statements, timeouts and conditions."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        self.calls = []
+        self.remaining = {}
+        self.sensor = 0.0
+        self.clock = FakeClock()
+        self.wheel = timerwheel.TimerWheel()
+        self.wheel._clock = self.clock
+        compiler = autoscript.AutoScriptCompiler(self.wheel)
+        compiler.register("run", self.run, [str, int], None, self.halt)
+        compiler.register("wait", self.wait, [float], timed=True)
+        compiler.register_sensor("sensor", lambda: self.sensor)
+        self.compiler = compiler
+
+    def run(self, name, steps):
+        self.calls.append(name)
+        self.remaining[name] = self.remaining.get(name, steps) - 1
+        if self.remaining[name] <= 0:
+            del self.remaining[name]
+            return True
+        return False
+
+    def halt(self):
+        self.calls.append('halt')
+
+    def wait(self, time_left):
+        if time_left <= 0.0:
+            self.calls.append(self.clock.now)
+            return True
+        return False
+
+    def _compile(self, rows):
+        return self.compiler.compile([
+                autoscript.AutoScriptCommand(row[0], list(row[1:]), index + 1)
+                for index, row in enumerate(rows)])
+
+    def _run(self, instructions, limit=50):
+        interpreter = autoscript.AutoScriptInterpreter()
+        interpreter.start(instructions)
+        for count in range(limit):
+            # Tick the wheel before stepping, as the robot loop does
+            self.clock.now = round(self.clock.now + 0.02, 2)
+            self.wheel.tick()
+            if interpreter.step():
+                return count + 1
+        return None
+
+    def test_parallel(self):
+        instructions = self._compile([
+                ('parallel',), ('run', 'a', 3), ('run', 'b', 1),
+                ('end_parallel',)])
+        assert len(instructions) == 1
+        assert self._run(instructions) == 3
+        assert self.calls == ['a', 'b', 'a', 'a']
+
+    def test_sequence_in_parallel(self):
+        instructions = self._compile([
+                ('parallel',), ('run', 'a', 3),
+                ('sequence',), ('run', 'b', 1), ('run', 'c', 1),
+                ('end_sequence',), ('end_parallel',)])
+        assert self._run(instructions) == 3
+        assert self.calls == ['a', 'b', 'a', 'c', 'a']
+
+    def test_wait(self):
+        instructions = self._compile([('wait', 0.1)])
+        assert self._run(instructions) == 6
+        assert self.wheel.pending_count() == 0
+
+    def test_waits_in_parallel(self):
+        instructions = self._compile([
+                ('parallel',), ('wait', 0.3),
+                ('sequence',), ('wait', 0.1), ('wait', 0.1),
+                ('end_sequence',), ('end_parallel',)])
+        assert self._run(instructions) == 16
+        # Starting the second short wait does not restart the long one
+        assert self.clock.now == 0.32
+
+    def test_timed_command_needs_wheel(self):
+        compiler = autoscript.AutoScriptCompiler()
+        compiler.register("wait", self.wait, [float], timed=True)
+        with pytest.raises(autoscript.AutoScriptError) as info:
+            compiler.compile([autoscript.AutoScriptCommand('wait', [1.0], 1)])
+        assert 'needs a timer wheel' in info.value.errors[0]
+
+    def test_timeout(self):
+        # A time limit always lasts at least one wheel tick
+        instructions = self._compile([('timeout', 0.0, 'run', 'a', 100)])
+        assert self._run(instructions) == 2
+        assert instructions[0].timed_out == True
+        assert self.calls == ['a', 'halt']
+
+    def test_timeout_not_reached(self):
+        instructions = self._compile([('timeout', 10.0, 'run', 'a', 2)])
+        assert self._run(instructions) == 2
+        assert instructions[0].timed_out == False
+        assert instructions[0]._deadline.cancelled == True
+
+    def test_timeout_stopped(self):
+        instructions = self._compile([('timeout', 10.0, 'run', 'a', 5)])
+        interpreter = autoscript.AutoScriptInterpreter()
+        interpreter.start(instructions)
+        interpreter.step()
+        interpreter.stop()
+        assert self.calls == ['a', 'halt']
+        assert instructions[0]._deadline.cancelled == True
+
+    def test_timeout_needs_wheel(self):
+        compiler = autoscript.AutoScriptCompiler()
+        compiler.register("run", self.run, [str, int])
+        with pytest.raises(autoscript.AutoScriptError) as info:
+            compiler.compile([autoscript.AutoScriptCommand(
+                                'timeout', [1.0, 'run', 'a', 1], 1)])
+        assert 'timeout needs a timer wheel' in info.value.errors[0]
+
+    def test_repeat_until(self):
+        instructions = self._compile([
+                ('repeat_until', 'sensor', '>=', 2), ('run', 'a', 1),
+                ('end_repeat',)])
+
+        def count(name, steps):
+            self.sensor += 1
+            return True
+        instructions[0].body.children[0].function = count
+        assert self._run(instructions) == 3
+        assert self.sensor == 2.0
+
+    def test_repeat_until_empty_waits(self):
+        instructions = self._compile([
+                ('repeat_until', 'sensor', '>', 0), ('end_repeat',)])
+        interpreter = autoscript.AutoScriptInterpreter()
+        interpreter.start(instructions)
+        assert interpreter.step() == False
+        assert interpreter.step() == False
+        self.sensor = 1.0
+        assert interpreter.step() == True
+
+    def test_if_else(self):
+        rows = [('if', 'sensor', '==', 1), ('run', 'a', 1), ('else',),
+                ('run', 'b', 1), ('end_if',)]
+        self._run(self._compile(rows))
+        self.sensor = 1.0
+        self._run(self._compile(rows))
+        assert self.calls == ['b', 'a']
+
+    def test_if_without_else(self):
+        self._run(self._compile([('if', 'sensor', '<', 0), ('run', 'a', 1),
+                                 ('end_if',), ('run', 'b', 1)]))
+        assert self.calls == ['b']
+
+    def test_stop_stops_running_commands(self):
+        instructions = self._compile([
+                ('parallel',), ('run', 'a', 5), ('run', 'b', 1),
+                ('end_parallel',)])
+        interpreter = autoscript.AutoScriptInterpreter()
+        interpreter.start(instructions)
+        interpreter.step()
+        interpreter.stop()
+        assert self.calls == ['a', 'b', 'halt']
+
+    def test_block_errors(self):
+        with pytest.raises(autoscript.AutoScriptError) as info:
+            self._compile([
+                    ('end_parallel',), ('else',),
+                    ('if', 'bogus', '=>', 'x'),
+                    ('timeout', 'x', 'run', 'a', 1),
+                    ('timeout', 1.0, 'bogus'),
+                    ('parallel',)])
+        errors = info.value.errors
+        assert 'end_parallel without parallel' in errors[0]
+        assert 'else without if' in errors[1]
+        assert "unknown sensor 'bogus'" in errors[2]
+        assert "unknown operator '=>'" in errors[3]
+        assert 'line 3' in errors[4]
+        assert 'line 4' in errors[5]
+        assert "unknown command 'bogus'" in errors[6]
+        assert 'line 3: if is not closed' in errors[7]
+        assert 'line 6: parallel is not closed' in errors[8]
+
+    def test_end_inside_block(self):
+        with pytest.raises(autoscript.AutoScriptError) as info:
+            self._compile([('parallel',), ('end',)])
+        assert 'not closed' in info.value.errors[0]
+
+    def test_get_sensors(self):
+        assert self.compiler.get_sensors() == ['sensor']
+
+
+class TestAutoScriptLibrary:
+    """Test the AutoScriptLibrary class."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        self.compiler = autoscript.AutoScriptCompiler()
+        self.compiler.register("say", lambda text: True, [str])
+
+    def test_refresh(self, tmpdir):
+        tmpdir.join('a.as').write("say,hello\n")
+        tmpdir.join('b.as').write("bogus\n")
+        tmpdir.join('c.txt').write("say,hello\n")
+        library = autoscript.AutoScriptLibrary(self.compiler, str(tmpdir))
+        assert library.refresh() == ['a.as', 'b.as']
+        assert library.get_names() == ['a.as', 'b.as']
+        assert library.get('a.as')[0].arguments == ('hello',)
+        assert library.get_errors('a.as') == []
+        assert library.get('b.as') == None
+        assert "unknown command 'bogus'" in library.get_errors('b.as')[0]
+        assert library.get('c.txt') == None
+
+    def test_refresh_unchanged(self, tmpdir):
+        tmpdir.join('a.as').write("say,hello\n")
+        library = autoscript.AutoScriptLibrary(self.compiler, str(tmpdir))
+        library.refresh()
+        instructions = library.get('a.as')
+        assert library.refresh() == []
+        assert library.get('a.as') is instructions
+
+    def test_refresh_changed_and_removed(self, tmpdir):
+        path = tmpdir.join('a.as')
+        path.write("say,hello\n")
+        tmpdir.join('b.as').write("say,b\n")
+        library = autoscript.AutoScriptLibrary(self.compiler, str(tmpdir))
+        library.refresh()
+        path.write("say,again\n")
+        path.setmtime(path.mtime() + 10)
+        tmpdir.join('b.as').remove()
+        assert library.refresh() == ['a.as', 'b.as']
+        assert library.get('a.as')[0].arguments == ('again',)
+        assert library.get_names() == ['a.as']
+        assert library.get_errors('b.as') == []
+
+    def test_refresh_unreadable(self, tmpdir):
+        tmpdir.join('a.as').write_binary(b"say,\xff\xfe\n")
+        library = autoscript.AutoScriptLibrary(self.compiler, str(tmpdir))
+        assert library.refresh() == ['a.as']
+        assert library.get('a.as') == None
+        assert library.get_errors('a.as') == ["file could not be read"]
+
+    def test_invalidate(self, tmpdir):
+        tmpdir.join('a.as').write("say,hello\n")
+        library = autoscript.AutoScriptLibrary(self.compiler, str(tmpdir))
+        library.refresh()
+        instructions = library.get('a.as')
+        library.invalidate()
+        assert library.refresh() == ['a.as']
+        assert library.get('a.as') is not instructions
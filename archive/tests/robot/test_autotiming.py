@@ -0,0 +1,109 @@
+"""This module tests the autotiming module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import math
+import pytest
+import autoscript
+import autotiming
+
+
+class TestTimingAnalyzer:
+    """Test the TimingAnalyzer class."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        self.calls = []
+
+    def _analyzer(self, tmpdir):
+        tmpdir.join('autotiming.par').write(
+                "[autotiming]\nLOOP_PERIOD = 0.25\nAUTONOMOUS_PERIOD = 5.0\n"
+                "LINEAR_SPEED = 2.0\nTURN_RATE = 90.0\n")
+        tmpdir.join('drivetrain.par').write(
+                "[drivetrain]\nFORWARD_DIRECTION = 1.0\n"
+                "TIME_THRESHOLD = 0.0\nDISTANCE_THRESHOLD = 0.0\n"
+                "AUTO_MEDIUM_DISTANCE_THRESHOLD = 1.0\n"
+                "AUTO_FAR_DISTANCE_THRESHOLD = 2.0\n"
+                "AUTO_NEAR_LINEAR_SPEED_RATIO = 0.25\n"
+                "AUTO_MEDIUM_LINEAR_SPEED_RATIO = 0.5\n"
+                "AUTO_FAR_LINEAR_SPEED_RATIO = 1.0\n"
+                "HEADING_THRESHOLD = 0.0\n"
+                "AUTO_MEDIUM_HEADING_THRESHOLD = 0.0\n"
+                "AUTO_FAR_HEADING_THRESHOLD = 0.0\n"
+                "\n[drivetrain:slow]\nAUTO_FAR_LINEAR_SPEED_RATIO = 0.5\n")
+        return str(tmpdir)
+
+    def _estimate(self, tmpdir, text, profile='default'):
+        path = tmpdir.join('script.as')
+        path.write(text)
+        analyzer = autotiming.TimingAnalyzer(self._analyzer(tmpdir), profile)
+        return analyzer.analyze_file(str(path))
+
+    def test_time_command(self, tmpdir):
+        estimate = self._estimate(tmpdir, "drive_time,1,3,0.5\n")
+        assert estimate.duration == 1.25
+        assert estimate.bounded == True
+
+    def test_instant_command_takes_one_loop(self, tmpdir):
+        estimate = self._estimate(tmpdir, "drive_time,0,3,0.5\n")
+        assert estimate.duration == 0.25
+
+    def test_drive_distance_zones(self, tmpdir):
+        # far: 2m at 2m/s, medium: 1m at 1m/s, near: 1m at 0.5m/s
+        estimate = self._estimate(tmpdir, "drive_distance,4,1\n")
+        assert estimate.duration == 4.25
+
+    def test_profile(self, tmpdir):
+        estimate = self._estimate(tmpdir, "drive_distance,4,1\n", 'slow')
+        assert estimate.duration == 5.25
+
+    def test_heading_is_tracked(self, tmpdir):
+        estimate = self._estimate(tmpdir, "turn_to_heading,90,1\n"
+                                          "adjust_heading,-45,1\n"
+                                          "turn_to_heading,90,1\n")
+        assert [c.duration for c in estimate.children] == [1.25, 0.75, 0.75]
+
+    def test_no_speed_never_finishes(self, tmpdir):
+        estimate = self._estimate(tmpdir, "drive_distance,4,0\n")
+        assert math.isinf(estimate.duration)
+
+    def test_parallel_critical_path(self, tmpdir):
+        estimate = self._estimate(tmpdir, "parallel\ndrive_time,1,3,1\n"
+                                          "sequence\nwait,1\nwait,1\n"
+                                          "end_sequence\nend_parallel\n")
+        parallel = estimate.children[0]
+        assert parallel.duration == 2.5
+        assert parallel.critical is parallel.children[1]
+
+    def test_timeout(self, tmpdir):
+        estimate = self._estimate(tmpdir, "timeout,1,drive_distance,4,1\n"
+                                          "timeout,10,wait,1\n")
+        assert [c.duration for c in estimate.children] == [1.25, 1.25]
+
+    def test_conditions_are_lower_bounds(self, tmpdir):
+        estimate = self._estimate(tmpdir, "if,gyro,>,0\nwait,1\nelse\n"
+                                          "wait,2\nend_if\n"
+                                          "repeat_until,gyro,>,0\nwait,1\n"
+                                          "end_repeat\n")
+        assert [c.duration for c in estimate.children] == [2.25, 1.25]
+        assert estimate.bounded == False
+
+    def test_compile_errors(self, tmpdir):
+        with pytest.raises(autoscript.AutoScriptError):
+            self._estimate(tmpdir, "bogus\n")
+
+    def test_main(self, tmpdir, capsys):
+        par_directory = self._analyzer(tmpdir)
+        short = tmpdir.join('short.as')
+        short.write("wait,1\n")
+        long = tmpdir.join('long.as')
+        long.write("parallel\nwait,1\nwait,6\nend_parallel\n")
+        assert autotiming.main(['-p', par_directory, str(short)]) == 0
+        assert autotiming.main(['-p', par_directory, str(long)]) == 1
+        output = capsys.readouterr()[0]
+        assert 'FAILS' in output
+        assert 'wait(6.0)' in output and '*' in output
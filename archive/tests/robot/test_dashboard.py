@@ -0,0 +1,121 @@
+"""This module tests the dashboard module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import pytest
+import dashboard
+
+
+class SmartDashboard(object):
+    """Records the values put on the dashboard."""
+    puts = []
+
+    @classmethod
+    def putNumber(cls, key, value):
+        cls.puts.append((key, value))
+
+    @classmethod
+    def putBoolean(cls, key, value):
+        cls.puts.append((key, value))
+
+    @classmethod
+    def putString(cls, key, value):
+        cls.puts.append((key, value))
+
+
+class Clock(object):
+    """A stopwatch whose time is set by the test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def elapsed_time_in_secs(self):
+        return self.now
+
+
+class Value(object):
+    """A value read by the publisher."""
+
+    def __init__(self, value):
+        self.value = value
+        self.reads = 0
+
+    def get(self):
+        self.reads += 1
+        return self.value
+
+
+@pytest.fixture
+def publisher(monkeypatch):
+    SmartDashboard.puts = []
+    monkeypatch.setattr(dashboard.wpilib, 'SmartDashboard', SmartDashboard)
+    publisher = dashboard.DashboardPublisher(period=0.1, refresh=1.0)
+    publisher._timer = Clock()
+    publisher.reset_statistics()
+    return publisher
+
+
+class TestDashboardPublisher:
+    """Test the DashboardPublisher class."""
+
+    def test_rate(self, publisher):
+        gyro = Value(1.0)
+        publisher.register("Gyro", gyro.get)
+        assert publisher.publish() == 1
+        publisher._timer.now = 0.05
+        gyro.value = 2.0
+        assert publisher.publish() == 0
+        assert gyro.reads == 1
+        publisher._timer.now = 0.1
+        assert publisher.publish() == 1
+        assert SmartDashboard.puts == [("Gyro", 1.0), ("Gyro", 2.0)]
+
+    def test_deadband_and_refresh(self, publisher):
+        gyro = Value(10.0)
+        publisher.register("Gyro", gyro.get, period=0.0, deadband=0.5)
+        publisher.publish()
+        gyro.value = 10.4
+        publisher._timer.now = 0.5
+        assert publisher.publish() == 0
+        gyro.value = 10.6
+        publisher._timer.now = 0.6
+        assert publisher.publish() == 1
+        gyro.value = 10.7
+        publisher._timer.now = 1.6
+        assert publisher.publish() == 1
+        assert SmartDashboard.puts[-1] == ("Gyro", 10.7)
+
+    def test_types(self, publisher):
+        publisher.register("Ready", lambda: True, period=0.0)
+        publisher.register("Status", lambda: "ok", period=0.0)
+        publisher.register("Missing", lambda: None, period=0.0)
+        assert publisher.publish() == 2
+        assert publisher.publish() == 0
+        assert SmartDashboard.puts == [("Ready", True), ("Status", "ok")]
+
+    def test_register_replaces(self, publisher):
+        publisher.register("Gyro", lambda: 1.0)
+        publisher.register("Gyro", lambda: 2.0)
+        assert publisher.get_keys() == ["Gyro"]
+        publisher.publish()
+        assert SmartDashboard.puts == [("Gyro", 2.0)]
+
+    def test_statistics(self, publisher):
+        gyro = Value(1.0)
+        publisher.register("Gyro", gyro.get, period=0.0)
+        publisher.publish()
+        publisher._timer.now = 2.0
+        publisher.publish()
+        gyro.value = 3.0
+        publisher.publish()
+        statistics = publisher.get_statistics()
+        assert statistics['updates'] == 3
+        assert statistics['skipped'] == 0
+        assert statistics['bytes'] == 39
+        assert statistics['bytes_per_second'] == pytest.approx(19.5)
+        publisher.reset_statistics()
+        assert publisher.get_statistics()['updates'] == 0
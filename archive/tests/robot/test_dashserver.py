@@ -0,0 +1,107 @@
+"""This module tests the dashserver module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import json
+import socket
+import threading
+import time
+import pytest
+import dashboard
+import dashserver
+
+
+def _wait(condition, timeout=2.0):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def server(tmpdir):
+    recorder = dashserver.DashboardRecorder(str(tmpdir.join('record.jsonl')))
+    server = dashserver.DashboardServer("localhost", 0, recorder)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    recorder.close()
+
+
+class TestDashboardServer:
+    """Test the stand-in dashboard server and client."""
+
+    def test_publish(self, server, tmpdir):
+        client = dashserver.DashboardClient("localhost", server.get_port())
+        # The connection is started by the first flush and finished by a
+        # later one
+        assert _wait(lambda: client.flush() or client.is_connected())
+        publisher = dashboard.DashboardPublisher(period=0.0, table=client)
+        publisher.register("Gyro", lambda: 12.5)
+        publisher.register("Ready", lambda: True)
+        publisher.register("Status", lambda: "ok")
+        assert publisher.publish() == 3
+        assert client.is_connected() == True
+        assert _wait(lambda: len(server.table.get_values()) == 3)
+        assert server.table.get_values() == {"Gyro": 12.5, "Ready": True,
+                                             "Status": "ok"}
+        statistics = server.table.get_statistics()
+        assert statistics['lines'] == 1
+        assert statistics['updates'] == {"Gyro": 1, "Ready": 1, "Status": 1}
+        client.dispose()
+
+        lines = tmpdir.join('record.jsonl').read().splitlines()
+        record = json.loads(lines[0])
+        assert record['u']['Gyro'] == 12.5
+        assert 'r' in record and 't' in record
+
+    def test_invalid_lines(self, server):
+        connection = socket.create_connection(("localhost",
+                                               server.get_port()))
+        connection.sendall(b'not json\n[1, 2]\n{"u": 5}\n{"u": {"A": 1}}\n')
+        assert _wait(lambda: server.table.get_statistics()['lines'] == 1)
+        assert server.table.get_statistics()['errors'] == 3
+        connection.close()
+
+    def test_no_server(self):
+        probe = socket.socket()
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+        probe.close()
+        client = dashserver.DashboardClient("localhost", port, retry=10.0)
+        client.putNumber("Gyro", 1.0)
+        client.putNumber("Lift Encoder", 2)
+        client.flush()
+        assert not _wait(lambda: client.flush() or client.is_connected(),
+                         0.2)
+        assert client.dropped == 2
+
+    def test_connect_does_not_wait(self):
+        # A non-routable address never answers, so a blocking connect
+        # would wait for its timeout
+        client = dashserver.DashboardClient("10.255.255.1", 5800,
+                                            retry=10.0)
+        client.putNumber("Gyro", 1.0)
+        start = time.time()
+        client.flush()
+        client.flush()
+        assert time.time() - start < 0.01
+        assert client.is_connected() == False
+        assert client.dropped == 1
+        client.dispose()
+
+    def test_format_table(self):
+        lines = dashserver.format_table(
+                    {"Gyro": 1.25, "Status": "ok"},
+                    {'lines': 10, 'bytes': 500, 'errors': 0, 'seconds': 2.0,
+                     'updates': {"Gyro": 10, "Status": 2}})
+        assert lines[0] == "6 updates/s  5 lines/s  250 bytes/s  0 errors"
+        assert lines[1].split() == ["Gyro", "1.250", "5.0/s"]
+        assert lines[2].split() == ["Status", "ok", "1.0/s"]
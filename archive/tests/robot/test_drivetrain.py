@@ -0,0 +1,52 @@
+"""This module tests the drivetrain module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import pytest
+import drivetrain
+import schemas
+
+
+class RobotDrive(object):
+    """Records the outputs driven by the test."""
+
+    def __init__(self):
+        self.driven = []
+
+    def arcadeDrive(self, linear, turn, squared):
+        self.driven.append((linear, turn))
+
+
+class TestDriveHeading:
+    """Test the corrections made while replaying a trajectory."""
+
+    @pytest.fixture(autouse=True)
+    def setup_drive_train(self):
+        """Setup each test."""
+        drive_train = drivetrain.DriveTrain.__new__(drivetrain.DriveTrain)
+        drive_train._config = schemas.DRIVETRAIN_SCHEMA.defaults()
+        drive_train._robot_drive = RobotDrive()
+        drive_train.accelerometer_enabled = True
+        drive_train.gyro_enabled = False
+        drive_train._distance_traveled = 1.0
+        self._drive_train = drive_train
+
+    def test_distance_behind(self):
+        self._drive_train.drive_heading(0.5, 0.0, None, 1.2)
+        linear, turn = self._drive_train._robot_drive.driven[-1]
+        assert linear == pytest.approx(0.6)
+        assert turn == 0.0
+
+    def test_distance_ahead_limited(self):
+        self._drive_train.drive_heading(0.5, 0.0, None, -1.0)
+        linear, turn = self._drive_train._robot_drive.driven[-1]
+        assert linear == pytest.approx(0.2)
+
+    def test_without_accelerometer(self):
+        self._drive_train.accelerometer_enabled = False
+        self._drive_train.drive_heading(0.5, 0.0, None, 3.0)
+        assert self._drive_train._robot_drive.driven[-1] == (0.5, 0.0)
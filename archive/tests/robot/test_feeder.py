@@ -0,0 +1,63 @@
+"""This module tests the feeder module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import pytest
+import feeder
+import feeder_arm
+import parameters
+
+
+class TestFeederProfiles:
+    """Test switching the feeder and its arms between profiles."""
+
+    @pytest.fixture(autouse=True)
+    def setup_feeder(self, tmpdir):
+        """Setup each test."""
+        parameters.invalidate()
+        path = tmpdir.join('feeder.par')
+        path.write("[feeder]\nOPEN_SPEED_RATIO = 0.5\n"
+                   "[feeder:fast]\nOPEN_SPEED_RATIO = 1.0\n")
+        right = tmpdir.join('right_arm.par')
+        right.write("[feeder_arm]\nCLOCKWISE_SPEED_RATIO = 0.5\n"
+                    "[feeder_arm:fast]\nCLOCKWISE_SPEED_RATIO = 1.0\n"
+                    "[feeder_arm:grip]\nCLOCKWISE_SPEED_RATIO = 0.75\n")
+        left = tmpdir.join('left_arm.par')
+        left.write("[feeder_arm]\nCLOCKWISE_SPEED_RATIO = 0.5\n")
+        self._feeder = feeder.Feeder(str(path))
+        self._feeder._right_arm = feeder_arm.FeederArm(str(right))
+        self._feeder._left_arm = feeder_arm.FeederArm(str(left))
+
+    def test_profiles_include_arms(self):
+        assert self._feeder.get_profiles() == ['default', 'fast', 'grip']
+
+    def test_arm_only_profile(self):
+        unit = self._feeder
+        assert unit.set_profile('grip') == True
+        assert unit.get_profile() == 'default'
+        assert unit._right_arm.get_profile() == 'grip'
+        assert unit._right_arm.get_config().clockwise_speed_ratio == 0.75
+        assert unit._left_arm.get_profile() == 'default'
+
+    def test_arms_fall_back_independently(self):
+        unit = self._feeder
+        unit.set_profile('grip')
+        assert unit.set_profile('fast') == True
+        assert unit.get_config().open_speed_ratio == 1.0
+        assert unit._right_arm.get_profile() == 'fast'
+        assert unit._left_arm.get_profile() == 'default'
+
+        assert unit.set_profile('grip') == True
+        assert unit.get_profile() == 'default'
+        assert unit.get_config().open_speed_ratio == 0.5
+
+    def test_unknown_profile(self):
+        unit = self._feeder
+        unit.set_profile('fast')
+        assert unit.set_profile('missing') == False
+        assert unit.get_profile() == 'default'
+        assert unit._right_arm.get_profile() == 'default'
@@ -0,0 +1,120 @@
+"""This module tests the matchanalysis module.
+
+    Packages(s) required:
+    - pytest
+    - numpy
+
+"""
+
+# Imports
+import pytest
+numpy = pytest.importorskip('numpy')
+import common
+import matchanalysis
+import telemetry
+
+
+DISABLED = common.ProgramState.DISABLED
+AUTONOMOUS = common.ProgramState.AUTONOMOUS
+TELEOP = common.ProgramState.TELEOP
+
+
+def _record(ring, timestamp, mode, gyro=0.0, encoder=0, drive_input=0.0,
+            drive_output=0.0, heading_setpoint=None, lift_setpoint=None,
+            line=0):
+    ring.write(timestamp, gyro, 0.0, 0.0, encoder, 0.0, 0.0, 0.0,
+               drive_input, drive_output, heading_setpoint, lift_setpoint,
+               line, mode)
+
+
+def _ring(tmpdir, name, records):
+    path = str(tmpdir.join(name))
+    ring = telemetry.TelemetryRing(path, 1000)
+    for record in records:
+        _record(ring, *record[:2], **record[2])
+    ring.close()
+    return path
+
+
+class TestMatchAnalysis:
+    """Test the match analysis functions."""
+
+    def test_sessions(self, tmpdir):
+        first = _ring(tmpdir, 'a.ring', [(0.0, DISABLED, {}),
+                                         (0.02, DISABLED, {}),
+                                         (5.0, DISABLED, {})])
+        second = _ring(tmpdir, 'b.ring', [(0.0, DISABLED, {})])
+        arrays = matchanalysis.load_rings([first, second])
+        assert list(arrays['session']) == [0, 0, 1, 2]
+
+    def test_loop_statistics(self, tmpdir):
+        timestamps = [0.0, 0.02, 0.04, 0.08, 0.10]
+        path = _ring(tmpdir, 'loop.ring',
+                     [(t, TELEOP, {}) for t in timestamps])
+        statistics = matchanalysis.loop_statistics(
+                                    matchanalysis.load_rings([path]))
+        assert statistics['count'] == 4
+        assert statistics['overruns'] == 1
+        assert statistics['maximum'] == pytest.approx(0.04)
+        assert statistics['modes']['teleop']['count'] == 4
+        assert 'autonomous' not in statistics['modes']
+
+    def test_control_error(self):
+        report = matchanalysis.control_error(
+                    numpy.array([0.0, 8.0, 9.0, 0.0]),
+                    numpy.array([10.0, 10.0, numpy.nan, 0.0]),
+                    numpy.array([AUTONOMOUS, AUTONOMOUS, AUTONOMOUS,
+                                 TELEOP]))
+        assert report['autonomous']['count'] == 2
+        assert report['autonomous']['mean'] == pytest.approx(6.0)
+        assert report['autonomous']['maximum'] == pytest.approx(10.0)
+        assert report['teleop']['maximum'] == 0.0
+
+    def test_command_statistics(self, tmpdir):
+        records = [(0.0, AUTONOMOUS, {'line': 1})]
+        for step, gyro in enumerate([0.0, 40.0, 85.0, 89.5, 90.0]):
+            records.append((0.02 * (step + 1), AUTONOMOUS,
+                            {'line': 2, 'gyro': gyro,
+                             'heading_setpoint': 90.0}))
+        records.append((0.12, AUTONOMOUS, {'line': 2, 'gyro': 90.0}))
+        records.append((0.14, AUTONOMOUS, {'line': 3}))
+        path = _ring(tmpdir, 'auto.ring', records)
+        commands = matchanalysis.command_statistics(
+                                    matchanalysis.load_rings([path]), 1.0,
+                                    10.0)
+        assert [command['line'] for command in commands] == [1, 2, 3]
+        turn = commands[1]
+        assert turn['duration'] == pytest.approx(0.10)
+        assert turn['settle'] == pytest.approx(0.06)
+        assert turn['heading_error'] == pytest.approx(90.0)
+        assert 'lift_error' not in turn
+        assert commands[0]['settle'] == 0.0
+
+    def test_input_latency(self, tmpdir):
+        inputs = [0.0] * 5 + [1.0] * 10 + [0.0] * 10 + [-1.0] * 10
+        outputs = [0.0, 0.0] + inputs[:-2]
+        records = [(0.02 * index, TELEOP,
+                    {'drive_input': x, 'drive_output': y})
+                   for index, (x, y) in enumerate(zip(inputs, outputs))]
+        path = _ring(tmpdir, 'teleop.ring', records)
+        latency = matchanalysis.input_latency(
+                                    matchanalysis.load_rings([path]))
+        assert latency['lag'] == 2
+        assert latency['latency'] == pytest.approx(0.04)
+
+    def test_no_input(self, tmpdir):
+        path = _ring(tmpdir, 'idle.ring', [(0.0, TELEOP, {}),
+                                           (0.02, TELEOP, {})])
+        assert matchanalysis.input_latency(
+                            matchanalysis.load_rings([path])) == None
+
+    def test_main(self, tmpdir, capsys):
+        path = _ring(tmpdir, 'match.ring', [(0.0, TELEOP, {}),
+                                            (0.02, TELEOP, {})])
+        tmpdir.join('bad.ring').write('garbage')
+        par = str(tmpdir.mkdir('par'))
+        assert matchanalysis.main([str(tmpdir), '-p', par]) == 1
+        out = capsys.readouterr().out
+        assert "2 records in 1 sessions" in out
+        assert matchanalysis.main([path, '-p', par, '--json']) == 0
+        assert '"records": 2' in capsys.readouterr().out
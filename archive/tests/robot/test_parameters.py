@@ -0,0 +1,270 @@
+"""This module tests the parameters module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import pytest
+import parameters
+
+
+class TestParameters:
+    """Test the Parameters class and the parameter store."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        parameters.invalidate()
+
+    def _write(self, tmpdir, text):
+        path = tmpdir.join('test.par')
+        path.write(text)
+        return str(path)
+
+    def test_typed_values(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nA = 1\nB = 2.5\nC = abc\n")
+        p = parameters.Parameters(path)
+        assert p.file_opened == True
+        assert p.get_value('sec', 'A') == 1
+        assert p.get_value('sec', 'B') == 2.5
+        assert p.get_value('sec', 'C') == 'abc'
+
+    def test_missing_values(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nA = 1\n")
+        p = parameters.Parameters(path)
+        assert p.get_value('sec', 'MISSING') == None
+        assert p.get_value('missing', 'A') == None
+        assert p.get_value(None, 'A') == None
+
+    def test_file_not_found(self, tmpdir):
+        p = parameters.Parameters(str(tmpdir.join('missing.par')))
+        assert p.file_opened == False
+        assert p.get_value('sec', 'A') == None
+
+    def test_file_parsed_once(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nA = 1\n")
+        before = parameters.get_statistics()
+        parameters.Parameters(path)
+        parameters.Parameters(path)
+        stats = parameters.get_statistics()
+        assert stats['parses'] - before['parses'] == 1
+        assert stats['hits'] - before['hits'] == 1
+        assert stats['files'] == 1
+
+    def test_invalidate(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nA = 1\n")
+        before = parameters.get_statistics()
+        parameters.Parameters(path)
+        parameters.invalidate(path)
+        parameters.Parameters(path)
+        stats = parameters.get_statistics()
+        assert stats['parses'] - before['parses'] == 2
+
+    def test_snapshot_round_trip(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nA = 1\nB = x\n")
+        snapshot = str(tmpdir.join('params.snapshot'))
+        parameters.Parameters(path)
+        assert parameters.save_snapshot(snapshot) == True
+        parameters.invalidate()
+        before = parameters.get_statistics()
+        assert parameters.load_snapshot(snapshot) == 1
+        p = parameters.Parameters(path)
+        assert p.get_value('sec', 'A') == 1
+        assert p.get_value('sec', 'B') == 'x'
+        assert parameters.get_statistics()['parses'] == before['parses']
+
+    def test_snapshot_skips_newer_sources(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nA = 1\n")
+        snapshot = str(tmpdir.join('params.snapshot'))
+        parameters.Parameters(path)
+        parameters.save_snapshot(snapshot)
+        parameters.invalidate()
+        tmpdir.join('test.par').write("[sec]\nA = 2\n")
+        tmpdir.join('test.par').setmtime(1)
+        assert parameters.load_snapshot(snapshot) == 0
+        assert parameters.Parameters(path).get_value('sec', 'A') == 2
+
+    def test_snapshot_missing(self, tmpdir):
+        assert parameters.load_snapshot(str(tmpdir.join('none'))) == 0
+
+    def test_missing_file_is_not_a_miss(self, tmpdir):
+        before = parameters.get_statistics()
+        parameters.Parameters(str(tmpdir.join('missing.par')))
+        stats = parameters.get_statistics()
+        assert stats['misses'] == before['misses']
+        assert stats['parses'] == before['parses']
+        assert stats['missing'] - before['missing'] == 1
+
+    def test_snapshot_differs(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nA = 1\n")
+        snapshot = str(tmpdir.join('params.snapshot'))
+        parameters.Parameters(path)
+        assert parameters.snapshot_differs() == True
+        parameters.save_snapshot(snapshot)
+        assert parameters.snapshot_differs() == False
+
+        # Parsing a file again with the same result is not a difference
+        parameters.invalidate()
+        parameters.load_snapshot(snapshot)
+        parameters.invalidate(path)
+        parameters.Parameters(path)
+        assert parameters.snapshot_differs() == False
+
+        tmpdir.join('test.par').write("[sec]\nA = 2\n")
+        tmpdir.join('test.par').setmtime(1)
+        parameters.Parameters(path)
+        assert parameters.snapshot_differs() == True
+
+
+class TestSchema:
+    _schema = parameters.Schema("sec", [
+        parameters.Field("CHANNEL", int, -1, -1),
+        parameters.Field("INVERTED", bool, False),
+        parameters.Field("RATIO", float, 1.0, 0.0, 1.0, tunable=True),
+        parameters.Field("OTHER_NAME", float, 0.0, attribute="short"),
+    ])
+
+    def _write(self, tmpdir, text):
+        path = tmpdir.join('schema.par')
+        path.write(text)
+        return str(path)
+
+    def test_defaults(self):
+        config = self._schema.defaults()
+        assert config.channel == -1
+        assert config.inverted == False
+        assert config.ratio == 1.0
+        assert config.short == 0.0
+
+    def test_load(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nCHANNEL = 3\nINVERTED = 1\n"
+                                   "RATIO = 0.5\nOTHER_NAME = 2\n")
+        config, errors = self._schema.load(parameters.Parameters(path))
+        assert errors == []
+        assert config.channel == 3 and type(config.channel) is int
+        assert config.inverted == True
+        assert config.ratio == 0.5
+        assert config.short == 2.0 and type(config.short) is float
+
+    def test_missing_and_invalid(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nCHANNEL = x\nRATIO = 2.0\n")
+        config, errors = self._schema.load(parameters.Parameters(path))
+        assert config.channel == -1
+        assert config.inverted == False
+        assert config.ratio == 1.0
+        assert len(errors) == 4
+
+    def test_convert_rejects_fractions(self):
+        channel, inverted = self._schema.fields[0], self._schema.fields[1]
+        assert channel.convert(2.7)[0] == -1
+        assert channel.convert("2.7")[1] == "CHANNEL invalid: '2.7'"
+        assert channel.convert(4.0) == (4, None)
+        assert channel.convert("4") == (4, None)
+        assert inverted.convert(0.5)[1] is not None
+        assert inverted.convert(1.0) == (True, None)
+
+    def test_convert_rejects_non_finite(self):
+        ratio = self._schema.fields[2]
+        for value in [float('nan'), float('inf'), "nan", "-inf"]:
+            assert ratio.convert(value)[0] == 1.0
+            assert ratio.convert(value)[1] is not None
+        channel = self._schema.fields[0]
+        assert channel.convert(float('inf'))[0] == -1
+        assert ratio.convert(0.25) == (0.25, None)
+
+    def test_other_section(self, tmpdir):
+        path = self._write(tmpdir, "[alt]\nCHANNEL = 5\n")
+        config, errors = self._schema.load(parameters.Parameters(path), "alt")
+        assert config.channel == 5
+
+    def test_slots(self):
+        config = self._schema.defaults()
+        with pytest.raises(AttributeError):
+            config.chanel = 1
+
+    def test_copy(self):
+        config = self._schema.defaults()
+        new_config = self._schema.copy(config, {'ratio': 0.25})
+        assert new_config.ratio == 0.25
+        assert new_config.channel == -1
+        assert config.ratio == 1.0
+
+
+    def test_load_profiles(self, tmpdir):
+        path = self._write(tmpdir, "[sec]\nCHANNEL = 3\nRATIO = 0.5\n"
+                                   "[sec:slow]\nRATIO = 0.25\n"
+                                   "[sec:bad]\nRATIO = 5\nCHANNEL = 4\n")
+        p = parameters.Parameters(path)
+        assert p.get_profiles('sec') == ['bad', 'slow']
+        configs, errors = self._schema.load_profiles(p)
+        assert sorted(configs) == ['bad', 'default', 'slow']
+        assert configs['default'].ratio == 0.5
+        assert configs['slow'].ratio == 0.25
+        assert configs['slow'].channel == 3
+        assert configs['bad'].ratio == 0.5
+        assert configs['bad'].channel == 3
+        assert len([e for e in errors if 'bad' in e]) == 2
+
+
+class Subsystem(parameters.Tunable):
+    _schema = TestSchema._schema
+
+    def __init__(self, path):
+        self._parameters_file = path
+        self._profile = parameters.DEFAULT_PROFILE
+        self.reload_tunables()
+
+
+class TestTunable:
+    def test_profiles(self, tmpdir):
+        path = tmpdir.join('tunable.par')
+        path.write("[sec]\nRATIO = 0.5\n[sec:slow]\nRATIO = 0.25\n")
+        subsystem = Subsystem(str(path))
+        assert Subsystem.get_schema() is TestSchema._schema
+        assert subsystem.get_profiles() == ['default', 'slow']
+        assert subsystem.get_config().ratio == 0.5
+        assert subsystem.set_profile('fast') == False
+        assert subsystem.set_profile('slow') == True
+        assert subsystem.get_profile() == 'slow'
+        assert subsystem.get_config().ratio == 0.25
+
+    def test_reload_keeps_profile(self, tmpdir):
+        path = tmpdir.join('tunable.par')
+        path.write("[sec]\nRATIO = 0.5\n[sec:slow]\nRATIO = 0.25\n")
+        subsystem = Subsystem(str(path))
+        subsystem.set_profile('slow')
+        path.write("[sec]\nRATIO = 0.5\n[sec:slow]\nRATIO = 0.125\n")
+        parameters.invalidate()
+        assert subsystem.reload_tunables() == True
+        assert subsystem.get_config().ratio == 0.125
+        path.write("[sec]\nRATIO = 0.5\n")
+        parameters.invalidate()
+        assert subsystem.reload_tunables() == True
+        assert subsystem.get_profile() == 'default'
+        missing = Subsystem(str(tmpdir.join('missing.par')))
+        assert missing.reload_tunables() == False
+
+
+class TestSaveValues:
+    def test_update_existing(self, tmpdir):
+        path = tmpdir.join('save.par')
+        path.write("[sec]\n# comment\nA = 1\nB = 2\n\n[other]\nA = 5\n")
+        assert parameters.save_values(str(path), 'sec', {'A': 0.5}) == True
+        assert path.read() == ("[sec]\n# comment\nA = 0.5\nB = 2\n\n"
+                               "[other]\nA = 5\n")
+
+    def test_add_missing(self, tmpdir):
+        path = tmpdir.join('save.par')
+        path.write("[sec]\nA = 1\n\n[other]\nA = 5\n")
+        parameters.save_values(str(path), 'sec', {'C': 3})
+        parameters.save_values(str(path), 'new', {'D': 4})
+        assert path.read() == ("[sec]\nA = 1\nC = 3\n\n[other]\nA = 5\n"
+                               "[new]\nD = 4\n")
+        p = parameters.Parameters(str(path))
+        assert p.get_value('sec', 'C') == 3
+        assert p.get_value('new', 'D') == 4
+
+    def test_missing_file(self, tmpdir):
+        assert parameters.save_values(str(tmpdir.join('none')), 'sec',
+                                      {'A': 1}) == False
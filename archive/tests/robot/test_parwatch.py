@@ -0,0 +1,95 @@
+"""This module tests the parwatch module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import pytest
+import os
+import parwatch
+
+
+class Clock(object):
+    """A stopwatch whose time is set by the test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def start(self):
+        self.now = 0.0
+
+    def elapsed_time_in_secs(self):
+        return self.now
+
+
+class TestParameterWatcherPolling:
+    """Test the modification time fallback used without inotify."""
+
+    @pytest.fixture(autouse=True)
+    def setup_watcher(self, monkeypatch, tmpdir):
+        """Setup each test."""
+        monkeypatch.setattr(parwatch.ParameterWatcher, '_open_inotify',
+                            lambda self: False)
+        self._directory = tmpdir
+        self._first = self._write('first.par', 1000)
+        self._write('notes.txt', 1000)
+        self._watcher = parwatch.ParameterWatcher(str(tmpdir),
+                                                  poll_interval=0.5)
+        self._clock = Clock()
+        self._watcher._poll_timer = self._clock
+
+    def _write(self, name, mtime):
+        path = str(self._directory.join(name))
+        with open(path, 'w') as par_file:
+            par_file.write("[section]\nVALUE = 1\n")
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_uses_polling(self):
+        assert self._watcher.using_inotify == False
+        self._clock.now = 1.0
+        assert self._watcher.poll() == []
+
+    def test_changed_file(self):
+        os.utime(self._first, (2000, 2000))
+        self._clock.now = 1.0
+        assert self._watcher.poll() == [self._first]
+        self._clock.now = 1.0
+        assert self._watcher.poll() == []
+
+    def test_new_file(self):
+        second = self._write('second.par', 1000)
+        self._clock.now = 1.0
+        assert self._watcher.poll() == [second]
+
+    def test_other_files_ignored(self):
+        self._write('notes.txt', 2000)
+        self._clock.now = 1.0
+        assert self._watcher.poll() == []
+
+    def test_poll_interval(self):
+        os.utime(self._first, (2000, 2000))
+        self._clock.now = 0.2
+        assert self._watcher.poll() == []
+        self._clock.now = 0.5
+        assert self._watcher.poll() == [self._first]
+
+
+class TestParameterWatcherInotify:
+    """Test change detection with inotify, where it is available."""
+
+    def test_changed_file(self, tmpdir):
+        watcher = parwatch.ParameterWatcher(str(tmpdir))
+        if not watcher.using_inotify:
+            watcher.dispose()
+            pytest.skip("inotify is not available")
+        path = str(tmpdir.join('first.par'))
+        with open(path, 'w') as par_file:
+            par_file.write("[section]\nVALUE = 1\n")
+        with open(str(tmpdir.join('notes.txt')), 'w') as other_file:
+            other_file.write("notes")
+        assert watcher.poll() == [os.path.realpath(path)]
+        assert watcher.poll() == []
+        watcher.dispose()
@@ -0,0 +1,247 @@
+"""This module tests the robot module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import pytest
+import os
+import macro
+import parameters
+import robot
+import schemas
+import trajectory
+import userinterface
+from userinterface import JoystickButtons, UserControllers
+
+
+class Joystick(object):
+    """A joystick whose inputs are set by the test."""
+
+    def __init__(self, port, axis_count, button_count):
+        self.axes = [0.0] * 12
+        self.buttons = set()
+        self.pov = -1
+
+    def getRawAxis(self, axis):
+        return self.axes[axis]
+
+    def getRawButton(self, button):
+        return button in self.buttons
+
+    def getPOV(self):
+        return self.pov
+
+
+PARAMETERS = """[userinterface]
+CONTROLLER_COUNT = 2
+CONTROLLER_1_PORT = 0
+CONTROLLER_1_AXIS = 4
+CONTROLLER1_BUTTONS = 10
+CONTROLLER_2_PORT = 1
+CONTROLLER_2_AXIS = 4
+CONTROLLER2_BUTTONS = 10
+"""
+
+
+class RobotTest(object):
+    """Creates a robot with only a user interface and macro objects."""
+
+    @pytest.fixture(autouse=True)
+    def setup_robot(self, monkeypatch, tmpdir):
+        """Setup each test."""
+        parameters.invalidate()
+        monkeypatch.setattr(userinterface.wpilib, 'Joystick', Joystick)
+        path = tmpdir.join('userinterface.par')
+        path.write(PARAMETERS)
+        self._path = path
+
+        # Only the user interface and the macro objects are created; the
+        # other subsystems stay None and are skipped
+        bot = robot.MyRobot.__new__(robot.MyRobot)
+        bot._user_interface = userinterface.UserInterface(str(path))
+        bot._macro_recorder = macro.MacroRecorder()
+        bot._macro_player = macro.MacroPlayer()
+        bot._macro_controller = UserControllers.DRIVER
+        bot._macro_record_button = JoystickButtons.BACK
+        bot._macro_play_button = JoystickButtons.START
+        bot._profile_controller = UserControllers.DRIVER
+        bot._profile_button = JoystickButtons.Y
+        bot._trajectory_controller = UserControllers.DRIVER
+        bot._trajectory_record_button = JoystickButtons.X
+        bot._macro_file = str(tmpdir.join('macro.mac'))
+        bot._macro_abort_threshold = 0.25
+        bot._bind_controls()
+        self._robot = bot
+
+
+class TestMacroPlayback(RobotTest):
+    """Test replaying a driver input macro in teleop."""
+
+    def _make_macro(self, *driver_masks):
+        recorded = macro.Macro(2, 7)
+        for frame, mask in enumerate(driver_masks):
+            recorded.timestamps.append(frame * 10.0)
+            recorded.axis_values.extend([0.0] * 14)
+            recorded.button_masks.extend([mask, 0])
+        return recorded
+
+    def test_replayed_press_calls_bindings(self):
+        bot = self._robot
+        bot._macro_player.start(self._make_macro(
+                                1 << JoystickButtons.LEFTBUMPER))
+        bot.teleopPeriodic()
+        assert bot._driver_alternate == True
+
+    def test_replayed_release_calls_bindings(self):
+        bot = self._robot
+        driver = bot._user_interface._controllers[0].joystick
+        driver.buttons = set([JoystickButtons.LEFTBUMPER])
+        bot.teleopPeriodic()
+        assert bot._driver_alternate == True
+
+        # The macro has the bumper released while the driver still holds it
+        bot._macro_player.start(self._make_macro(0, 0))
+        bot.teleopPeriodic()
+        assert bot._driver_alternate == False
+        bot.teleopPeriodic()
+        assert bot._driver_alternate == False
+
+    def test_replayed_controls_ignored(self):
+        bot = self._robot
+        bot._macro = self._make_macro(1 << JoystickButtons.START,
+                                      1 << JoystickButtons.START)
+        bot._macro_player.start(bot._macro)
+        bot.teleopPeriodic()
+        driver = bot._user_interface._controllers[0]
+        assert bot._macro_player.playing == True
+        assert driver.button_mask == 0
+
+    def test_play_pressed_again_stops(self):
+        bot = self._robot
+        bot._macro = self._make_macro(0, 0)
+        bot._macro_player.start(bot._macro)
+        bot.teleopPeriodic()
+        assert bot._macro_player.playing == True
+        driver = bot._user_interface._controllers[0].joystick
+        driver.buttons = set([JoystickButtons.START])
+        bot.teleopPeriodic()
+        assert bot._macro_player.playing == False
+
+    def test_stick_stops_playback(self):
+        bot = self._robot
+        bot._macro_player.start(self._make_macro(0, 0))
+        driver = bot._user_interface._controllers[0].joystick
+        driver.axes[userinterface.JoystickAxis.LEFTY] = 0.1
+        bot.teleopPeriodic()
+        assert bot._macro_player.playing == True
+        driver.axes[userinterface.JoystickAxis.LEFTY] = -0.8
+        bot.teleopPeriodic()
+        assert bot._macro_player.playing == False
+        assert bot._user_interface.get_axis_value(
+                    0, userinterface.JoystickAxis.LEFTY) == -0.8
+
+    def test_macro_saved_when_disabled(self):
+        bot = self._robot
+        driver = bot._user_interface._controllers[0]
+        bot._start_macro_recording()
+        bot._user_interface.update()
+        # The schema allows up to 32 buttons
+        driver.button_mask = 1 << 32
+        bot._macro_recorder.record(bot._user_interface)
+        bot._stop_macro_recording()
+        assert bot._macro.get_frame_count() == 1
+        assert not os.path.exists(bot._macro_file)
+
+        bot._save_macro()
+        loaded = macro.Macro()
+        assert loaded.load(bot._macro_file) == True
+        assert list(loaded.button_masks) == [1 << 32, 0]
+
+
+class DriveTrain(object):
+    """A drive train with a fixed output and sensor readings."""
+
+    def get_output(self):
+        return 0.5, 0.0
+
+    def get_distance_traveled(self):
+        return 0.0
+
+    def get_heading(self):
+        return 0.0
+
+
+class TestTrajectoryRecording(RobotTest):
+    """Test recording a trajectory in teleop."""
+
+    def test_trajectory_saved_when_disabled(self, tmpdir):
+        bot = self._robot
+        bot._drive_train = DriveTrain()
+        bot._trajectory_recorder = trajectory.TrajectoryRecorder()
+        bot._trajectories = {}
+        bot._trajectory_path = str(tmpdir)
+        bot._trajectory_file = 'recorded.trj'
+        path = os.path.join(str(tmpdir), 'recorded.trj')
+        bot._start_trajectory_recording()
+        bot._trajectory_recorder.record(bot._drive_train)
+        bot._stop_trajectory_recording()
+        assert 'recorded.trj' in bot._trajectories
+        assert not os.path.exists(path)
+
+        bot._save_trajectory()
+        loaded = trajectory.Trajectory()
+        assert loaded.load(path) == True
+        assert list(loaded.linear) == [0.5]
+
+
+class Watcher(object):
+    """A parameter watcher that reports the files set by the test."""
+
+    def __init__(self):
+        self.changed = []
+
+    def poll(self):
+        changed = self.changed
+        self.changed = []
+        return changed
+
+
+class TestParameterChanges(RobotTest):
+    """Test applying parameter file changes while disabled."""
+
+    def test_reload_keeps_hardware_objects(self):
+        bot = self._robot
+        bot._parameter_watcher = Watcher()
+        driver = bot._user_interface._controllers[0]
+        joystick = driver.joystick
+        self._path.write(PARAMETERS + "CONTROLLER1_DEAD_BAND = 0.2\n")
+        bot._apply_parameter_changes()
+        assert driver.dead_band == 0.0
+
+        bot._parameter_watcher.changed = [str(self._path)]
+        bot._apply_parameter_changes()
+        assert bot._user_interface._controllers[0] is driver
+        assert driver.joystick is joystick
+        assert driver.dead_band == 0.2
+
+
+class TestRobotParameters:
+    """Test reading the robot parameters file."""
+
+    def test_invalid_values_use_defaults(self, tmpdir):
+        path = tmpdir.join('robot.par')
+        path.write("[robot]\nTELEMETRY_RECORDS = abc\nMACRO_CONTROLLER = 1\n"
+                   "PROFILE_BUTTON = 40\nMACRO_ABORT_THRESHOLD = nan\n"
+                   "DASHBOARD_SERVER = localhost:5800\n")
+        config, errors = schemas.ROBOT_SCHEMA.load(
+                                    parameters.Parameters(str(path)))
+        assert config.telemetry_records == 15000
+        assert config.macro_controller == 1
+        assert config.profile_button == 9
+        assert config.macro_abort_threshold == 0.25
+        assert config.dashboard_server == "localhost:5800"
+        assert "TELEMETRY_RECORDS invalid: 'abc'" in errors
+        assert "PROFILE_BUTTON out of range: 40" in errors
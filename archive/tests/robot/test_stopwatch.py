@@ -242,3 +242,109 @@ class TestStopwatch:
         assert isinstance(val, float)
         assert val > 0
 
+
+
+class TestStopwatchLaps:
+    """Test the Stopwatch lap, split and timing helpers."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        self._sw = stopwatch.Stopwatch()
+
+    def test_lap_no_start(self):
+        assert self._sw.lap() == None
+        assert self._sw.split() == None
+        assert self._sw.get_statistics().count == 0
+
+    def test_laps_recorded(self):
+        self._sw.start()
+        lap1 = self._sw.lap()
+        lap2 = self._sw.lap()
+        stats = self._sw.get_statistics()
+        assert lap1 >= 0
+        assert lap2 >= 0
+        assert stats.count == 2
+        assert stats.minimum == min(lap1, lap2)
+        assert stats.maximum == max(lap1, lap2)
+
+    def test_split_does_not_end_lap(self):
+        self._sw.start()
+        split = self._sw.split()
+        assert split >= 0
+        assert self._sw.get_statistics().count == 0
+        assert self._sw.lap() >= split
+
+    def test_context_manager(self):
+        with self._sw:
+            assert self._sw._running == True
+        assert self._sw._running == False
+        assert self._sw.get_statistics().count == 1
+
+    def test_decorator(self):
+        @self._sw
+        def add(a, b):
+            return a + b
+        assert add(1, 2) == 3
+        assert add(2, 2) == 4
+        assert add.__name__ == 'add'
+        assert self._sw.get_statistics().count == 2
+
+    def test_nested_blocks(self):
+        with self._sw:
+            start = self._sw._start
+            with self._sw:
+                assert self._sw._start == start
+            assert self._sw._running == True
+        assert self._sw._running == False
+        stats = self._sw.get_statistics()
+        assert stats.count == 2
+        assert stats.maximum <= self._sw.elapsed_time_in_secs()
+
+    def test_recursive_decorator(self):
+        @self._sw
+        def countdown(n):
+            return n if n == 0 else countdown(n - 1)
+        assert countdown(3) == 0
+        assert self._sw._running == False
+        assert self._sw.get_statistics().count == 4
+
+
+class TestRunningStatistics:
+    """Test the RunningStatistics class."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        self._stats = stopwatch.RunningStatistics()
+
+    def test_empty(self):
+        assert self._stats.count == 0
+        assert self._stats.mean == None
+        assert self._stats.percentile(50) == None
+
+    def test_mean_min_max(self):
+        for value in [0.01, 0.02, 0.03]:
+            self._stats.add(value)
+        assert self._stats.count == 3
+        assert self._stats.mean == pytest.approx(0.02)
+        assert self._stats.minimum == 0.01
+        assert self._stats.maximum == 0.03
+
+    def test_percentiles(self):
+        for i in range(1, 101):
+            self._stats.add(i / 1000.0)
+        assert self._stats.percentile(50) == pytest.approx(0.050, rel=0.13)
+        assert self._stats.percentile(95) == pytest.approx(0.095, rel=0.13)
+        assert self._stats.percentile(100) == 0.1
+        assert self._stats.percentile(0) >= 0.001
+
+    def test_constant_memory(self):
+        buckets = len(self._stats._buckets)
+        for i in range(10000):
+            self._stats.add(i * 1e-5)
+        assert len(self._stats._buckets) == buckets
+
+    def test_reset(self):
+        self._stats.add(0.5)
+        self._stats.reset()
+        assert self._stats.count == 0
+        assert self._stats.maximum == None
@@ -0,0 +1,93 @@
+"""This module tests the telemetry module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import math
+import pytest
+import telemetry
+
+
+def _write(ring, count, start=0):
+    for index in range(start, start + count):
+        ring.write(index * 0.02, float(index), 0.5, index * 0.01, index,
+                   0.25, -0.25, 0.75, 0.5, 0.25, None, 100.0, 7, 3)
+
+
+class TestTelemetryRing:
+    """Test the TelemetryRing class."""
+
+    def test_write_and_read(self, tmpdir):
+        path = str(tmpdir.join('test.ring'))
+        ring = telemetry.TelemetryRing(path, 10)
+        assert ring.opened == True
+        _write(ring, 3)
+        records = telemetry.read_ring(path)
+        ring.close()
+        assert len(records) == 3
+        assert [record[0] for record in records] == [0, 1, 2]
+        assert records[2][1] == 0.04
+        assert records[2][5] == 2
+        assert records[2][6:11] == (0.25, -0.25, 0.75, 0.5, 0.25)
+        assert math.isnan(records[2][11])
+        assert records[2][12:] == (100.0, 7, 3)
+
+    def test_wrap(self, tmpdir):
+        path = str(tmpdir.join('wrap.ring'))
+        ring = telemetry.TelemetryRing(path, 4)
+        _write(ring, 10)
+        ring.close()
+        records = telemetry.read_ring(path)
+        assert [record[0] for record in records] == [6, 7, 8, 9]
+
+    def test_continue_after_restart(self, tmpdir):
+        path = str(tmpdir.join('restart.ring'))
+        ring = telemetry.TelemetryRing(path, 4)
+        _write(ring, 3)
+        ring.close()
+        ring = telemetry.TelemetryRing(path, 4)
+        assert ring.get_count() == 3
+        _write(ring, 2, 3)
+        ring.close()
+        records = telemetry.read_ring(path)
+        assert [record[0] for record in records] == [1, 2, 3, 4]
+
+    def test_capacity_change_restarts(self, tmpdir):
+        path = str(tmpdir.join('resize.ring'))
+        ring = telemetry.TelemetryRing(path, 4)
+        _write(ring, 3)
+        ring.close()
+        ring = telemetry.TelemetryRing(path, 8)
+        assert ring.get_count() == 0
+        ring.close()
+        assert telemetry.read_ring(path) == []
+
+    def test_open_failure(self, tmpdir):
+        ring = telemetry.TelemetryRing(str(tmpdir.join('missing', 'x.ring')))
+        assert ring.opened == False
+        ring.write(0.0, 0.0, 0.0, 0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, None,
+                   None, 0, 1)
+        assert ring.get_count() == 0
+
+    def test_read_invalid(self, tmpdir):
+        path = tmpdir.join('bad.ring')
+        path.write_binary(b'garbage')
+        with pytest.raises(ValueError):
+            telemetry.read_ring(str(path))
+
+    def test_read_arrays(self, tmpdir):
+        numpy = pytest.importorskip('numpy')
+        path = str(tmpdir.join('arrays.ring'))
+        ring = telemetry.TelemetryRing(path, 4)
+        _write(ring, 6)
+        ring.close()
+        arrays = telemetry.read_ring_arrays(path)
+        assert list(arrays['tick']) == [2, 3, 4, 5]
+        assert list(arrays['encoder']) == [2, 3, 4, 5]
+        assert numpy.allclose(arrays['lift'], 0.75)
+        assert numpy.isnan(arrays['heading_setpoint']).all()
+        assert list(arrays['line']) == [7, 7, 7, 7]
+        assert list(arrays['mode']) == [3, 3, 3, 3]
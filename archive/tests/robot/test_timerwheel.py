@@ -0,0 +1,88 @@
+"""This module tests the timerwheel module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import pytest
+import timerwheel
+
+
+class FakeClock:
+    """Stand-in for a Stopwatch with a settable elapsed time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def elapsed_time_in_secs(self):
+        return self.now
+
+
+class TestTimerWheel:
+    """Test the TimerWheel class."""
+
+    def setup_method(self, method):
+        """Setup each test."""
+        self._wheel = timerwheel.TimerWheel(resolution=0.02, slots=8,
+                                            levels=3)
+        self._clock = FakeClock()
+        self._wheel._clock = self._clock
+        self._fired = []
+
+    def _advance_to(self, secs):
+        self._clock.now = secs
+        self._wheel.tick()
+
+    def test_constructor(self):
+        assert self._wheel._current_tick == 0
+        assert self._wheel.pending_count() == 0
+        assert len(self._wheel._wheels) == 3
+
+    def test_fires_after_delay(self):
+        self._wheel.schedule(0.1, self._fired.append, 'a')
+        self._advance_to(0.081)
+        assert self._fired == []
+        self._advance_to(0.1001)
+        assert self._fired == ['a']
+        assert self._wheel.pending_count() == 0
+
+    def test_zero_delay_fires_next_tick(self):
+        self._wheel.schedule(0.0, self._fired.append, 'a')
+        self._advance_to(0.021)
+        assert self._fired == ['a']
+
+    def test_cancel(self):
+        t = self._wheel.schedule(0.1, self._fired.append, 'a')
+        t.cancel()
+        assert not t.is_pending()
+        self._advance_to(1.0)
+        assert self._fired == []
+        assert self._wheel.pending_count() == 0
+
+    def test_long_delays_cascade_in_order(self):
+        delays = [0.05, 3.0, 0.5, 1.3, 12.0, 0.2]
+        for d in delays:
+            self._wheel.schedule(d, self._fired.append, d)
+        self._advance_to(20.0)
+        assert self._fired == sorted(delays)
+
+    def test_fires_on_exact_tick(self):
+        expected = {}
+        for ticks in range(1, 300, 7):
+            timer = self._wheel.schedule(ticks * 0.02, lambda: None)
+            expected[timer] = ticks
+        for tick in range(1, 300):
+            self._advance_to(tick * 0.02 + 0.001)
+            for timer, ticks in expected.items():
+                assert timer.fired == (ticks <= tick)
+
+    def test_callback_can_reschedule(self):
+        def again(count):
+            self._fired.append(count)
+            if count < 3:
+                self._wheel.schedule(0.1, again, count + 1)
+        self._wheel.schedule(0.1, again, 1)
+        self._advance_to(1.0)
+        assert self._fired == [1, 2, 3]
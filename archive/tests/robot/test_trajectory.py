@@ -0,0 +1,145 @@
+"""This module tests the trajectory module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import time
+import pytest
+import trajectory
+
+
+class DriveTrain(object):
+    """Records the calls made by the trajectory classes."""
+
+    def __init__(self):
+        self.output = (0.0, 0.0)
+        self.distance = 0.0
+        self.heading = 0.0
+        self.driven = []
+
+    def get_output(self):
+        return self.output
+
+    def get_distance_traveled(self):
+        return self.distance
+
+    def get_heading(self):
+        return self.heading
+
+    def drive_heading(self, linear, turn, heading, distance=None):
+        self.driven.append((linear, turn, heading, distance))
+
+
+def _trajectory(frames):
+    t = trajectory.Trajectory()
+    for timestamp, linear, turn, distance, heading in frames:
+        t.timestamps.append(timestamp)
+        t.linear.append(linear)
+        t.turn.append(turn)
+        t.distance.append(distance)
+        t.heading.append(heading)
+    return t
+
+
+class TestTrajectory:
+    """Test the Trajectory class."""
+
+    def test_empty(self):
+        t = trajectory.Trajectory()
+        assert t.get_frame_count() == 0
+        assert t.get_duration() == 0.0
+
+    def test_save_and_load(self, tmpdir):
+        path = str(tmpdir.join('test.trj'))
+        t = _trajectory([(0.0, 0.5, 0.0, 0.0, 0.0),
+                         (0.02, 0.5, 0.1, 0.01, 1.5)])
+        assert t.save(path) == True
+        loaded = trajectory.Trajectory()
+        assert loaded.load(path) == True
+        assert loaded.get_frame_count() == 2
+        assert loaded.get_duration() == 0.02
+        assert list(loaded.turn) == [0.0, 0.1]
+        assert list(loaded.heading) == [0.0, 1.5]
+
+    def test_load_invalid(self, tmpdir):
+        path = tmpdir.join('bad.trj')
+        path.write_binary(b'TRAJ\x01\x00\x05\x00\x00\x00notzlib')
+        t = trajectory.Trajectory()
+        assert t.load(str(path)) == False
+        assert t.load(str(tmpdir.join('missing.trj'))) == False
+        assert t.get_frame_count() == 0
+
+    def test_load_trajectories(self, tmpdir):
+        _trajectory([(0.0, 1.0, 0.0, 0.0, 0.0)]).save(
+                                            str(tmpdir.join('a.trj')))
+        tmpdir.join('b.trj').write('garbage')
+        trajectories = trajectory.load_trajectories(str(tmpdir))
+        assert list(trajectories) == ['a.trj']
+
+
+class TestTrajectoryRecorder:
+    """Test the TrajectoryRecorder class."""
+
+    def test_record(self):
+        drive_train = DriveTrain()
+        drive_train.distance = 2.0
+        drive_train.heading = 90.0
+        recorder = trajectory.TrajectoryRecorder(max_frames=2)
+        recorder.start(drive_train)
+        drive_train.output = (0.5, -0.25)
+        drive_train.distance = 2.5
+        drive_train.heading = 80.0
+        for count in range(3):
+            recorder.record(drive_train)
+        recorded = recorder.stop()
+        assert recorder.recording == False
+        assert recorded.get_frame_count() == 2
+        assert list(recorded.linear) == [0.5, 0.5]
+        assert list(recorded.turn) == [-0.25, -0.25]
+        assert list(recorded.distance) == [0.5, 0.5]
+        assert list(recorded.heading) == [-10.0, -10.0]
+
+    def test_stop_without_frames(self):
+        recorder = trajectory.TrajectoryRecorder()
+        recorder.start(DriveTrain())
+        assert recorder.stop() == None
+
+
+class TestTrajectoryPlayer:
+    """Test the TrajectoryPlayer class."""
+
+    def test_play(self):
+        drive_train = DriveTrain()
+        drive_train.heading = 45.0
+        drive_train.distance = 3.0
+        player = trajectory.TrajectoryPlayer()
+        player.start(_trajectory([(0.0, 0.5, 0.1, 0.0, 0.0),
+                                  (0.05, 0.6, 0.2, 0.1, 5.0)]), drive_train)
+        assert player.playing == True
+        assert player.step(drive_train) == False
+        assert drive_train.driven[0] == (0.5, 0.1, 45.0, 3.0)
+        time.sleep(0.06)
+        assert player.step(drive_train) == True
+        assert drive_train.driven[-1] == (0.0, 0.0, None, None)
+        assert player.playing == False
+        assert player.step(drive_train) == True
+
+    def test_play_from_start_distance(self):
+        drive_train = DriveTrain()
+        drive_train.distance = 3.0
+        player = trajectory.TrajectoryPlayer()
+        player.start(_trajectory([(0.0, 0.5, 0.0, 0.0, 0.0),
+                                  (0.02, 0.5, 0.0, 0.25, 0.0),
+                                  (10.0, 0.5, 0.0, 0.5, 0.0)]), drive_train)
+        drive_train.distance = 100.0
+        time.sleep(0.03)
+        assert player.step(drive_train) == False
+        assert drive_train.driven[-1] == (0.5, 0.0, 0.0, 3.25)
+
+    def test_start_empty(self):
+        player = trajectory.TrajectoryPlayer()
+        player.start(trajectory.Trajectory(), DriveTrain())
+        assert player.playing == False
@@ -0,0 +1,173 @@
+"""This module tests the userinterface module.
+
+    Packages(s) required:
+    - pytest
+
+"""
+
+# Imports
+import pytest
+import array
+import userinterface
+from userinterface import JoystickAxis, JoystickButtons, UserControllers
+
+
+class Joystick(object):
+    """A joystick whose inputs are set by the test."""
+
+    def __init__(self, port, axis_count, button_count):
+        self.port = port
+        self.axes = [0.0] * 12
+        self.buttons = set()
+        self.pov = -1
+
+    def getRawAxis(self, axis):
+        return self.axes[axis]
+
+    def getRawButton(self, button):
+        return button in self.buttons
+
+    def getPOV(self):
+        return self.pov
+
+
+PARAMETERS = """[userinterface]
+CONTROLLER_COUNT = 3
+CONTROLLER_1_PORT = 0
+CONTROLLER_1_AXIS = 4
+CONTROLLER1_BUTTONS = 10
+CONTROLLER1_DEAD_BAND = 0.105
+CONTROLLER1_EXPO = 0.0
+CONTROLLER_2_PORT = -1
+CONTROLLER_3_PORT = 2
+CONTROLLER_3_AXIS = 4
+CONTROLLER3_BUTTONS = 12
+CONTROLLER3_DEAD_BAND = 0.0
+CONTROLLER3_EXPO = 1.0
+"""
+
+
+class TestUserInterface:
+    """Test the UserInterface class."""
+
+    @pytest.fixture(autouse=True)
+    def setup_ui(self, monkeypatch, tmpdir):
+        """Setup each test."""
+        monkeypatch.setattr(userinterface.wpilib, 'Joystick', Joystick)
+        path = tmpdir.join('userinterface.par')
+        path.write(PARAMETERS)
+        self._ui = userinterface.UserInterface(str(path))
+        self._driver = self._ui._controllers[UserControllers.DRIVER]
+        self._joystick = self._driver.joystick
+        self._calls = []
+
+    def test_load_controllers(self):
+        ui = self._ui
+        assert ui.get_controller_count() == 3
+        assert ui._controllers[1] == None
+        third = ui._controllers[2]
+        assert third.joystick.port == 2
+        assert third.button_count == 12
+        assert self._driver.axis_count == 4
+        assert self._driver.dead_band == 0.105
+        assert ui.get_axis_value(1, JoystickAxis.LEFTX) == 0.0
+        assert ui.get_button_state(5, JoystickButtons.A) == 0
+
+    def test_response_table(self):
+        linear = self._ui._build_response(0.0)
+        assert len(linear) == self._ui.RESPONSE_STEPS + 1
+        assert all(gain == 1.0 for gain in linear)
+        cubic = self._ui._build_response(1.0)
+        assert cubic[0] == 0.0
+        assert cubic[-1] == 1.0
+        assert cubic[64] == pytest.approx((64 / 127.0) ** 2)
+
+    def test_dead_band_uses_raw_value(self):
+        # 0.098 rounds to a table step above the dead band, and 0.106 to
+        # a step below it; only the raw magnitude decides
+        self._joystick.axes[JoystickAxis.LEFTY] = 0.098
+        self._joystick.axes[JoystickAxis.RIGHTX] = -0.106
+        self._ui.update()
+        assert self._ui.get_axis_value(0, JoystickAxis.LEFTY) == 0.0
+        assert self._ui.get_axis_value(0, JoystickAxis.RIGHTX) == -0.106
+
+    def test_expo_applied(self):
+        joystick = self._ui._controllers[2].joystick
+        joystick.axes[JoystickAxis.LEFTX] = 1.0
+        joystick.axes[JoystickAxis.LEFTY] = -0.5
+        self._ui.update()
+        assert self._ui.get_axis_value(2, JoystickAxis.LEFTX) == 1.0
+        assert self._ui.get_axis_value(2, JoystickAxis.LEFTY) == \
+            pytest.approx(-0.5 * (64 / 127.0) ** 2)
+
+    def test_snapshot(self):
+        self._joystick.axes[JoystickAxis.LEFTX] = 0.5
+        self._joystick.pov = 90
+        self._joystick.buttons = set([JoystickButtons.A, JoystickButtons.Y])
+        self._ui.update()
+        # Later changes are not seen until the next update
+        self._joystick.axes[JoystickAxis.LEFTX] = -1.0
+        self._joystick.buttons = set()
+        ui = self._ui
+        assert ui.get_axis_value(0, JoystickAxis.LEFTX) == 0.5
+        assert ui.get_axis_value(0, JoystickAxis.DPADX) == 1.0
+        assert ui.get_axis_value(0, JoystickAxis.DPADY) == 0.0
+        assert ui.get_button_state(0, JoystickButtons.A) == 1
+        assert ui.get_button_state(0, JoystickButtons.Y) == 1
+        assert ui.get_button_state(0, JoystickButtons.B) == 0
+        assert self._driver.button_mask == \
+            (1 << JoystickButtons.A) | (1 << JoystickButtons.Y)
+
+    def test_snapshot_round_trip(self):
+        self._joystick.axes[JoystickAxis.RIGHTY] = 0.75
+        self._joystick.buttons = set([JoystickButtons.START])
+        self._ui.update()
+        axis_count = self._ui.get_snapshot_axis_count()
+        axis_values = array.array('d')
+        button_masks = array.array('Q')
+        self._ui.write_snapshot(axis_values, button_masks, axis_count)
+        assert len(axis_values) == 3 * axis_count
+        assert len(button_masks) == 3
+
+        self._joystick.axes[JoystickAxis.RIGHTY] = 0.0
+        self._joystick.buttons = set()
+        self._ui.update()
+        self._ui.read_snapshot(axis_values, button_masks, 0, 3, axis_count)
+        assert self._ui.get_axis_value(0, JoystickAxis.RIGHTY) == 0.75
+        assert self._ui.get_button_state(0, JoystickButtons.START) == 1
+
+    def test_press_and_release_bindings(self):
+        ui = self._ui
+        ui.on_press(0, JoystickButtons.X,
+                    lambda: self._calls.append('press x'))
+        ui.on_release(0, JoystickButtons.X,
+                      lambda: self._calls.append('release x'))
+        ui.on_press(0, JoystickButtons.B,
+                    lambda: self._calls.append('press b'))
+        ui.while_held(0, JoystickButtons.B,
+                      lambda: self._calls.append('held b'))
+        self._joystick.buttons = set([JoystickButtons.X, JoystickButtons.B])
+        ui.update()
+        assert ui.button_state_changed(0, JoystickButtons.X) == True
+        ui.update()
+        assert ui.button_state_changed(0, JoystickButtons.X) == False
+        self._joystick.buttons = set()
+        ui.update()
+        assert self._calls == ['press x', 'press b', 'held b', 'held b',
+                               'release x']
+
+    def test_clear_bindings(self):
+        self._ui.on_press(0, JoystickButtons.X,
+                          lambda: self._calls.append('press x'))
+        self._ui.clear_bindings()
+        self._joystick.buttons = set([JoystickButtons.X])
+        self._ui.update()
+        assert self._calls == []
+
+    def test_bindings_survive_reload(self):
+        self._ui.on_press(0, JoystickButtons.X,
+                          lambda: self._calls.append('press x'))
+        self._ui.load_parameters()
+        self._ui._controllers[0].joystick.buttons = set([JoystickButtons.X])
+        self._ui.update()
+        assert self._calls == ['press x']
@@ -0,0 +1,3 @@
+drive_time,3,3,0.5
+drive_time,0.1,4,0.5
+end
@@ -0,0 +1,11 @@
+parallel
+drive_time,2,3,0.5
+sequence
+wait,0.5
+timeout,1.5,set_lift_position,2000,0.8
+end_sequence
+end_parallel
+if,lift_encoder,<,1000
+lift_time,0.5,5,0.5
+end_if
+end
@@ -0,0 +1,264 @@
+"""This module writes log files from a background thread.
+
+Logging from the robot loop only puts the log record on a queue; the
+message is not formatted until a background thread writes it, so log calls
+should pass their values as arguments (log.debug("Gyro: %s", angle)) rather
+than building strings.  The writer takes every record that is waiting,
+writes them and flushes each file once per batch, so a slow flash write
+delays the log rather than the loop.
+
+The queue is bounded.  If the writer falls behind, new records are dropped
+and counted instead of blocking the loop.  After shutdown() there is no
+writer, so records are written to their files as they are logged.
+
+"""
+
+# Imports
+import atexit
+import logging
+import os
+import queue
+import threading
+
+
+_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_lock = threading.Lock()
+_queue = None
+_writer = None
+_handlers = {}
+_statistics = {'queued': 0, 'written': 0, 'dropped': 0, 'batches': 0,
+               'errors': 0}
+
+
+def get_statistics():
+    """Return a copy of the log pipeline statistics.
+
+    Returns:
+        A dictionary of the number of records queued, written, dropped
+        because the queue was full and lost to write errors, and the number
+        of batches written.
+
+    """
+    return dict(_statistics)
+
+
+def get_logger(name, path=None, level=logging.DEBUG):
+    """Return a logger that writes to a file from the background thread.
+
+    Calling this again for the same logger, for example when a subsystem
+    is created again, does not add another handler.  Records are not passed
+    on to the root logger, whose console handlers would format them in the
+    robot loop.
+
+    Args:
+        name: the logger name.
+        path: the log file, or None for /home/lvuser/log/<name>.log.
+        level: the lowest level that is logged.
+
+    Returns:
+        The logging.Logger object.
+
+    """
+    if path is None:
+        path = '/home/lvuser/log/%s.log' % name
+    path = os.path.realpath(path)
+    log = logging.getLogger(name)
+    log.setLevel(level)
+    log.propagate = False
+    with _lock:
+        _start()
+        handler = _handlers.get(path)
+        if handler is None:
+            handler = AsyncFileHandler(path)
+            handler.setLevel(logging.DEBUG)
+            handler.setFormatter(logging.Formatter(_FORMAT))
+            _handlers[path] = handler
+        if handler not in log.handlers:
+            log.addHandler(handler)
+    return log
+
+
+def flush(timeout=1.0):
+    """Wait until every queued record has been written.
+
+    Args:
+        timeout: the maximum time to wait in seconds.
+
+    Returns:
+        True if the records were written in time.
+
+    """
+    if _writer is None:
+        return True
+    done = threading.Event()
+    try:
+        _queue.put(done, timeout=timeout)
+    except queue.Full:
+        return False
+    return done.wait(timeout)
+
+
+def shutdown(timeout=1.0):
+    """Write the queued records, stop the writer and close the files.
+
+    Records logged after this are written without the writer thread.
+
+    Args:
+        timeout: the maximum time to wait for the writer in seconds.
+
+    """
+    global _queue, _writer
+    with _lock:
+        writer = _writer
+        _writer = None
+    if writer is None:
+        return
+    try:
+        _queue.put(None, timeout=timeout)
+    except queue.Full:
+        pass
+    writer.join(timeout)
+    with _lock:
+        records = _queue
+        _queue = None
+
+    # Write anything logged while the writer was stopping
+    if not writer.is_alive():
+        while True:
+            try:
+                item = records.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not None:
+                handler, record = item
+                handler.write(record)
+    for handler in list(_handlers.values()):
+        handler.close_file()
+
+
+def _start(max_records=4096, batch_size=256):
+    """Create the queue and start the writer if they are not running.
+
+    The caller must hold _lock.
+    """
+    global _queue, _writer
+    if _writer is not None:
+        return
+    _queue = queue.Queue(max_records)
+    _writer = threading.Thread(target=_write_records,
+                               args=(_queue, batch_size),
+                               name="asynclog")
+    _writer.daemon = True
+    _writer.start()
+
+
+def _write_records(records, batch_size):
+    """Write queued records until shutdown (runs in the writer thread)."""
+    while True:
+        batch = [records.get()]
+        while len(batch) < batch_size:
+            try:
+                batch.append(records.get_nowait())
+            except queue.Empty:
+                break
+
+        written = set()
+        events = []
+        stop = False
+        for item in batch:
+            if item is None:
+                stop = True
+            elif isinstance(item, threading.Event):
+                events.append(item)
+            else:
+                handler, record = item
+                if handler.write(record):
+                    written.add(handler)
+        for handler in written:
+            handler.flush_file()
+        _statistics['batches'] += 1
+        for event in events:
+            event.set()
+        if stop:
+            return
+
+
+class AsyncFileHandler(logging.Handler):
+    """Queues log records to be written to a file by the writer thread.
+
+    Attributes:
+        path: the log file.
+
+    """
+
+    def __init__(self, path):
+        """Create and initialize an AsyncFileHandler.
+
+        Args:
+            path: the log file.
+
+        """
+        logging.Handler.__init__(self)
+        self.path = path
+        self._file = None
+
+    def emit(self, record):
+        """Queue a record without formatting it or waiting.
+
+        Once the writer has shut down, the record is written and flushed
+        at once instead.
+
+        Args:
+            record: the logging.LogRecord.
+
+        """
+        records = _queue
+        if records is None:
+            if self.write(record):
+                self.flush_file()
+            return
+        try:
+            records.put_nowait((self, record))
+        except queue.Full:
+            _statistics['dropped'] += 1
+            return
+        _statistics['queued'] += 1
+
+    def write(self, record):
+        """Format and write a record (called by the writer thread).
+
+        Returns:
+            True if the record was written.
+
+        """
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a')
+            self._file.write(self.format(record) + '\n')
+        except Exception:
+            _statistics['errors'] += 1
+            return False
+        _statistics['written'] += 1
+        return True
+
+    def flush_file(self):
+        """Flush the file (called by the writer thread)."""
+        try:
+            self._file.flush()
+        except (OSError, IOError, ValueError):
+            _statistics['errors'] += 1
+
+    def close_file(self):
+        """Close the file."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except (OSError, IOError):
+                pass
+            self._file = None
+
+
+atexit.register(shutdown)
@@ -0,0 +1,45 @@
+"""This module defines the autoscript commands of the robot.
+
+The robot and the autotiming tool register the same commands with their
+compilers, so the argument types are only defined here.  This module does
+not import the subsystems, so the tools can use it without wpilib.
+
+"""
+
+
+# The arguments of each command: {name: (argument types, timed)}.  The
+# first argument of a timed command is a duration in seconds.
+COMMANDS = {
+    "wait": ([float], True),
+    "wait_time": ([float], True),
+    "drive_time": ([float, int, float], True),
+    "turn_time": ([float, int, float], True),
+    "drive_distance": ([float, float], False),
+    "turn_to_heading": ([float, float], False),
+    "adjust_heading": ([float, float], False),
+    "replay_trajectory": ([str], False),
+    "feed_time": ([float, int, float], True),
+    "arms_time": ([float, int, float], True),
+    "lift_time": ([float, int, float], True),
+    "set_lift_position": ([float, float], False),
+}
+
+
+def register(compiler, command, function, start=None, stop=None,
+             check=None):
+    """Register the handler of one of the robot's commands.
+
+    Args:
+        compiler: the autoscript.AutoScriptCompiler.
+        command: the command name, which must be in COMMANDS.
+        function: the function called every loop iteration with the
+            command arguments until it returns True.
+        start: the function called when the command starts, or None.
+        stop: the function called when the command is stopped, or None.
+        check: the function that checks the arguments when a script is
+            compiled, or None.
+
+    """
+    argument_types, timed = COMMANDS[command]
+    compiler.register(command, function, argument_types, start, stop,
+                      timed, check)
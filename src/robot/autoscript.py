@@ -1,4 +1,37 @@
-"""This module provides a class to read autoscript files.
+"""This module provides classes to read and compile autoscript files.
+
+An autoscript is compiled against a registry of command handlers before it is
+run, so unknown commands and bad arguments are found when the script is
+loaded rather than part way through autonomous.  The compiled instructions
+are run by an interpreter that is stepped once per robot loop iteration.
+
+Besides the registered commands, scripts can use these statements:
+
+    parallel ... end_parallel
+        Run the enclosed statements at the same time and finish when all of
+        them have finished.
+    sequence ... end_sequence
+        Run the enclosed statements one after another (used inside a
+        parallel block).
+    timeout,<seconds>,<command>,<arguments>
+        Run a command, stopping it if it has not finished in time.
+    repeat_until,<sensor>,<operator>,<value> ... end_repeat
+        Run the enclosed statements until the sensor comparison is true.
+        The comparison is checked before each repetition.
+    if,<sensor>,<operator>,<value> ... [else ...] end_if
+        Run the first group of statements if the sensor comparison is true
+        when the block starts, otherwise the else group.
+    end
+        Ignore the rest of the file.
+
+Sensors are registered with the compiler.  The operators are <, <=, >, >=,
+== and !=.
+
+Commands registered as timed take a duration as their first argument.  Each
+timed command schedules its own deadline on a timer wheel when it starts,
+so the same command can run in several branches of a parallel block.  The
+owner of the wheel must tick it once per robot loop iteration, before the
+interpreter is stepped.
 
 Packages required:
     - os
@@ -10,33 +43,589 @@ Packages required:
 
 # Imports
 import os
+import array
 import csv
 import glob
+import math
+import operator
+import stopwatch
 from text_utilities import convert_to_number
 
 
+# Comparison operators of conditions
+_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Block statements, keyed by the statement that ends them
+_BLOCK_ENDS = {
+    'end_parallel': 'parallel',
+    'end_sequence': 'sequence',
+    'end_repeat': 'repeat_until',
+    'end_if': 'if',
+}
+
+
 class AutoScriptCommand(object):
     """Object that stores the information for an autoscript command.
 
     Attributes:
         command: the autonomous command.
         parameters: the List of parameters for the command.
+        line: the line number of the command in the file, or None.
 
     """
     # Public member variables
     command = None
     parameters = None
+    line = None
 
-    def __init__(self, c, p):
+    def __init__(self, c, p, line=None):
         """Create and initialize an AutoScriptCommand.
 
         Args:
             c: the autonomous command.
             p: the List of parameters for the command.
+            line: the line number of the command in the file, or None.
 
         """
         self.command = c
         self.parameters = p
+        self.line = line
+
+
+class AutoScriptError(Exception):
+    """Raised when an autoscript cannot be compiled.
+
+    Attributes:
+        path: the path and filename of the autoscript file, or None.
+        errors: the List of error messages.
+
+    """
+
+    def __init__(self, path, errors):
+        """Create and initialize an AutoScriptError.
+
+        Args:
+            path: the path and filename of the autoscript file, or None.
+            errors: the List of error messages.
+
+        """
+        Exception.__init__(self, "%s: %s" % (path or "autoscript",
+                                             "; ".join(errors)))
+        self.path = path
+        self.errors = errors
+
+
+class AutoScriptHandler(object):
+    """A command that can be used in an autoscript.
+
+    Attributes:
+        command: the command name.
+        function: the function called every loop iteration with the command
+            arguments until it returns True.
+        argument_types: the List of argument types (int, float or str).
+        start: the function called once, without arguments, when the
+            command starts, or None.
+        stop: the function called, without arguments, when the command is
+            stopped before it finishes, or None.
+        timed: True if the first argument is a duration in seconds.
+        check: the function called with the arguments when a script is
+            compiled, which returns an error message or None, or None.
+
+    """
+    __slots__ = ('command', 'function', 'argument_types', 'start', 'stop',
+                 'timed', 'check')
+
+    def __init__(self, command, function, argument_types, start, stop,
+                 timed=False, check=None):
+        """Create and initialize an AutoScriptHandler.
+
+        Args:
+            command: the command name.
+            function: the function called until it returns True.
+            argument_types: the List of argument types.
+            start: the function called when the command starts, or None.
+            stop: the function called when the command is stopped, or None.
+            timed: True if the first argument is a duration in seconds.
+            check: the function that checks the arguments, or None.
+
+        """
+        self.command = command
+        self.function = function
+        self.argument_types = argument_types
+        self.start = start
+        self.stop = stop
+        self.timed = timed
+        self.check = check
+
+
+class AutoScriptInstruction(object):
+    """A compiled autoscript command.
+
+    Every compiled statement provides begin(), step() and stop(), so blocks
+    can hold commands and other blocks alike.
+
+    Attributes:
+        command: the command name.
+        function: the function called every loop iteration until it returns
+            True.
+        arguments: the tuple of converted arguments.
+        start_function: the function called when the instruction begins, or
+            None.
+        stop_function: the function called when the instruction is stopped,
+            or None.
+        line: the line number of the command in the file, or None.
+
+    """
+    __slots__ = ('command', 'function', 'arguments', 'start_function',
+                 'stop_function', 'line')
+
+    def __init__(self, handler, arguments, line):
+        """Create and initialize an AutoScriptInstruction.
+
+        Args:
+            handler: the AutoScriptHandler of the command.
+            arguments: the tuple of converted arguments.
+            line: the line number of the command in the file, or None.
+
+        """
+        self.command = handler.command
+        self.function = handler.function
+        self.arguments = arguments
+        self.start_function = handler.start
+        self.stop_function = handler.stop
+        self.line = line
+
+    def begin(self):
+        """Start the instruction."""
+        if self.start_function:
+            self.start_function()
+
+    def step(self):
+        """Run the instruction for one loop iteration.
+
+        Returns:
+            True when the instruction has finished.
+
+        """
+        return self.function(*self.arguments)
+
+    def stop(self):
+        """Stop the instruction before it has finished."""
+        if self.stop_function:
+            self.stop_function()
+
+
+class AutoScriptTimedInstruction(AutoScriptInstruction):
+    """A compiled command whose first argument is a duration.
+
+    The deadline is scheduled on a timer wheel when the instruction begins,
+    so every instruction keeps its own time.  The function is called with
+    the time left in place of the duration, and the instruction is stopped
+    when the deadline fires.
+
+    """
+    __slots__ = ('_timer_wheel', '_deadline', '_expired')
+
+    def __init__(self, handler, arguments, line, timer_wheel):
+        """Create and initialize an AutoScriptTimedInstruction.
+
+        Args:
+            handler: the AutoScriptHandler of the command.
+            arguments: the tuple of converted arguments, starting with the
+                duration in seconds.
+            line: the line number of the command in the file, or None.
+            timer_wheel: the timerwheel.TimerWheel the deadline is scheduled
+                on.
+
+        """
+        AutoScriptInstruction.__init__(self, handler, arguments, line)
+        self._timer_wheel = timer_wheel
+        self._deadline = None
+        self._expired = False
+
+    def begin(self):
+        """Start the instruction and schedule its deadline."""
+        self._expired = False
+        self._deadline = self._timer_wheel.schedule(self.arguments[0],
+                                                    self._expire)
+        AutoScriptInstruction.begin(self)
+
+    def step(self):
+        """Run the instruction for one loop iteration.
+
+        Returns:
+            True when the instruction has finished or its deadline has
+            passed.
+
+        """
+        if self._expired:
+            return True
+        time_left = self._timer_wheel.get_remaining(self._deadline)
+        if self.function(time_left, *self.arguments[1:]):
+            self._deadline.cancel()
+            return True
+        return False
+
+    def stop(self):
+        """Stop the instruction before it has finished."""
+        if self._deadline:
+            self._deadline.cancel()
+        AutoScriptInstruction.stop(self)
+
+    def _expire(self):
+        """Stop the instruction when its deadline fires."""
+        self._expired = True
+        AutoScriptInstruction.stop(self)
+
+
+class AutoScriptCondition(object):
+    """A sensor comparison used by repeat_until and if blocks.
+
+    Attributes:
+        sensor: the sensor name.
+        function: the function that returns the sensor value.
+        operator: the operator text.
+        compare: the comparison function.
+        value: the value the sensor is compared with.
+
+    """
+    __slots__ = ('sensor', 'function', 'operator', 'compare', 'value')
+
+    def __init__(self, sensor, function, operator_text, value):
+        """Create and initialize an AutoScriptCondition.
+
+        Args:
+            sensor: the sensor name.
+            function: the function that returns the sensor value.
+            operator_text: the operator text, e.g. '>'.
+            value: the value the sensor is compared with.
+
+        """
+        self.sensor = sensor
+        self.function = function
+        self.operator = operator_text
+        self.compare = _OPERATORS[operator_text]
+        self.value = value
+
+    def evaluate(self):
+        """Return True if the comparison is true now."""
+        return self.compare(self.function(), self.value)
+
+
+class AutoScriptSequence(object):
+    """Runs statements one after another.
+
+    Attributes:
+        command: the statement name.
+        arguments: an empty tuple.
+        line: the line number of the block in the file, or None.
+        children: the List of compiled statements.
+
+    """
+    __slots__ = ('command', 'arguments', 'line', 'children', '_index',
+                 '_started')
+
+    def __init__(self, children, line=None, command='sequence'):
+        """Create and initialize an AutoScriptSequence.
+
+        Args:
+            children: the List of compiled statements.
+            line: the line number of the block in the file, or None.
+            command: the statement name.
+
+        """
+        self.command = command
+        self.arguments = ()
+        self.line = line
+        self.children = children
+        self._index = 0
+        self._started = False
+
+    def begin(self):
+        """Start the sequence from the first statement."""
+        self._index = 0
+        self._started = False
+
+    def step(self):
+        """Run the current statement for one loop iteration.
+
+        The next statement starts on the following iteration.
+
+        Returns:
+            True when every statement has finished.
+
+        """
+        if self._index >= len(self.children):
+            return True
+        child = self.children[self._index]
+        if not self._started:
+            self._started = True
+            child.begin()
+        if not child.step():
+            return False
+        self._index += 1
+        self._started = False
+        return self._index >= len(self.children)
+
+    def stop(self):
+        """Stop the current statement."""
+        if self._started and self._index < len(self.children):
+            self.children[self._index].stop()
+        self._started = False
+
+
+class AutoScriptParallel(object):
+    """Runs statements at the same time.
+
+    Attributes:
+        command: the statement name.
+        arguments: an empty tuple.
+        line: the line number of the block in the file, or None.
+        children: the List of compiled statements.
+
+    """
+    __slots__ = ('command', 'arguments', 'line', 'children', '_finished')
+
+    def __init__(self, children, line=None):
+        """Create and initialize an AutoScriptParallel.
+
+        Args:
+            children: the List of compiled statements.
+            line: the line number of the block in the file, or None.
+
+        """
+        self.command = 'parallel'
+        self.arguments = ()
+        self.line = line
+        self.children = children
+        self._finished = []
+
+    def begin(self):
+        """Start every statement."""
+        self._finished = [False] * len(self.children)
+        for child in self.children:
+            child.begin()
+
+    def step(self):
+        """Run every unfinished statement for one loop iteration.
+
+        Returns:
+            True when every statement has finished.
+
+        """
+        finished = True
+        for index, child in enumerate(self.children):
+            if self._finished[index]:
+                continue
+            if child.step():
+                self._finished[index] = True
+            else:
+                finished = False
+        return finished
+
+    def stop(self):
+        """Stop every unfinished statement."""
+        for index, child in enumerate(self.children):
+            if not self._finished[index]:
+                child.stop()
+
+
+class AutoScriptTimeout(object):
+    """Runs a statement with a time limit.
+
+    The time limit is scheduled on a timer wheel when the statement begins,
+    and the statement is stopped when it fires.
+
+    Attributes:
+        command: the statement name.
+        arguments: a tuple of the time limit and the command name.
+        line: the line number of the statement in the file, or None.
+        duration: the time limit in seconds.
+        child: the compiled statement.
+        timed_out: True if the statement was stopped by the time limit.
+
+    """
+    __slots__ = ('command', 'arguments', 'line', 'duration', 'child',
+                 'timed_out', '_timer_wheel', '_deadline')
+
+    def __init__(self, duration, child, timer_wheel, line=None):
+        """Create and initialize an AutoScriptTimeout.
+
+        Args:
+            duration: the time limit in seconds.
+            child: the compiled statement.
+            timer_wheel: the timerwheel.TimerWheel the time limit is
+                scheduled on.
+            line: the line number of the statement in the file, or None.
+
+        """
+        self.command = 'timeout'
+        self.arguments = (duration, child.command) + tuple(child.arguments)
+        self.line = line
+        self.duration = duration
+        self.child = child
+        self.timed_out = False
+        self._timer_wheel = timer_wheel
+        self._deadline = None
+
+    def begin(self):
+        """Start the statement and the time limit."""
+        self.timed_out = False
+        self._deadline = self._timer_wheel.schedule(self.duration,
+                                                    self._expire)
+        self.child.begin()
+
+    def step(self):
+        """Run the statement for one loop iteration.
+
+        Returns:
+            True when the statement has finished or the time limit has been
+            reached.
+
+        """
+        if self.timed_out:
+            return True
+        if self.child.step():
+            self._deadline.cancel()
+            return True
+        return False
+
+    def stop(self):
+        """Stop the statement."""
+        if self._deadline:
+            self._deadline.cancel()
+        if not self.timed_out:
+            self.child.stop()
+
+    def _expire(self):
+        """Stop the statement when the time limit fires."""
+        self.timed_out = True
+        self.child.stop()
+
+
+class AutoScriptRepeatUntil(object):
+    """Repeats statements until a condition is true.
+
+    Attributes:
+        command: the statement name.
+        arguments: a tuple of the sensor, operator and value.
+        line: the line number of the block in the file, or None.
+        condition: the AutoScriptCondition.
+        body: the AutoScriptSequence that is repeated.
+
+    """
+    __slots__ = ('command', 'arguments', 'line', 'condition', 'body',
+                 '_running')
+
+    def __init__(self, condition, body, line=None):
+        """Create and initialize an AutoScriptRepeatUntil.
+
+        Args:
+            condition: the AutoScriptCondition.
+            body: the AutoScriptSequence that is repeated.
+            line: the line number of the block in the file, or None.
+
+        """
+        self.command = 'repeat_until'
+        self.arguments = (condition.sensor, condition.operator,
+                          condition.value)
+        self.line = line
+        self.condition = condition
+        self.body = body
+        self._running = False
+
+    def begin(self):
+        """Start the loop."""
+        self._running = False
+
+    def step(self):
+        """Run the loop for one loop iteration.
+
+        An empty body waits until the condition is true.
+
+        Returns:
+            True when the condition is true before a repetition.
+
+        """
+        if not self._running:
+            if self.condition.evaluate():
+                return True
+            self._running = True
+            self.body.begin()
+        if self.body.step():
+            self._running = False
+        return False
+
+    def stop(self):
+        """Stop the current repetition."""
+        if self._running:
+            self.body.stop()
+        self._running = False
+
+
+class AutoScriptIf(object):
+    """Runs one of two groups of statements depending on a condition.
+
+    Attributes:
+        command: the statement name.
+        arguments: a tuple of the sensor, operator and value.
+        line: the line number of the block in the file, or None.
+        condition: the AutoScriptCondition.
+        then_branch: the AutoScriptSequence run if the condition is true.
+        else_branch: the AutoScriptSequence run if the condition is false.
+
+    """
+    __slots__ = ('command', 'arguments', 'line', 'condition', 'then_branch',
+                 'else_branch', '_branch')
+
+    def __init__(self, condition, then_branch, else_branch, line=None):
+        """Create and initialize an AutoScriptIf.
+
+        Args:
+            condition: the AutoScriptCondition.
+            then_branch: the AutoScriptSequence run if the condition is true.
+            else_branch: the AutoScriptSequence run if the condition is
+                false.
+            line: the line number of the block in the file, or None.
+
+        """
+        self.command = 'if'
+        self.arguments = (condition.sensor, condition.operator,
+                          condition.value)
+        self.line = line
+        self.condition = condition
+        self.then_branch = then_branch
+        self.else_branch = else_branch
+        self._branch = None
+
+    def begin(self):
+        """Check the condition and start the chosen branch."""
+        if self.condition.evaluate():
+            self._branch = self.then_branch
+        else:
+            self._branch = self.else_branch
+        self._branch.begin()
+
+    def step(self):
+        """Run the chosen branch for one loop iteration.
+
+        Returns:
+            True when the branch has finished.
+
+        """
+        return self._branch.step()
+
+    def stop(self):
+        """Stop the chosen branch."""
+        if self._branch:
+            self._branch.stop()
 
 
 class AutoScript(object):
@@ -76,7 +665,8 @@ class AutoScript(object):
             path_and_file: the path and filename of the autoscript file.
 
         Returns:
-            The list of AutoScriptCommand objects.
+            The list of AutoScriptCommand objects, or None if the file could
+            not be read or is not a text CSV file.
 
         """
         # Clear out any old data
@@ -86,6 +676,7 @@ class AutoScript(object):
             with open(path_and_file, 'r') as asfile:
                 csvreader = csv.reader(asfile, delimiter=',')
                 for row in csvreader:
+                    line = csvreader.line_num
                     cmd = None
                     params = []
                     for column in row:
@@ -93,14 +684,14 @@ class AutoScript(object):
                             cmd = column
                         else:
                             num = convert_to_number(column)
-                            if num:
+                            if num is not None:
                                 params.append(num)
                             else:
                                 params.append(column)
                     if cmd:
-                        command = AutoScriptCommand(cmd, params)
+                        command = AutoScriptCommand(cmd, params, line)
                         self._commands.append(command)
-        except (OSError, IOError):
+        except (OSError, IOError, csv.Error, UnicodeDecodeError):
             self._commands = None
             return self._commands
 
@@ -134,3 +725,583 @@ class AutoScript(object):
                 cmd = None
         return cmd
 
+
+class _Block(object):
+    """A block statement that is being compiled."""
+    __slots__ = ('kind', 'line', 'condition', 'children', 'else_children',
+                 'in_else')
+
+    def __init__(self, kind, line, condition=None):
+        """Create and initialize a _Block.
+
+        Args:
+            kind: the statement that opened the block.
+            line: the line number of the statement in the file.
+            condition: the AutoScriptCondition of the block, or None.
+
+        """
+        self.kind = kind
+        self.line = line
+        self.condition = condition
+        self.children = []
+        self.else_children = None
+        self.in_else = False
+
+    def add(self, node):
+        """Add a compiled statement to the current branch of the block."""
+        if self.in_else:
+            self.else_children.append(node)
+        else:
+            self.children.append(node)
+
+    def build(self):
+        """Return the compiled block."""
+        if self.kind == 'parallel':
+            return AutoScriptParallel(self.children, self.line)
+        if self.kind == 'repeat_until':
+            body = AutoScriptSequence(self.children, self.line, 'repeat')
+            return AutoScriptRepeatUntil(self.condition, body, self.line)
+        if self.kind == 'if':
+            then_branch = AutoScriptSequence(self.children, self.line, 'then')
+            else_branch = AutoScriptSequence(self.else_children or [],
+                                             self.line, 'else')
+            return AutoScriptIf(self.condition, then_branch, else_branch,
+                                self.line)
+        return AutoScriptSequence(self.children, self.line)
+
+
+class AutoScriptCompiler(object):
+    """Compiles autoscript commands into a list of instructions.
+
+    Each command is looked up in a registry of handlers and its arguments
+    are checked and converted to the registered types, so running a
+    compiled script needs no string matching or conversion.  Block
+    statements are compiled into objects that run their statements, and the
+    sensors used by conditions are looked up in a registry of sensor
+    functions.  The "end" command stops compilation; anything after it is
+    ignored.
+
+    """
+    # Public member variables
+
+    # Private member objects
+    _handlers = None
+    _sensors = None
+    _timer_wheel = None
+
+    # Private member variables
+
+    def __init__(self, timer_wheel=None):
+        """Create and initialize an AutoScriptCompiler.
+
+        Args:
+            timer_wheel: the timerwheel.TimerWheel that timed commands
+                schedule their deadlines on, or None if there are no timed
+                commands.
+
+        """
+        self._handlers = {}
+        self._sensors = {}
+        self._timer_wheel = timer_wheel
+
+    def dispose(self):
+        """Dispose of an AutoScriptCompiler object."""
+        self._handlers = None
+        self._sensors = None
+        self._timer_wheel = None
+
+    def register(self, command, function, argument_types=(), start=None,
+                 stop=None, timed=False, check=None):
+        """Register the handler of a command.
+
+        Args:
+            command: the command name used in autoscript files.
+            function: the function called every loop iteration with the
+                command arguments until it returns True.
+            argument_types: the List of argument types (int, float or str).
+            start: the function called once, without arguments, when the
+                command starts, or None.
+            stop: the function called, without arguments, when the command
+                is stopped before it finishes (by a timeout, its deadline
+                or when autonomous ends), or None.
+            timed: True if the first argument is a duration in seconds.  The
+                function is then called with the time left in place of the
+                duration, and the command is stopped when the time is up.
+            check: a function called with the converted arguments when a
+                script is compiled, which returns an error message if they
+                cannot be used (for example a name that does not exist), or
+                None.
+
+        """
+        self._handlers[command.lower()] = AutoScriptHandler(
+                                command.lower(), function,
+                                list(argument_types), start, stop, timed,
+                                check)
+
+    def register_sensor(self, sensor, function):
+        """Register a sensor that can be used in conditions.
+
+        Args:
+            sensor: the sensor name used in autoscript files.
+            function: the function, without arguments, that returns the
+                sensor value.
+
+        """
+        self._sensors[sensor.lower()] = function
+
+    def get_commands(self):
+        """Return the sorted List of registered command names."""
+        return sorted(self._handlers)
+
+    def get_sensors(self):
+        """Return the sorted List of registered sensor names."""
+        return sorted(self._sensors)
+
+    def compile(self, commands, path=None):
+        """Compile a list of autoscript commands.
+
+        Args:
+            commands: the List of AutoScriptCommand objects.
+            path: the path and filename the commands were read from, used in
+                error messages.
+
+        Returns:
+            The List of compiled statements.  Each provides begin(), step()
+            and stop().
+
+        Raises:
+            AutoScriptError: listing every command that could not be
+                compiled.
+
+        """
+        instructions = []
+        errors = []
+        blocks = []
+        for command in commands:
+            name = command.command.strip().lower()
+            location = "line %s" % command.line
+            if name == "end":
+                break
+
+            # Trailing empty columns are ignored
+            values = list(command.parameters)
+            while values and values[-1] == '':
+                values.pop()
+
+            if name in ('parallel', 'sequence'):
+                if values:
+                    errors.append("%s: %s takes no arguments" %
+                                  (location, name))
+                blocks.append(_Block(name, command.line))
+                continue
+            if name in ('repeat_until', 'if'):
+                condition = self._compile_condition(name, values, location,
+                                                    errors)
+                blocks.append(_Block(name, command.line, condition))
+                continue
+            if name == 'else':
+                if not blocks or blocks[-1].kind != 'if':
+                    errors.append("%s: else without if" % location)
+                elif blocks[-1].in_else:
+                    errors.append("%s: more than one else" % location)
+                else:
+                    blocks[-1].in_else = True
+                    blocks[-1].else_children = []
+                continue
+            if name in _BLOCK_ENDS:
+                if not blocks or blocks[-1].kind != _BLOCK_ENDS[name]:
+                    errors.append("%s: %s without %s" %
+                                  (location, name, _BLOCK_ENDS[name]))
+                    continue
+                node = blocks.pop().build()
+            elif name == 'timeout':
+                node = None
+                duration = None
+                if values:
+                    duration = _convert_argument(values[0], float)
+                if duration is None or duration < 0:
+                    errors.append("%s: timeout needs a time in seconds and "
+                                  "a command" % location)
+                elif len(values) < 2:
+                    errors.append("%s: timeout needs a command" % location)
+                elif self._timer_wheel is None:
+                    errors.append("%s: timeout needs a timer wheel" %
+                                  location)
+                else:
+                    child = self._compile_command(
+                                str(values[1]).strip().lower(), values[2:],
+                                command.line, location, errors)
+                    if child:
+                        node = AutoScriptTimeout(duration, child,
+                                                 self._timer_wheel,
+                                                 command.line)
+            else:
+                node = self._compile_command(name, values, command.line,
+                                             location, errors)
+
+            if node is None:
+                continue
+            if blocks:
+                blocks[-1].add(node)
+            else:
+                instructions.append(node)
+
+        for block in blocks:
+            errors.append("line %s: %s is not closed" %
+                          (block.line, block.kind))
+
+        if errors:
+            raise AutoScriptError(path, errors)
+        return instructions
+
+    def _compile_command(self, name, values, line, location, errors):
+        """Compile a registered command.
+
+        Args:
+            name: the lower case command name.
+            values: the List of argument values read from the file.
+            line: the line number of the command in the file.
+            location: the location used in error messages.
+            errors: the List the error messages are added to.
+
+        Returns:
+            The AutoScriptInstruction, or None if it could not be compiled.
+
+        """
+        handler = self._handlers.get(name)
+        if handler is None:
+            errors.append("%s: unknown command '%s'" % (location, name))
+            return None
+        if len(values) != len(handler.argument_types):
+            errors.append("%s: %s takes %d arguments, %d given" %
+                          (location, name, len(handler.argument_types),
+                           len(values)))
+            return None
+
+        arguments = []
+        valid = True
+        for index, (value, argument_type) in enumerate(
+                                zip(values, handler.argument_types)):
+            converted = _convert_argument(value, argument_type)
+            if converted is None:
+                errors.append("%s: %s argument %d must be %s, not %r" %
+                              (location, name, index + 1,
+                               argument_type.__name__, value))
+                valid = False
+            arguments.append(converted)
+        if not valid:
+            return None
+        if handler.check:
+            message = handler.check(*arguments)
+            if message:
+                errors.append("%s: %s %s" % (location, name, message))
+                return None
+        if handler.timed:
+            if self._timer_wheel is None:
+                errors.append("%s: %s needs a timer wheel" % (location, name))
+                return None
+            return AutoScriptTimedInstruction(handler, tuple(arguments), line,
+                                              self._timer_wheel)
+        return AutoScriptInstruction(handler, tuple(arguments), line)
+
+    def _compile_condition(self, name, values, location, errors):
+        """Compile the sensor comparison of a repeat_until or if statement.
+
+        Args:
+            name: the statement name.
+            values: the List of values read from the file.
+            location: the location used in error messages.
+            errors: the List the error messages are added to.
+
+        Returns:
+            The AutoScriptCondition, or None if it could not be compiled.
+
+        """
+        if len(values) != 3:
+            errors.append("%s: %s needs a sensor, an operator and a value" %
+                          (location, name))
+            return None
+        sensor = str(values[0]).strip().lower()
+        operator_text = str(values[1]).strip()
+        value = _convert_argument(values[2], float)
+        function = self._sensors.get(sensor)
+        valid = True
+        if function is None:
+            errors.append("%s: unknown sensor '%s'" % (location, values[0]))
+            valid = False
+        if operator_text not in _OPERATORS:
+            errors.append("%s: unknown operator '%s'" %
+                          (location, operator_text))
+            valid = False
+        if value is None:
+            errors.append("%s: %s value must be float, not %r" %
+                          (location, name, values[2]))
+            valid = False
+        if not valid:
+            return None
+        return AutoScriptCondition(sensor, function, operator_text, value)
+
+    def compile_file(self, path_and_file):
+        """Read and compile an autoscript file.
+
+        Args:
+            path_and_file: the path and filename of the autoscript file.
+
+        Returns:
+            The List of compiled statements.
+
+        Raises:
+            AutoScriptError: if the file could not be read or compiled.
+
+        """
+        commands = AutoScript().parse(path_and_file)
+        if commands is None:
+            raise AutoScriptError(path_and_file, ["file could not be read"])
+        return self.compile(commands, path_and_file)
+
+
+class AutoScriptLibrary(object):
+    """Keeps every autoscript in a directory compiled in memory.
+
+    Scripts are compiled when they are first found and only recompiled when
+    their modification time changes, so selecting a script to run needs no
+    file access.
+
+    """
+    # Public member variables
+
+    # Private member objects
+    _compiler = None
+    _entries = None
+
+    # Private member variables
+    _directory = None
+    _pattern = "*.as"
+
+    def __init__(self, compiler, directory="/home/lvuser/autoscript",
+                 pattern="*.as"):
+        """Create and initialize an AutoScriptLibrary.
+
+        Args:
+            compiler: the AutoScriptCompiler used to compile the scripts.
+            directory: the directory containing the autoscript files.
+            pattern: the filename pattern of the autoscript files.
+
+        """
+        self._compiler = compiler
+        self._directory = os.path.realpath(directory)
+        self._pattern = pattern
+        self._entries = {}
+
+    def dispose(self):
+        """Dispose of an AutoScriptLibrary object."""
+        self._compiler = None
+        self._entries = None
+
+    def get_directory(self):
+        """Return the directory containing the autoscript files."""
+        return self._directory
+
+    def refresh(self):
+        """Compile any scripts that are new or have changed.
+
+        Scripts whose files have been removed are dropped from the library.
+
+        Returns:
+            The sorted List of the names of the scripts that were compiled
+            or dropped.
+
+        """
+        changed = []
+        found = set()
+        for path in glob.glob(os.path.join(self._directory, self._pattern)):
+            name = os.path.basename(path)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            found.add(name)
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == mtime:
+                continue
+            try:
+                instructions = self._compiler.compile_file(path)
+                errors = []
+            except AutoScriptError as error:
+                instructions = None
+                errors = error.errors
+            self._entries[name] = (mtime, instructions, errors)
+            changed.append(name)
+
+        for name in list(self._entries):
+            if name not in found:
+                del self._entries[name]
+                changed.append(name)
+        return sorted(changed)
+
+    def invalidate(self):
+        """Compile every script again on the next refresh.
+
+        This is needed when something the scripts are checked against at
+        compile time, such as the set of recorded trajectories, changes.
+        """
+        for name, entry in self._entries.items():
+            self._entries[name] = (None,) + entry[1:]
+
+    def get_names(self):
+        """Return the sorted List of script names (filenames)."""
+        return sorted(self._entries)
+
+    def get(self, name):
+        """Return the compiled statements of a script.
+
+        Args:
+            name: the script name.
+
+        Returns:
+            The List of compiled statements, or None if the script is not in
+            the library or could not be compiled.
+
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        return entry[1]
+
+    def get_errors(self, name):
+        """Return the List of compile errors of a script."""
+        entry = self._entries.get(name)
+        if entry is None:
+            return []
+        return entry[2]
+
+
+class AutoScriptInterpreter(object):
+    """Runs compiled autoscript instructions.
+
+    The interpreter is stepped once per robot loop iteration.  The current
+    statement is stepped until it reports that it has finished, and then the
+    next statement starts on the following iteration.  The wall time of
+    every top level statement is recorded.
+
+    Attributes:
+        running: True while there are instructions left to run.
+
+    """
+    # Public member variables
+    running = False
+
+    # Private member objects
+    _instructions = None
+    _timer = None
+
+    # Private member variables
+    _index = 0
+    _started = False
+    _instruction_times = None
+
+    def __init__(self):
+        """Create and initialize an AutoScriptInterpreter."""
+        self.running = False
+        self._instructions = []
+        self._timer = stopwatch.Stopwatch()
+        self._index = 0
+        self._started = False
+        self._instruction_times = array.array('d')
+
+    def dispose(self):
+        """Dispose of an AutoScriptInterpreter object."""
+        self._instructions = None
+        self._timer = None
+
+    def start(self, instructions):
+        """Start running a compiled autoscript from the beginning.
+
+        Args:
+            instructions: the List of compiled statements.
+
+        """
+        self._instructions = instructions or []
+        self._index = 0
+        self._started = False
+        self._instruction_times = array.array('d')
+        self._timer.start()
+        self.running = len(self._instructions) > 0
+
+    def stop(self):
+        """Stop running the autoscript.
+
+        A statement that has started but not finished is stopped, so any
+        motors it was driving are turned off.
+
+        """
+        if self.running and self._started:
+            self._instructions[self._index].stop()
+        self.running = False
+        self._started = False
+        self._timer.stop()
+
+    def step(self):
+        """Run the current instruction for one loop iteration.
+
+        Returns:
+            True when every instruction has finished.
+
+        """
+        if not self.running:
+            return True
+
+        instruction = self._instructions[self._index]
+        if not self._started:
+            self._started = True
+            instruction.begin()
+
+        if not instruction.step():
+            return False
+
+        self._instruction_times.append(self._timer.lap())
+        self._index += 1
+        self._started = False
+        if self._index >= len(self._instructions):
+            self.stop()
+            return True
+        return False
+
+    def get_current_instruction(self):
+        """Return the instruction being run, or None if not running."""
+        if not self.running:
+            return None
+        return self._instructions[self._index]
+
+    def get_instruction_times(self):
+        """Return the wall times of the finished instructions.
+
+        Returns:
+            A List of (AutoScriptInstruction, time in seconds) tuples in the
+            order the instructions ran.
+
+        """
+        return list(zip(self._instructions, self._instruction_times))
+
+
+def _convert_argument(value, argument_type):
+    """Convert an autoscript argument to a type.
+
+    Args:
+        value: the value read from the file.
+        argument_type: the type of the argument (int, float or str).
+
+    Returns:
+        The converted value, or None if the value is not of the type.
+        Infinite and NaN values are not numbers of either type.
+
+    """
+    if argument_type is str:
+        return str(value)
+    if isinstance(value, str):
+        return None
+    if math.isinf(value) or math.isnan(value):
+        return None
+    if argument_type is int and value != int(value):
+        return None
+    return argument_type(value)
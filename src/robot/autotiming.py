@@ -0,0 +1,516 @@
+"""This module estimates how long autoscripts take to run.
+
+Each command's duration is worked out from its arguments and the speed
+ratios and thresholds in the subsystem parameter files, using a simple model
+of how fast the robot moves at full output (autotiming.par).  Durations are
+rounded to whole robot loop iterations the way the interpreter runs them:
+a statement takes at least one iteration, and the next statement starts on
+the following iteration.
+
+Parallel blocks take as long as their slowest statement, which is marked as
+the critical path.  The body of a repeat_until block is counted once and
+if blocks count their slower branch, since conditions depend on sensors.
+
+Run from the command line to check scripts before they reach the field:
+
+    python autotiming.py -p ../../parameters ../../autoscript/*.as
+
+"""
+
+# Imports
+import argparse
+import math
+import os
+import sys
+import autocommands
+import autoscript
+import common
+import parameters
+import schemas
+import timerwheel
+import trajectory
+
+
+_MODEL_SCHEMA = parameters.Schema("autotiming", [
+    parameters.Field("LOOP_PERIOD", float, 0.02, 0.001),
+    parameters.Field("AUTONOMOUS_PERIOD", float, 15.0, 0.0),
+    parameters.Field("LINEAR_SPEED", float, 3.0, 0.0),
+    parameters.Field("TURN_RATE", float, 360.0, 0.0),
+    parameters.Field("LIFT_RATE", float, 2000.0, 0.0),
+])
+
+
+class TimingEstimate(object):
+    """The estimated duration of a compiled autoscript statement.
+
+    Attributes:
+        statement: the compiled statement.
+        duration: the estimated time in seconds, or infinity if the
+            statement never finishes.
+        bounded: False if the time depends on a sensor condition, in which
+            case the duration is a lower bound.
+        children: the List of TimingEstimate objects of the statements in a
+            block.
+        critical: the TimingEstimate of the statement that sets the duration
+            of a parallel block, or None.
+
+    """
+    __slots__ = ('statement', 'duration', 'bounded', 'children', 'critical')
+
+    def __init__(self, statement, duration, bounded=True, children=None,
+                 critical=None):
+        """Create and initialize a TimingEstimate.
+
+        Args:
+            statement: the compiled statement.
+            duration: the estimated time in seconds.
+            bounded: False if the duration is a lower bound.
+            children: the List of TimingEstimate objects of a block.
+            critical: the TimingEstimate on the critical path, or None.
+
+        """
+        self.statement = statement
+        self.duration = duration
+        self.bounded = bounded
+        self.children = children or []
+        self.critical = critical
+
+
+class TimingAnalyzer(object):
+    """Estimates the run time of autoscripts.
+
+    The analyzer registers every robot command in autocommands with its
+    own compiler, so a script that would not compile on the robot is
+    reported the same way.
+
+    """
+    # Public member variables
+
+    # Private member objects
+    _compiler = None
+    _drive = None
+    _lift = None
+    _feeder = None
+    _arm = None
+    _model = None
+    _trajectories = None
+
+    # Private member variables
+    _heading = 0.0
+    _lift_position = 0.0
+
+    def __init__(self, par_directory="/home/lvuser/par",
+                 profile=parameters.DEFAULT_PROFILE,
+                 trajectory_directory="/home/lvuser/trajectory"):
+        """Create and initialize a TimingAnalyzer.
+
+        Args:
+            par_directory: the directory containing the parameter files.
+            profile: the parameter profile to use.
+            trajectory_directory: the directory containing the recorded
+                trajectories.
+
+        """
+        self._drive = parameters.load_profile(
+                            schemas.DRIVETRAIN_SCHEMA,
+                            os.path.join(par_directory, "drivetrain.par"),
+                            profile)
+        self._lift = parameters.load_profile(
+                            schemas.LIFT_SCHEMA,
+                            os.path.join(par_directory, "lift.par"), profile)
+        self._feeder = parameters.load_profile(
+                            schemas.FEEDER_SCHEMA,
+                            os.path.join(par_directory, "feeder.par"),
+                            profile)
+        self._arm = parameters.load_profile(
+                            schemas.FEEDER_ARM_SCHEMA,
+                            os.path.join(par_directory, "right_arm.par"),
+                            profile)
+        self._model = parameters.load_profile(
+                            _MODEL_SCHEMA,
+                            os.path.join(par_directory, "autotiming.par"),
+                            profile)
+        self._trajectories = trajectory.load_trajectories(
+                                    trajectory_directory)
+        self._heading = 0.0
+        self._lift_position = 0.0
+
+        # The wheel is never ticked; it only lets timeouts compile
+        compiler = autoscript.AutoScriptCompiler(timerwheel.TimerWheel())
+        # Timed commands are estimated from their duration argument
+        register = autocommands.register
+        register(compiler, "wait", self._wait)
+        register(compiler, "wait_time", self._wait)
+        register(compiler, "drive_time", self._drive_time)
+        register(compiler, "turn_time", self._turn_time)
+        register(compiler, "drive_distance", self._drive_distance)
+        register(compiler, "turn_to_heading", self._turn_to_heading)
+        register(compiler, "adjust_heading", self._adjust_heading)
+        register(compiler, "replay_trajectory", self._replay_trajectory,
+                 check=self._check_trajectory)
+        register(compiler, "feed_time", self._feed_time)
+        register(compiler, "arms_time", self._arms_time)
+        register(compiler, "lift_time", self._lift_time)
+        register(compiler, "set_lift_position", self._set_lift_position)
+        compiler.register_sensor("gyro", lambda: self._heading)
+        compiler.register_sensor("lift_encoder",
+                                 lambda: self._lift_position)
+        self._compiler = compiler
+
+    def dispose(self):
+        """Dispose of a TimingAnalyzer object."""
+        self._compiler = None
+
+    def get_autonomous_period(self):
+        """Return the length of the autonomous period in seconds."""
+        return self._model.autonomous_period
+
+    def analyze_file(self, path_and_file):
+        """Estimate the run time of an autoscript file.
+
+        Args:
+            path_and_file: the path and filename of the autoscript file.
+
+        Returns:
+            The TimingEstimate of the whole script.
+
+        Raises:
+            autoscript.AutoScriptError: if the file could not be read or
+                compiled.
+
+        """
+        return self.analyze(self._compiler.compile_file(path_and_file))
+
+    def analyze(self, statements):
+        """Estimate the run time of compiled statements.
+
+        The robot is assumed to start at heading 0 with the lift at encoder
+        count 0.
+
+        Args:
+            statements: the List of compiled statements.
+
+        Returns:
+            The TimingEstimate of the whole script.
+
+        """
+        self._heading = 0.0
+        self._lift_position = 0.0
+        return self._sequence(None, statements)
+
+    def _estimate(self, statement):
+        """Return the TimingEstimate of a compiled statement."""
+        if isinstance(statement, autoscript.AutoScriptInstruction):
+            seconds = statement.function(*statement.arguments)
+            return TimingEstimate(statement, self._loops(seconds))
+        if isinstance(statement, autoscript.AutoScriptSequence):
+            return self._sequence(statement, statement.children)
+        if isinstance(statement, autoscript.AutoScriptParallel):
+            children = [self._estimate(child)
+                        for child in statement.children]
+            if not children:
+                return TimingEstimate(statement, self._loops(0.0))
+            critical = max(children, key=lambda c: c.duration)
+            return TimingEstimate(statement, critical.duration,
+                                  all(c.bounded for c in children),
+                                  children, critical)
+        if isinstance(statement, autoscript.AutoScriptTimeout):
+            child = self._estimate(statement.child)
+            limit = self._loops(statement.duration)
+            if child.duration <= limit:
+                return TimingEstimate(statement, child.duration,
+                                      child.bounded, [child])
+            return TimingEstimate(statement, limit, True, [child])
+        if isinstance(statement, autoscript.AutoScriptRepeatUntil):
+            body = self._sequence(statement.body, statement.body.children)
+            return TimingEstimate(statement, body.duration, False, [body])
+        if isinstance(statement, autoscript.AutoScriptIf):
+            heading = self._heading
+            lift_position = self._lift_position
+            then_branch = self._sequence(statement.then_branch,
+                                         statement.then_branch.children)
+            self._heading = heading
+            self._lift_position = lift_position
+            else_branch = self._sequence(statement.else_branch,
+                                         statement.else_branch.children)
+            critical = max([then_branch, else_branch],
+                           key=lambda c: c.duration)
+            return TimingEstimate(statement, critical.duration, False,
+                                  [then_branch, else_branch], critical)
+        return TimingEstimate(statement, self._loops(0.0))
+
+    def _sequence(self, statement, statements):
+        """Return the TimingEstimate of statements run one after another."""
+        children = [self._estimate(child) for child in statements]
+        duration = sum(child.duration for child in children)
+        if not children:
+            duration = self._loops(0.0)
+        return TimingEstimate(statement, duration,
+                              all(c.bounded for c in children), children)
+
+    def _loops(self, seconds):
+        """Round a duration up to whole robot loop iterations.
+
+        A command checks its progress once per iteration, starting on the
+        iteration it begins, so it finishes on the first iteration at or
+        after its duration.
+
+        """
+        if math.isinf(seconds):
+            return seconds
+        period = self._model.loop_period
+        return (math.ceil(max(seconds, 0.0) / period - 1e-9) + 1) * period
+
+    def _wait(self, duration):
+        """Estimate the "wait" command."""
+        return duration
+
+    def _drive_time(self, duration, direction, speed):
+        """Estimate the "drive_time" command."""
+        return max(duration - self._drive.time_threshold, 0.0)
+
+    def _turn_time(self, duration, direction, speed):
+        """Estimate the "turn_time" command and the heading it turns to."""
+        config = self._drive
+        turned = _travel(duration, config.time_threshold,
+                         config.auto_medium_time_threshold,
+                         config.auto_far_time_threshold,
+                         self._turn_rates(speed))
+        if direction == common.Direction.LEFT:
+            self._heading -= turned
+        else:
+            self._heading += turned
+        return max(duration - config.time_threshold, 0.0)
+
+    def _drive_distance(self, distance, speed):
+        """Estimate the "drive_distance" command."""
+        config = self._drive
+        if distance > 0:
+            direction = config.forward_direction
+        else:
+            direction = config.backward_direction
+        rate = self._model.linear_speed * math.fabs(direction) * speed
+        return _duration(math.fabs(distance), config.distance_threshold,
+                         config.auto_medium_distance_threshold,
+                         config.auto_far_distance_threshold,
+                         (rate * config.auto_near_linear_speed_ratio,
+                          rate * config.auto_medium_linear_speed_ratio,
+                          rate * config.auto_far_linear_speed_ratio))
+
+    def _turn_to_heading(self, heading, speed):
+        """Estimate the "turn_to_heading" command."""
+        angle = math.fabs(heading - self._heading)
+        self._heading = heading
+        return self._turn(angle, speed)
+
+    def _adjust_heading(self, adjustment, speed):
+        """Estimate the "adjust_heading" command."""
+        self._heading += adjustment
+        return self._turn(math.fabs(adjustment), speed)
+
+    def _turn(self, angle, speed):
+        """Return the time to turn through an angle using the gyro."""
+        config = self._drive
+        return _duration(angle, config.heading_threshold,
+                         config.auto_medium_heading_threshold,
+                         config.auto_far_heading_threshold,
+                         self._turn_rates(speed))
+
+    def _turn_rates(self, speed):
+        """Return the near, medium and far turn rates in degrees/second."""
+        config = self._drive
+        rate = (self._model.turn_rate * speed *
+                max(math.fabs(config.left_direction),
+                    math.fabs(config.right_direction)))
+        return (rate * config.auto_near_turning_speed_ratio,
+                rate * config.auto_medium_turning_speed_ratio,
+                rate * config.auto_far_turning_speed_ratio)
+
+    def _check_trajectory(self, name):
+        """Report a "replay_trajectory" command with no recorded trajectory."""
+        if name not in self._trajectories:
+            return "trajectory '%s' has not been recorded" % name
+        return None
+
+    def _replay_trajectory(self, name):
+        """Estimate the "replay_trajectory" command."""
+        recorded = self._trajectories[name]
+        self._heading += recorded.heading[-1]
+        return recorded.get_duration()
+
+    def _feed_time(self, duration, direction, speed):
+        """Estimate the "feed_time" command."""
+        return max(duration - self._arm.time_threshold, 0.0)
+
+    def _arms_time(self, duration, direction, speed):
+        """Estimate the "arms_time" command."""
+        if direction not in (common.Direction.OPEN, common.Direction.CLOSE):
+            return 0.0
+        return max(duration - self._feeder.time_threshold, 0.0)
+
+    def _lift_time(self, duration, direction, speed):
+        """Estimate the "lift_time" command and the position it moves to."""
+        config = self._lift
+        moved = _travel(duration, config.time_threshold,
+                        config.auto_medium_time_threshold,
+                        config.auto_far_time_threshold,
+                        self._lift_rates(direction == common.Direction.DOWN,
+                                         speed))
+        if direction == common.Direction.DOWN:
+            self._lift_position -= moved
+        else:
+            self._lift_position += moved
+        return max(duration - config.time_threshold, 0.0)
+
+    def _set_lift_position(self, position, speed):
+        """Estimate the "set_lift_position" command."""
+        config = self._lift
+        down = position < self._lift_position
+        distance = math.fabs(position - self._lift_position)
+        self._lift_position = position
+        return _duration(distance, config.encoder_threshold,
+                         config.auto_medium_encoder_threshold,
+                         config.auto_far_encoder_threshold,
+                         self._lift_rates(down, speed))
+
+    def _lift_rates(self, down, speed):
+        """Return the near, medium and far lift rates in counts/second."""
+        config = self._lift
+        if down:
+            output = math.fabs(config.down_direction) * config.down_speed_ratio
+        else:
+            output = math.fabs(config.up_direction) * config.up_speed_ratio
+        rate = self._model.lift_rate * output * speed
+        return (rate * config.auto_near_speed_ratio,
+                rate * config.auto_medium_speed_ratio,
+                rate * config.auto_far_speed_ratio)
+
+
+def _zones(amount, threshold, medium_threshold, far_threshold):
+    """Split the remaining amount of a move into speed zones.
+
+    Commands slow down as the amount left (distance, angle, counts or time)
+    falls below the far and medium thresholds, and stop once it is below
+    the threshold.
+
+    Returns:
+        A tuple of the near, medium and far amounts.
+
+    """
+    near = max(min(amount, medium_threshold) - threshold, 0.0)
+    medium = max(min(amount, far_threshold) -
+                 max(medium_threshold, threshold), 0.0)
+    far = max(amount - max(far_threshold, threshold), 0.0)
+    return near, medium, far
+
+
+def _duration(amount, threshold, medium_threshold, far_threshold, rates):
+    """Return the time to move an amount at the near, medium and far rates.
+
+    Returns:
+        The time in seconds, or infinity if a zone has no speed.
+
+    """
+    seconds = 0.0
+    for length, rate in zip(_zones(amount, threshold, medium_threshold,
+                                   far_threshold), rates):
+        if length <= 0.0:
+            continue
+        if rate <= 0.0:
+            return float('inf')
+        seconds += length / rate
+    return seconds
+
+
+def _travel(duration, threshold, medium_threshold, far_threshold, rates):
+    """Return how far a timed move goes at the near, medium and far rates."""
+    return sum(length * rate for length, rate in
+               zip(_zones(duration, threshold, medium_threshold,
+                          far_threshold), rates))
+
+
+def format_estimate(estimate, indent=0):
+    """Return the lines of a report of a TimingEstimate.
+
+    The statement on the critical path of each parallel or if block is
+    marked with '*', and times that depend on sensors are marked with '+'.
+
+    Args:
+        estimate: the TimingEstimate of a script.
+        indent: the indent of the first level of statements.
+
+    Returns:
+        A List of strings.
+
+    """
+    lines = []
+    for child in estimate.children:
+        statement = child.statement
+        name = statement.command
+        if isinstance(statement, autoscript.AutoScriptInstruction):
+            name += "(%s)" % ", ".join(str(argument)
+                                       for argument in statement.arguments)
+        marks = ""
+        if estimate.critical is child:
+            marks += "*"
+        if not child.bounded:
+            marks += "+"
+        lines.append("line %-4s %-40s %8.2fs %s" %
+                     (statement.line, "  " * indent + name, child.duration,
+                      marks))
+        if not isinstance(statement, autoscript.AutoScriptInstruction):
+            lines.extend(format_estimate(child, indent + 1))
+    return lines
+
+
+def main(argv=None):
+    """Report the estimated run time of autoscript files.
+
+    Args:
+        argv: the command line arguments, or None to use sys.argv.
+
+    Returns:
+        0 if every script compiles and fits in the autonomous period,
+        otherwise 1.
+
+    """
+    parser = argparse.ArgumentParser(
+                description="Estimate how long autoscripts take to run.")
+    parser.add_argument("scripts", nargs="+", help="autoscript files")
+    parser.add_argument("-p", "--par-directory", default="/home/lvuser/par",
+                        help="directory containing the parameter files")
+    parser.add_argument("--profile", default=parameters.DEFAULT_PROFILE,
+                        help="parameter profile to use")
+    parser.add_argument("-t", "--trajectory-directory",
+                        default="/home/lvuser/trajectory",
+                        help="directory containing the recorded trajectories")
+    args = parser.parse_args(argv)
+
+    analyzer = TimingAnalyzer(args.par_directory, args.profile,
+                              args.trajectory_directory)
+    period = analyzer.get_autonomous_period()
+    result = 0
+    for path in args.scripts:
+        try:
+            estimate = analyzer.analyze_file(path)
+        except autoscript.AutoScriptError as error:
+            print("%s: does not compile" % path)
+            for message in error.errors:
+                print("  %s" % message)
+            result = 1
+            continue
+
+        print("%s: %.2fs%s of %.2fs" %
+              (path, estimate.duration, "" if estimate.bounded else "+",
+               period))
+        for line in format_estimate(estimate, 1):
+            print("  " + line)
+        if estimate.duration > period:
+            print("  FAILS: does not finish in the %.2fs autonomous period" %
+                  period)
+            result = 1
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
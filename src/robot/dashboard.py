@@ -0,0 +1,227 @@
+"""This module publishes robot values to the SmartDashboard.
+
+Subsystems register each value they show with a function that reads it.
+The publisher is called once per robot loop iteration; it reads the values
+that are due at their own rate and publishes the ones that changed by more
+than their deadband, all together so NetworkTables sends them in one
+update.  A value that only drifted within its deadband is still published
+after the refresh interval, so the dashboard settles on the exact value.
+
+The number of updates and an estimate of the bytes sent are kept so the
+dashboard bandwidth can be reported.
+
+Values are put on wpilib.SmartDashboard unless another table is given, such
+as a dashserver.DashboardClient when the robot is simulated without a
+driver station.  A table with a flush() method has it called every
+iteration, after that iteration's updates, even when nothing changed.
+
+"""
+
+# Imports
+import wpilib
+import stopwatch
+
+
+# Estimated NetworkTables bytes per update (entry id, sequence number and
+# type) and per value type
+_UPDATE_BYTES = 5
+_NUMBER_BYTES = 8
+_BOOLEAN_BYTES = 1
+_STRING_BYTES = 2
+
+
+class DashboardEntry(object):
+    """A value published to the dashboard.
+
+    Attributes:
+        key: the dashboard key.
+        getter: the function that returns the current value.
+        period: the time between reads in seconds.
+        deadband: the smallest change of a number that is published.
+        value: the last published value, or None.
+        checked: the time the value was last read.
+        published: the time the value was last published.
+
+    """
+    __slots__ = ('key', 'getter', 'period', 'deadband', 'value', 'checked',
+                 'published')
+
+    def __init__(self, key, getter, period, deadband):
+        """Create and initialize a DashboardEntry.
+
+        Args:
+            key: the dashboard key.
+            getter: the function that returns the current value.
+            period: the time between reads in seconds.
+            deadband: the smallest change of a number that is published.
+
+        """
+        self.key = key
+        self.getter = getter
+        self.period = period
+        self.deadband = deadband
+        self.value = None
+        self.checked = None
+        self.published = None
+
+
+class DashboardPublisher(object):
+    """Publishes registered values to the SmartDashboard."""
+
+    # Private member objects
+    _entries = None
+    _table = None
+    _timer = None
+
+    # Private member variables
+    _period = 0.1
+    _deadband = 0.0
+    _refresh = 1.0
+    _updates = 0
+    _skipped = 0
+    _bytes = 0
+    _reset_time = 0.0
+
+    def __init__(self, period=0.1, deadband=0.0, refresh=1.0, table=None):
+        """Create and initialize a DashboardPublisher.
+
+        Args:
+            period: the default time between reads in seconds.
+            deadband: the default smallest change of a number that is
+                published.
+            refresh: the longest time a value within its deadband goes
+                unpublished in seconds.
+            table: the object the values are put on, or None for the
+                SmartDashboard.
+
+        """
+        self._entries = []
+        self._table = table
+        self._period = period
+        self._deadband = deadband
+        self._refresh = refresh
+        self._timer = stopwatch.Stopwatch()
+        self._timer.start()
+        self.reset_statistics()
+
+    def dispose(self):
+        """Dispose of a DashboardPublisher object."""
+        self._entries = None
+        self._table = None
+        self._timer = None
+
+    def register(self, key, getter, period=None, deadband=None):
+        """Publish a value to the dashboard.
+
+        Registering a key again replaces it.
+
+        Args:
+            key: the dashboard key.
+            getter: the function that returns the current number, bool or
+                string, or None if there is no value to publish.
+            period: the time between reads in seconds, or None for the
+                default.
+            deadband: the smallest change of a number that is published, or
+                None for the default.
+
+        """
+        if period is None:
+            period = self._period
+        if deadband is None:
+            deadband = self._deadband
+        self._entries = [entry for entry in self._entries
+                         if entry.key != key]
+        self._entries.append(DashboardEntry(key, getter, period, deadband))
+
+    def get_keys(self):
+        """Return the List of registered keys."""
+        return [entry.key for entry in self._entries]
+
+    def publish(self):
+        """Publish the values that are due and have changed.
+
+        This should be called once per robot loop iteration.
+
+        Returns:
+            The number of values published.
+
+        """
+        now = self._timer.elapsed_time_in_secs()
+        updates = []
+        for entry in self._entries:
+            if (entry.checked is not None and
+                    now - entry.checked < entry.period):
+                continue
+            entry.checked = now
+            value = entry.getter()
+            if value is None:
+                continue
+            if (entry.published is not None and
+                    now - entry.published < self._refresh and
+                    not _changed(entry.value, value, entry.deadband)):
+                self._skipped += 1
+                continue
+            updates.append((entry, value))
+
+        table = self._table
+        if table is None:
+            table = wpilib.SmartDashboard
+        for entry, value in updates:
+            entry.value = value
+            entry.published = now
+            self._bytes += _put(table, entry.key, value)
+        if hasattr(table, 'flush'):
+            table.flush()
+        self._updates += len(updates)
+        return len(updates)
+
+    def get_statistics(self):
+        """Return the publishing statistics since the last reset.
+
+        Returns:
+            A dictionary of the number of values published and skipped, the
+            estimated bytes sent, the time in seconds and the estimated
+            bytes per second.
+
+        """
+        seconds = self._timer.elapsed_time_in_secs() - self._reset_time
+        rate = 0.0
+        if seconds > 0.0:
+            rate = self._bytes / seconds
+        return {'updates': self._updates, 'skipped': self._skipped,
+                'bytes': self._bytes, 'seconds': seconds,
+                'bytes_per_second': rate}
+
+    def reset_statistics(self):
+        """Start counting the publishing statistics again."""
+        self._updates = 0
+        self._skipped = 0
+        self._bytes = 0
+        self._reset_time = self._timer.elapsed_time_in_secs()
+
+
+def _changed(previous, value, deadband):
+    """Return True if a value is different enough to publish."""
+    if (isinstance(value, bool) or isinstance(previous, bool) or
+            not isinstance(value, (int, float)) or
+            not isinstance(previous, (int, float))):
+        return value != previous
+    return abs(value - previous) > deadband
+
+
+def _put(table, key, value):
+    """Put a value on a dashboard table.
+
+    Returns:
+        The estimated number of bytes sent.
+
+    """
+    if isinstance(value, bool):
+        table.putBoolean(key, value)
+        return _UPDATE_BYTES + _BOOLEAN_BYTES
+    if isinstance(value, (int, float)):
+        table.putNumber(key, value)
+        return _UPDATE_BYTES + _NUMBER_BYTES
+    value = str(value)
+    table.putString(key, value)
+    return _UPDATE_BYTES + _STRING_BYTES + len(value.encode('utf-8'))
@@ -0,0 +1,478 @@
+"""This module is a stand-in dashboard for developing without a robot.
+
+The simulated robot sends its dashboard values over TCP to a server on the
+development machine instead of NetworkTables, so dashboard and telemetry
+changes can be developed and measured without the driver station software
+or a robot radio.  The robot uses it when DASHBOARD_SERVER is set to
+host:port in robot.par.
+
+The protocol is one JSON object per line:
+
+    {"t": <robot time in seconds>, "u": {<key>: <value>, ...}}
+
+holding every update the robot made in one loop iteration.
+
+Run the server with a terminal viewer, optionally recording every update
+to a JSON lines file:
+
+    python dashserver.py --port 5800 -r session.jsonl
+
+"""
+
+# Imports
+import argparse
+import errno
+import json
+import select
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+
+DEFAULT_PORT = 5800
+
+
+class DashboardClient(object):
+    """Sends dashboard values to a DashboardServer.
+
+    This takes the place of wpilib.SmartDashboard for a DashboardPublisher.
+    The values put between flush() calls are sent as one line.  Sending
+    never blocks the robot loop: the server address is looked up when the
+    client is created, the connection is started without waiting and
+    checked on later flushes, and while the server is not running the
+    client tries to connect again every retry interval.  Updates that
+    cannot be sent are dropped and counted.
+
+    Attributes:
+        dropped: the number of updates that were not sent.
+
+    """
+    # Public member variables
+    dropped = 0
+
+    # Private member objects
+    _socket = None
+    _values = None
+    _pending = None
+
+    # Private member variables
+    _address = None
+    _connecting = False
+    _retry = 1.0
+    _last_attempt = None
+    _max_pending = 65536
+
+    def __init__(self, host="localhost", port=DEFAULT_PORT, retry=1.0,
+                 max_pending=65536):
+        """Create and initialize a DashboardClient.
+
+        Args:
+            host: the server host name.
+            port: the server port.
+            retry: the time between connection attempts in seconds.
+            max_pending: the most bytes waiting to be sent.
+
+        """
+        self.dropped = 0
+        self._socket = None
+        self._values = {}
+        self._pending = bytearray()
+        self._address = None
+        self._connecting = False
+        self._retry = retry
+        self._last_attempt = None
+        self._max_pending = max_pending
+        try:
+            self._address = socket.getaddrinfo(host, port, 0,
+                                               socket.SOCK_STREAM)[0]
+        except (OSError, IndexError):
+            self._address = None
+
+    def dispose(self):
+        """Dispose of a DashboardClient object."""
+        self.close()
+        self._values = None
+        self._pending = None
+
+    def putNumber(self, key, value):
+        """Queue a number to be sent."""
+        self._values[key] = value
+
+    def putBoolean(self, key, value):
+        """Queue a boolean to be sent."""
+        self._values[key] = value
+
+    def putString(self, key, value):
+        """Queue a string to be sent."""
+        self._values[key] = value
+
+    def is_connected(self):
+        """Return True if the client is connected to a server."""
+        return self._socket is not None and not self._connecting
+
+    def flush(self):
+        """Send the queued values as one line.
+
+        This is also where a connection in progress is checked, so it
+        should be called every loop iteration even when nothing changed.
+        """
+        values = self._values
+        self._values = {}
+        if not self._connect():
+            self.dropped += len(values)
+            return
+
+        if values:
+            line = json.dumps({"t": time.time(), "u": values},
+                              separators=(',', ':')) + "\n"
+            data = line.encode('utf-8')
+            if len(self._pending) + len(data) > self._max_pending:
+                self.dropped += len(values)
+            else:
+                self._pending += data
+        if not self._pending:
+            return
+        try:
+            sent = self._socket.send(self._pending)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.close()
+            return
+        del self._pending[:sent]
+
+    def close(self):
+        """Close the connection to the server."""
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._connecting = False
+        self._pending = bytearray()
+
+    def _connect(self):
+        """Start or check the connection to the server without waiting.
+
+        Returns:
+            True if the client is connected.
+
+        """
+        if self._socket is not None:
+            if not self._connecting:
+                return True
+            return self._check_connection()
+        if self._address is None:
+            return False
+        now = time.time()
+        if (self._last_attempt is not None and
+                now - self._last_attempt < self._retry):
+            return False
+        self._last_attempt = now
+
+        family, socket_type, protocol = self._address[:3]
+        try:
+            self._socket = socket.socket(family, socket_type, protocol)
+            self._socket.setblocking(False)
+            error = self._socket.connect_ex(self._address[4])
+        except OSError:
+            self.close()
+            return False
+        if error == 0:
+            return True
+        if error in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+            self._connecting = True
+            return False
+        self.close()
+        return False
+
+    def _check_connection(self):
+        """Check whether a connection in progress has finished.
+
+        Returns:
+            True if the client is now connected.
+
+        """
+        try:
+            writable = select.select([], [self._socket], [], 0)[1]
+            if not writable:
+                return False
+            error = self._socket.getsockopt(socket.SOL_SOCKET,
+                                            socket.SO_ERROR)
+        except (OSError, ValueError):
+            error = -1
+        if error:
+            self.close()
+            return False
+        self._connecting = False
+        return True
+
+
+class DashboardTable(object):
+    """The latest dashboard values received by a server.
+
+    Every method can be called from any thread.
+
+    """
+    # Private member objects
+    _lock = None
+    _values = None
+    _updates = None
+    _recorder = None
+
+    # Private member variables
+    _lines = 0
+    _bytes = 0
+    _errors = 0
+    _start = 0.0
+
+    def __init__(self, recorder=None):
+        """Create and initialize a DashboardTable.
+
+        Args:
+            recorder: the DashboardRecorder every update is written to, or
+                None.
+
+        """
+        self._lock = threading.Lock()
+        self._values = {}
+        self._updates = {}
+        self._recorder = recorder
+        self._lines = 0
+        self._bytes = 0
+        self._errors = 0
+        self._start = time.time()
+
+    def apply(self, line):
+        """Apply a line received from a client.
+
+        Args:
+            line: the bytes of the line.
+
+        Returns:
+            True if the line was a valid update.
+
+        """
+        received = time.time()
+        try:
+            message = json.loads(line.decode('utf-8'))
+            values = message["u"]
+        except (ValueError, KeyError, TypeError):
+            values = None
+        if not isinstance(values, dict):
+            with self._lock:
+                self._errors += 1
+            return False
+
+        with self._lock:
+            self._lines += 1
+            self._bytes += len(line)
+            for key, value in values.items():
+                self._values[key] = value
+                self._updates[key] = self._updates.get(key, 0) + 1
+        if self._recorder:
+            self._recorder.write(received, message)
+        return True
+
+    def get_values(self):
+        """Return a copy of the dictionary of {key: latest value}."""
+        with self._lock:
+            return dict(self._values)
+
+    def get_statistics(self):
+        """Return the statistics since the table was created.
+
+        Returns:
+            A dictionary of the number of lines, bytes and invalid lines
+            received, the time in seconds, and a dictionary of the number
+            of updates of each key.
+
+        """
+        with self._lock:
+            return {'lines': self._lines, 'bytes': self._bytes,
+                    'errors': self._errors,
+                    'seconds': time.time() - self._start,
+                    'updates': dict(self._updates)}
+
+
+class DashboardRecorder(object):
+    """Writes every received update to a JSON lines file.
+
+    Each line is the message as received with the receive time added as
+    "r", so a recording can be replayed or analyzed later.
+
+    """
+    # Private member objects
+    _file = None
+    _lock = None
+
+    def __init__(self, path):
+        """Create and initialize a DashboardRecorder.
+
+        Args:
+            path: the file to write, which is replaced.
+
+        Raises:
+            OSError: if the file could not be created.
+
+        """
+        # Line buffered so the recording is complete if the viewer is killed
+        self._file = open(path, 'w', buffering=1)
+        self._lock = threading.Lock()
+
+    def write(self, received, message):
+        """Write a message.
+
+        Args:
+            received: the time the message was received.
+            message: the decoded message dictionary.
+
+        """
+        message = dict(message)
+        message["r"] = received
+        line = json.dumps(message, separators=(',', ':'), sort_keys=True)
+        with self._lock:
+            if self._file:
+                self._file.write(line + "\n")
+
+    def close(self):
+        """Flush and close the file."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+            self._file = None
+
+
+class _DashboardHandler(socketserver.StreamRequestHandler):
+    """Applies the lines sent by one client to the server's table."""
+
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                self.server.table.apply(line)
+
+
+class DashboardServer(socketserver.ThreadingTCPServer):
+    """Accepts dashboard clients and keeps the values they send.
+
+    Attributes:
+        table: the DashboardTable of received values.
+
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host="", port=DEFAULT_PORT, recorder=None):
+        """Create and initialize a DashboardServer.
+
+        Args:
+            host: the address to listen on, "" for every address.
+            port: the port to listen on, 0 for any free port.
+            recorder: the DashboardRecorder every update is written to, or
+                None.
+
+        """
+        self.table = DashboardTable(recorder)
+        socketserver.ThreadingTCPServer.__init__(self, (host, port),
+                                                 _DashboardHandler)
+
+    def get_port(self):
+        """Return the port the server is listening on."""
+        return self.server_address[1]
+
+
+def format_table(values, statistics):
+    """Format the dashboard values and statistics as lines of text.
+
+    Args:
+        values: the dictionary returned by DashboardTable.get_values().
+        statistics: the dictionary returned by
+            DashboardTable.get_statistics().
+
+    Returns:
+        A List of strings.
+
+    """
+    seconds = max(statistics['seconds'], 1e-6)
+    lines = ["%d updates/s  %d lines/s  %.0f bytes/s  %d errors" %
+             (sum(statistics['updates'].values()) / seconds,
+              statistics['lines'] / seconds, statistics['bytes'] / seconds,
+              statistics['errors'])]
+    width = max([len(key) for key in values] + [3])
+    for key in sorted(values):
+        lines.append("%-*s  %-20s %6.1f/s" %
+                     (width, key, _format_value(values[key]),
+                      statistics['updates'].get(key, 0) / seconds))
+    return lines
+
+
+def _format_value(value):
+    """Format a dashboard value for the viewer."""
+    if isinstance(value, float):
+        return "%.3f" % value
+    return str(value)
+
+
+def main(argv=None):
+    """Run the stand-in dashboard server with a terminal viewer.
+
+    Args:
+        argv: the command line arguments, or None to use sys.argv.
+
+    Returns:
+        0 when the server is stopped, or 1 if it could not be started.
+
+    """
+    parser = argparse.ArgumentParser(
+                description="Stand-in dashboard server for the robot.")
+    parser.add_argument("--host", default="",
+                        help="address to listen on (default all)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="port to listen on")
+    parser.add_argument("-r", "--record",
+                        help="JSON lines file to record every update to")
+    parser.add_argument("-i", "--interval", type=float, default=0.5,
+                        help="viewer refresh interval in seconds")
+    parser.add_argument("-d", "--duration", type=float,
+                        help="stop after this many seconds")
+    args = parser.parse_args(argv)
+
+    recorder = None
+    try:
+        if args.record:
+            recorder = DashboardRecorder(args.record)
+        server = DashboardServer(args.host, args.port, recorder)
+    except OSError as error:
+        print("dashserver: %s" % error, file=sys.stderr)
+        return 1
+    thread = threading.Thread(target=server.serve_forever, name="dashserver")
+    thread.daemon = True
+    thread.start()
+
+    clear = sys.stdout.isatty()
+    start = time.time()
+    try:
+        while args.duration is None or time.time() - start < args.duration:
+            time.sleep(args.interval)
+            lines = format_table(server.table.get_values(),
+                                 server.table.get_statistics())
+            if clear:
+                sys.stdout.write("\x1b[H\x1b[2J")
+            print("Dashboard on port %d" % server.get_port())
+            print("\n".join(lines))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        if recorder:
+            recorder.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,14 +3,15 @@
 # Imports
 import math
 import wpilib
+import asynclog
 import common
-import logging
-import logging.config
 import parameters
+import schemas
 import stopwatch
 
 
-class DriveTrain(object):
+
+class DriveTrain(parameters.Tunable):
     """Drives a robot.
 
     Provides an interface to manually or autonomously drive the robot, including
@@ -22,61 +23,39 @@ class DriveTrain(object):
         accelerometer_enabled: True if the Accelerometer is fully functional
             (default False).
         gyro_enabled: True if the Gyro is fully functional (default False).
+        drive_timer: the stopwatch.Stopwatch timing every call of drive().
 
     """
     # Public member variables
     drivetrain_enabled = False
     accelerometer_enabled = False
     gyro_enabled = False
+    drive_timer = stopwatch.Stopwatch()
 
     # Private member objects
+    # Parameters read from the drivetrain section of the parameters file
+    _schema = schemas.DRIVETRAIN_SCHEMA
     _log = None
     _parameters = None
+    _config = None
+    _profiles = None
     _left_controller = None
     _right_controller = None
     _robot_drive = None
     _accelerometer = None
     _gyro = None
     _acceleration_timer = None
-    _movement_timer = None
-
-    # Private parameters
-    _normal_linear_speed_ratio = -1
-    _alternate_linear_speed_ratio = -1
-    _normal_turning_speed_ratio = -1
-    _alternate_turning_speed_ratio = -1
-    _auto_far_linear_speed_ratio = -1
-    _auto_medium_linear_speed_ratio = -1
-    _auto_near_linear_speed_ratio = -1
-    _auto_far_turning_speed_ratio = -1
-    _auto_medium_turning_speed_ratio = -1
-    _auto_near_turning_speed_ratio = -1
-    _forward_direction = -1
-    _backward_direction = -1
-    _left_direction = -1
-    _right_direction = -1
-    _linear_filter_constant = -1
-    _turn_filter_constant = -1
-    _maximum_linear_speed_change = -1
-    _maximum_turn_speed_change = -1
-    _time_threshold = -1
-    _auto_medium_time_threshold = -1
-    _auto_far_time_threshold = -1
-    _distance_threshold = -1
-    _auto_medium_distance_threshold = -1
-    _auto_far_distance_threshold = -1
-    _heading_threshold = -1
-    _auto_medium_heading_threshold = -1
-    _auto_far_heading_threshold = -1
 
     # Private member variables
     _log_enabled = False
+    _profile = None
     _parameters_file = None
     _robot_state = common.ProgramState.DISABLED
     _acceleration = 0
     _distance_traveled = 0
     _gyro_angle = 0
     _initial_heading = 0
+    _heading_setpoint = None
     _previous_linear_speed = 0
     _previous_turn_speed = 0
     _adjustment_in_progress = False
@@ -110,7 +89,6 @@ class DriveTrain(object):
         self._robot_drive = None
         self._accelerometer = None
         self._gyro = None
-        self._movement_timer = None
         self._acceleration_timer = None
 
     def _initialize(self, params, logging_enabled):
@@ -139,45 +117,21 @@ class DriveTrain(object):
         self._accelerometer = None
         self._gyro = None
         self._acceleration_timer = None
-        self._movement_timer = None
 
         # Initialize private parameters
-        self._normal_linear_speed_ratio = 1.0
-        self._alternate_linear_speed_ratio = 1.0
-        self._normal_turning_speed_ratio = 1.0
-        self._alternate_turning_speed_ratio = 1.0
-        self._auto_far_linear_speed_ratio = 1.0
-        self._auto_medium_linear_speed_ratio = 1.0
-        self._auto_near_linear_speed_ratio = 1.0
-        self._auto_far_turning_speed_ratio = 1.0
-        self._auto_medium_turning_speed_ratio = 1.0
-        self._auto_near_turning_speed_ratio = 1.0
-        self._auto_medium_time_threshold = 0.5
-        self._auto_far_time_threshold = 1.0
-        self._auto_medium_distance_threshold = 2.0
-        self._auto_far_distance_threshold = 5.0
-        self._auto_medium_heading_threshold = 15.0
-        self._auto_far_heading_threshold = 25.0
-        self._distance_threshold = 0.5
-        self._heading_threshold = 3.0
-        self._time_threshold = 0.1
-        self._forward_direction = 1.0
-        self._backward_direction = -1.0
-        self._left_direction = -1.0
-        self._right_direction = 1.0
-        self._maximum_linear_speed_change = 0.0
-        self._maximum_turn_speed_change = 0.0
-        self._linear_filter_constant = 0.0
-        self._turn_filter_constant = 0.0
+        self._config = self._schema.defaults()
+        self._profiles = {parameters.DEFAULT_PROFILE: self._config}
 
         # Initialize private member variables
         self._log_enabled = False
+        self._profile = parameters.DEFAULT_PROFILE
         self._robot_state = common.ProgramState.DISABLED
         self._parameters_file = None
         self._acceleration = 0
         self._distance_traveled = 0
         self._gyro_angle = 0
         self._initial_heading = 0
+        self._heading_setpoint = None
         self._previous_linear_speed = 0
         self._previous_turn_speed = 0
         self._adjustment_in_progress = False
@@ -185,22 +139,13 @@ class DriveTrain(object):
         # Enable logging if specified
         if logging_enabled:
             # Create a new data log object
-            self._log = logging.getLogger('drivetrain')
-            self._log.setLevel(logging.DEBUG)
-            fh = logging.FileHandler('/home/lvuser/log/drivetrain.log')
-            fh.setLevel(logging.DEBUG)
-            formatter = logging.Formatter(
-                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            fh.setFormatter(formatter)
-            self._log.addHandler(fh)
+            self._log = asynclog.get_logger('drivetrain')
 
             if self._log:
                 self._log_enabled = True
             else:
                 self._log = None
 
-        self._movement_timer = stopwatch.Stopwatch()
-
         # Read parameters file
         self._parameters_file = params
         self.load_parameters()
@@ -215,15 +160,6 @@ class DriveTrain(object):
             True if the parameter file was processed successfully.
 
         """
-        # Define and initialize local variables
-        left_motor_channel = -1
-        left_motor_inverted = 0
-        right_motor_channel = -1
-        right_motor_inverted = 0
-        accelerometer_range = -1
-        gyro_channel = -1
-        gyro_sensitivity = 0.007
-
         # Close and delete old objects
         self._parameters = None
         self._robot_drive = None
@@ -235,118 +171,34 @@ class DriveTrain(object):
 
         # Read the parameters file
         self._parameters = parameters.Parameters(self._parameters_file)
-        section = __name__.lower()
-
-        # Store parameters from the file to local variables
-        if self._parameters:
-            left_motor_channel = self._parameters.get_value(section,
-                                            "LEFT_MOTOR_CHANNEL")
-            left_motor_inverted = self._parameters.get_value(section,
-                                            "LEFT_MOTOR_INVERTED")
-            right_motor_channel = self._parameters.get_value(section,
-                                            "RIGHT_MOTOR_CHANNEL")
-            right_motor_inverted = self._parameters.get_value(section,
-                                            "RIGHT_MOTOR_INVERTED")
-            accelerometer_range = self._parameters.get_value(section,
-                                            "ACCELEROMETER_RANGE")
-            gyro_channel = self._parameters.get_value(section,
-                                            "GYRO_CHANNEL")
-            gyro_sensitivity = self._parameters.get_value(section,
-                                            "GYRO_SENSITIVITY")
-            self._forward_direction = self._parameters.get_value(section,
-                                            "FORWARD_DIRECTION")
-            self._backward_direction = self._parameters.get_value(section,
-                                            "BACKWARD_DIRECTION")
-            self._left_direction = self._parameters.get_value(section,
-                                            "LEFT_DIRECTION")
-            self._right_direction = self._parameters.get_value(section,
-                                            "RIGHT_DIRECTION")
-            self._normal_linear_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "NORMAL_LINEAR_SPEED_RATIO")
-            self._alternate_linear_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "ALTERNATE_LINEAR_SPEED_RATIO")
-            self._normal_turning_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "NORMAL_TURNING_SPEED_RATIO")
-            self._alternate_turning_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "ALTERNATE_TURNING_SPEED_RATIO")
-            self._auto_far_linear_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_FAR_LINEAR_SPEED_RATIO")
-            self._auto_medium_linear_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_MEDIUM_LINEAR_SPEED_RATIO")
-            self._auto_near_linear_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_NEAR_LINEAR_SPEED_RATIO")
-            self._auto_far_turning_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_FAR_TURNING_SPEED_RATIO")
-            self._auto_medium_turning_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_MEDIUM_TURNING_SPEED_RATIO")
-            self._auto_near_turning_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_NEAR_TURNING_SPEED_RATIO")
-            self._distance_threshold = self._parameters.get_value(section,
-                                            "DISTANCE_THRESHOLD")
-            self._heading_threshold = self._parameters.get_value(section,
-                                            "HEADING_THRESHOLD")
-            self._time_threshold = self._parameters.get_value(section,
-                                            "TIME_THRESHOLD")
-            self._auto_medium_time_threshold = self._parameters.get_value(
-                                            section,
-                                            "AUTO_MEDIUM_TIME_THRESHOLD")
-            self._auto_far_time_threshold = self._parameters.get_value(section,
-                                            "AUTO_FAR_TIME_THRESHOLD")
-            self._auto_medium_distance_threshold = self._parameters.get_value(
-                                            section,
-                                            "AUTO_MEDIUM_DISTANCE_THRESHOLD")
-            self._auto_far_distance_threshold = self._parameters.get_value(
-                                            section,
-                                            "AUTO_FAR_DISTANCE_THRESHOLD")
-            self._auto_medium_heading_threshold = self._parameters.get_value(
-                                            section,
-                                            "AUTO_MEDIUM_HEADING_THRESHOLD")
-            self._auto_far_heading_threshold = self._parameters.get_value(
-                                            section,
-                                            "AUTO_FAR_HEADING_THRESHOLD")
-            self._maximum_linear_speed_change = self._parameters.get_value(
-                                            section,
-                                            "MAXIMUM_LINEAR_SPEED_CHANGE")
-            self._maximum_turn_speed_change = self._parameters.get_value(
-                                            section,
-                                            "MAXIMUM_TURN_SPEED_CHANGE")
-            self._linear_filter_constant = self._parameters.get_value(section,
-                                            "LINEAR_FILTER_CONSTANT")
-            self._turn_filter_constant = self._parameters.get_value(section,
-                                            "TURN_FILTER_CONSTANT")
+
+        # Read and validate the parameters
+        self._config = self._load_config()
 
         # Check if the accelerometer is present/enabled
         self.accelerometer_enabled = False
-        if accelerometer_range >= 0:
+        if self._config.accelerometer_range >= 0:
             self._accelerometer = wpilib.BuiltInAccelerometer(
-                                                        accelerometer_range)
+                                            self._config.accelerometer_range)
             if self._accelerometer:
                 self.accelerometer_enabled = True
                 self._acceleration_timer = stopwatch.Stopwatch()
 
         # Check if gyro is present/enabled
         self.gyro_enabled = False
-        if gyro_channel >= 0:
-            self._gyro = wpilib.Gyro(gyro_channel)
+        if self._config.gyro_channel >= 0:
+            self._gyro = wpilib.Gyro(self._config.gyro_channel)
             if self._gyro:
-                self._gyro.setSensitivity(gyro_sensitivity)
+                self._gyro.setSensitivity(self._config.gyro_sensitivity)
                 self.gyro_enabled = True
 
         # Create motor controllers
-        if left_motor_channel >= 0:
-            self._left_controller = wpilib.Talon(left_motor_channel)
-        if right_motor_channel >= 0:
-            self._right_controller = wpilib.Talon(right_motor_channel)
+        if self._config.left_motor_channel >= 0:
+            self._left_controller = wpilib.Talon(
+                                            self._config.left_motor_channel)
+        if self._config.right_motor_channel >= 0:
+            self._right_controller = wpilib.Talon(
+                                            self._config.right_motor_channel)
 
         # Create RobotDrive using motor controllers
         if self._left_controller and self._right_controller:
@@ -356,11 +208,11 @@ class DriveTrain(object):
             self.drivetrain_enabled = True
 
         # Invert motors if specified
-        if left_motor_inverted and self._robot_drive:
+        if self._config.left_motor_inverted and self._robot_drive:
             self._robot_drive.setInvertedMotor(
                     wpilib.RobotDrive.MotorType.kRearLeft,
                     True)
-        if right_motor_inverted and self._robot_drive:
+        if self._config.right_motor_inverted and self._robot_drive:
             self._robot_drive.setInvertedMotor(
                     wpilib.RobotDrive.MotorType.kRearRight,
                     True)
@@ -389,10 +241,6 @@ class DriveTrain(object):
         """
         self._robot_state = state
 
-        # Clear the movement time
-        if self._movement_timer:
-            self._movement_timer.stop()
-
         # Start the acceleration time and reset distance traveled
         if self.accelerometer_enabled:
             if self._acceleration_timer:
@@ -432,7 +280,6 @@ class DriveTrain(object):
 
         if self.gyro_enabled:
             self._gyro_angle = self._gyro.getAngle()
-            wpilib.SmartDashboard.putNumber("Gyro", self._gyro_angle)
 
         if self.accelerometer_enabled:
             self._acceleration = self._accelerometer.getY()
@@ -442,6 +289,15 @@ class DriveTrain(object):
                 self._distance_traveled += (self._acceleration *
                         loop_time * loop_time)
 
+    def register_dashboard(self, publisher):
+        """Register the values shown on the dashboard.
+
+        Args:
+            publisher: the dashboard.DashboardPublisher.
+        """
+        if self.gyro_enabled:
+            publisher.register("Gyro", self.get_heading, deadband=0.5)
+
     def reset_sensors(self):
         """Reset sensors.
 
@@ -453,12 +309,6 @@ class DriveTrain(object):
             self._acceleration_timer.start()
             self._distance_traveled = 0.0
 
-    def reset_and_start_timer(self):
-        """Resets and restarts the timer for time based movement."""
-        if self._movement_timer:
-            self._movement_timer.stop()
-            self._movement_timer.start()
-
     def get_current_state(self):
         """Return a string containing sensor and status variables.
 
@@ -475,11 +325,11 @@ class DriveTrain(object):
         """Log sensor and status variables."""
         if self._log:
             if self.gyro_enabled:
-                self._log.debug("Gyro angle: " + str(self._gyro_angle))
+                self._log.debug("Gyro angle: %s", self._gyro_angle)
             if self.accelerometer_enabled:
-                self._log.debug("Acceleration: " + str(self._acceleration))
-                self._log.debug("Distance traveled: " +
-                                                str(self._distance_traveled))
+                self._log.debug("Acceleration: %s", self._acceleration)
+                self._log.debug("Distance traveled: %s",
+                                self._distance_traveled)
 
     def adjust_heading(self, adjustment, speed):
         """Turns left/right to adjust robot heading.
@@ -494,6 +344,7 @@ class DriveTrain(object):
         Returns:
             True when the new heading has been reached.
         """
+        config = self._config
         # Abort if robot drive or gyro is not available
         if not self._robot_drive or not self.gyro_enabled:
             self._adjustment_in_progress = False
@@ -505,32 +356,34 @@ class DriveTrain(object):
             self._adjustment_in_progress = True
 
         # Calculate the amount of adjustment remaining
-        angle_remaining = ((self._initial_heading + adjustment) -
-                self._gyro_angle)
+        self._heading_setpoint = self._initial_heading + adjustment
+        angle_remaining = self._heading_setpoint - self._gyro_angle
 
         # Determine the turn direction
         turn_direction = 0
         if angle_remaining < 0:
-            turn_direction = self._left_direction
+            turn_direction = config.left_direction
         else:
-            turn_direction = self._right_direction
+            turn_direction = config.right_direction
 
         # Check if we've reached the desired heading (within tolerance)
-        if math.fabs(angle_remaining) < self._heading_threshold:
+        if math.fabs(angle_remaining) < config.heading_threshold:
             self._robot_drive.arcadeDrive(0.0, 0.0, False)
             self._adjustment_in_progress = False
+            self._heading_setpoint = None
             return True
         else:
-            if math.fabs(angle_remaining) > self._auto_far_heading_threshold:
+            if (math.fabs(angle_remaining) >
+                    config.auto_far_heading_threshold):
                 turn_direction = (turn_direction * speed *
-                        self._auto_far_turning_speed_ratio)
+                        config.auto_far_turning_speed_ratio)
             elif (math.fabs(angle_remaining) >
-                    self._auto_medium_heading_threshold):
+                    config.auto_medium_heading_threshold):
                 turn_direction = (turn_direction * speed *
-                        self._auto_medium_turning_speed_ratio)
+                        config.auto_medium_turning_speed_ratio)
             else:
                 turn_direction = (turn_direction * speed *
-                        self._auto_near_turning_speed_ratio)
+                        config.auto_near_turning_speed_ratio)
             self._robot_drive.arcadeDrive(0.0, turn_direction, False)
 
         return False
@@ -550,6 +403,7 @@ class DriveTrain(object):
         Returns:
             True when the desired distance has been reached
         """
+        config = self._config
         # Abort if robot drive or accelerometer is not available
         if not self._robot_drive or not self.accelerometer_enabled:
             return True
@@ -557,81 +411,77 @@ class DriveTrain(object):
         # Determine if robot should drive forward or backward
         directional_multiplier = 0
         if distance > 0:
-            directional_multiplier = self._forward_direction
+            directional_multiplier = config.forward_direction
         else:
-            directional_multiplier = self._backward_direction
+            directional_multiplier = config.backward_direction
 
         # Calculate distance left to drive
         distance_left = math.fabs(distance) - math.fabs(self._distance_traveled)
 
         # Check if we've reached the distance
-        if distance_left < self._distance_threshold:
+        if distance_left < config.distance_threshold:
             # Stop driving
             self._robot_drive.arcadeDrive(0.0, 0.0, False)
             return True
         else:
-            if distance_left > self._auto_far_distance_threshold:
+            if distance_left > config.auto_far_distance_threshold:
                 directional_multiplier = (directional_multiplier * speed *
-                        self._auto_far_linear_speed_ratio)
-            elif distance_left > self._auto_medium_distance_threshold:
+                        config.auto_far_linear_speed_ratio)
+            elif distance_left > config.auto_medium_distance_threshold:
                 directional_multiplier = (directional_multiplier * speed *
-                        self._auto_medium_linear_speed_ratio)
+                        config.auto_medium_linear_speed_ratio)
             else:
                 directional_multiplier = (directional_multiplier * speed *
-                        self._auto_near_linear_speed_ratio)
+                        config.auto_near_linear_speed_ratio)
             self._robot_drive.arcadeDrive(directional_multiplier, 0.0, False)
 
         return False
 
-    def drive_time(self, duration, direction, speed):
-        """Drives forward/backward for a time duration.
+    def drive_time(self, time_left, direction, speed):
+        """Drives forward/backward until a time duration has passed.
 
-        Using a timer, drives the robot forward or backward for a certain time
-        duration.
+        The caller keeps the time, so several timed commands can run at
+        once.  The robot slows down as the time left falls below the far and
+        medium time thresholds.
 
         Args:
-            duration: the amount of time to drive.
+            time_left: the time left to drive in seconds.
             direction: the direction to drive.
             speed: the motor speed ratio.
 
         Returns:
             True when the time duration has been reached.
         """
-        # Abort if the robot drive or timer is not available
-        if not self._robot_drive or not self._movement_timer:
+        config = self._config
+        # Abort if the robot drive is not available
+        if not self._robot_drive:
             return True
 
-        # Get the timer value since we started moving
-        elapsed_time = self._movement_timer.elapsed_time_in_secs()
-
-        # Calculate time left to move
-        time_left = duration - elapsed_time
-
         # Check if we've reached the time duration
-        if time_left < self._time_threshold or time_left < 0:
+        if time_left < config.time_threshold or time_left < 0:
             self._robot_drive.arcadeDrive(0.0, 0.0, False)
-            self._movement_timer.stop()
             return True
         else:
             directional_speed = 0
             if direction == common.Direction.FORWARD:
-                directional_speed = self._forward_direction
+                directional_speed = config.forward_direction
             else:
-                directional_speed = self._backward_direction
+                directional_speed = config.backward_direction
 
-            if time_left > self._auto_far_time_threshold:
+            if time_left > config.auto_far_time_threshold:
                 directional_speed = (directional_speed * speed *
-                        self._auto_far_linear_speed_ratio)
-            elif time_left > self._auto_medium_time_threshold:
+                        config.auto_far_linear_speed_ratio)
+            elif time_left > config.auto_medium_time_threshold:
                 directional_speed = (directional_speed * speed *
-                        self._auto_medium_linear_speed_ratio)
+                        config.auto_medium_linear_speed_ratio)
             else:
                 directional_speed = (directional_speed * speed *
-                        self._auto_near_linear_speed_ratio)
+                        config.auto_near_linear_speed_ratio)
             self._robot_drive.arcadeDrive(directional_speed, 0.0, False)
 
         return False
 
+    @drive_timer
     def drive(self, directional_speed, directional_turn, alternate):
         """Drives the robot using a specified linear and turning speed.
 
@@ -645,6 +495,8 @@ class DriveTrain(object):
             directional_turn: the speed and direction for turning left/right.
             alternate: True if the robot should move at 'alternate' speed.
         """
+        config = self._config
+        self._heading_setpoint = None
         # Abort if the robot drive is not available
         if not self._robot_drive:
             return
@@ -653,39 +505,41 @@ class DriveTrain(object):
         turn = 0.0
         # Determine the actual speed using normal/alternate speed ratios
         if alternate:
-            linear = self._alternate_linear_speed_ratio * directional_speed
-            turn = self._alternate_turning_speed_ratio * directional_turn
+            linear = (config.alternate_linear_speed_ratio *
+                      directional_speed)
+            turn = (config.alternate_turning_speed_ratio *
+                    directional_turn)
         else:
-            linear = self._normal_linear_speed_ratio * directional_speed
-            turn = self._normal_turning_speed_ratio * directional_turn
+            linear = config.normal_linear_speed_ratio * directional_speed
+            turn = config.normal_turning_speed_ratio * directional_turn
 
         # Smooth the robot acceleration/deceleration.
         # This is used to prevent tipping or jerky movement and may not be
         # necessary depending on the robot design.
         # Method 1: using a maximum amount of change per robot iterative cycle
         if (math.fabs(linear - self._previous_linear_speed) >
-                self._maximum_linear_speed_change):
+                config.maximum_linear_speed_change):
             if (linear - self._previous_linear_speed) < 0:
                 linear = (self._previous_linear_speed -
-                        self._maximum_linear_speed_change)
+                        config.maximum_linear_speed_change)
             else:
                 linear = (self._previous_linear_speed +
-                        self._maximum_linear_speed_change)
+                        config.maximum_linear_speed_change)
         if (math.fabs(turn - self._previous_turn_speed) >
-                self._maximum_turn_speed_change):
+                config.maximum_turn_speed_change):
             if (turn - self._previous_turn_speed) < 0:
                 turn = (self._previous_turn_speed -
-                        self._maximum_turn_speed_change)
+                        config.maximum_turn_speed_change)
             else:
                 turn = (self._previous_turn_speed +
-                        self._maximum_turn_speed_change)
+                        config.maximum_turn_speed_change)
 
         # Method 2: using a simple low pass filter
         # new speed = target speed - K * (target speed - current speed)
         # Where K should be around 0.8? (higher: slower rate of change)
-        #linear = (linear - self._linear_filter_constant *
+        #linear = (linear - config.linear_filter_constant *
         #       (linear - self._previous_linear_speed))
-        #turn = (turn - self._turn_filter_constant *
+        #turn = (turn - config.turn_filter_constant *
         #       (turn - self._previous_turn_speed))
 
         self._robot_drive.arcadeDrive(linear, turn, False)
@@ -706,6 +560,7 @@ class DriveTrain(object):
                 right track.
             alternate: True if the robot should move at 'alternate' speed.
         """
+        config = self._config
         # Abort if the robot drive is not available
         if not self._robot_drive:
             return
@@ -714,11 +569,11 @@ class DriveTrain(object):
         left = 0
         right = 0
         if alternate:
-            left = self._alternate_linear_speed_ratio * left_stick
-            right = self._alternate_linear_speed_ratio * right_stick
+            left = config.alternate_linear_speed_ratio * left_stick
+            right = config.alternate_linear_speed_ratio * right_stick
         else:
-            left = self._normal_linear_speed_ratio * left_stick
-            right = self._normal_linear_speed_ratio * right_stick
+            left = config.normal_linear_speed_ratio * left_stick
+            right = config.normal_linear_speed_ratio * right_stick
 
         self._robot_drive.tankDrive(left, right, False)
 
@@ -735,85 +590,84 @@ class DriveTrain(object):
         Returns:
             True when the new heading has been reached.
         """
+        config = self._config
         # Abort if the robot drive or gyro is not available
         if not self._robot_drive or not self.gyro_enabled:
             return True
 
         # Calculate the amount left to turn
+        self._heading_setpoint = heading
         angle_remaining = heading - self._gyro_angle
 
         # Determine the turn direction
         turn_direction = 0
         if angle_remaining < 0:
-            turn_direction = self._left_direction
+            turn_direction = config.left_direction
         else:
-            turn_direction = self._right_direction
+            turn_direction = config.right_direction
 
         # Check if we've reached the desired heading
-        if math.fabs(angle_remaining) < self._heading_threshold:
+        if math.fabs(angle_remaining) < config.heading_threshold:
             self._robot_drive.arcadeDrive(0.0, 0.0, False)
+            self._heading_setpoint = None
             return True
         else:
-            if math.fabs(angle_remaining) > self._auto_far_heading_threshold:
+            if (math.fabs(angle_remaining) >
+                    config.auto_far_heading_threshold):
                 turn_direction = (turn_direction * speed *
-                        self._auto_far_turning_speed_ratio)
+                        config.auto_far_turning_speed_ratio)
             elif (math.fabs(angle_remaining) >
-                    self._auto_medium_heading_threshold):
+                    config.auto_medium_heading_threshold):
                 turn_direction = (turn_direction * speed *
-                        self._auto_medium_turning_speed_ratio)
+                        config.auto_medium_turning_speed_ratio)
             else:
                 turn_direction = (turn_direction * speed *
-                        self._auto_near_turning_speed_ratio)
+                        config.auto_near_turning_speed_ratio)
             self._robot_drive.arcadeDrive(0.0, turn_direction, False)
 
         return False
 
-    def turn_time(self, duration, direction, speed):
-        """Turns the robot left/right for a time duration.
+    def turn_time(self, time_left, direction, speed):
+        """Turns the robot left/right until a time duration has passed.
 
-        Using a timer, turns the robot left or right for a certain time
-        duration.
+        The caller keeps the time, so several timed commands can run at
+        once.  The robot slows down as the time left falls below the far and
+        medium time thresholds.
 
         Args:
-            duration: the amount of time to drive.
+            time_left: the time left to turn in seconds.
             direction: the direction to turn.
             speed: the motor speed ratio.
 
         Returns:
             True when the time duration has been reached.
         """
-        # Abort if robot drive or timer is not available
-        if not self._robot_drive or not self._movement_timer:
+        config = self._config
+        # Abort if robot drive is not available
+        if not self._robot_drive:
             return True
 
-        # Get the timer value since we started moving
-        elapsed_time = self._movement_timer.elapsed_time_in_secs()
-
-        # Calculate time left to turn
-        time_left = duration - elapsed_time
-
         directional_speed = 0
 
         # Check if we've turned long enough
-        if time_left < self._time_threshold or time_left < 0:
+        if time_left < config.time_threshold or time_left < 0:
             self._robot_drive.arcadeDrive(0.0, 0.0, False)
-            self._movement_timer.stop()
             return True
         else:
             if direction == common.Direction.LEFT:
-                directional_speed = self._left_direction
+                directional_speed = config.left_direction
             else:
-                directional_speed = self._right_direction
+                directional_speed = config.right_direction
 
-            if time_left > self._auto_far_time_threshold:
+            if time_left > config.auto_far_time_threshold:
                 directional_speed = (directional_speed * speed *
-                        self._auto_far_turning_speed_ratio)
-            elif time_left > self._auto_medium_time_threshold:
+                        config.auto_far_turning_speed_ratio)
+            elif time_left > config.auto_medium_time_threshold:
                 directional_speed = (directional_speed * speed *
-                        self._auto_medium_turning_speed_ratio)
+                        config.auto_medium_turning_speed_ratio)
             else:
                 directional_speed = (directional_speed * speed *
-                        self._auto_near_turning_speed_ratio)
+                        config.auto_near_turning_speed_ratio)
             self._robot_drive.arcadeDrive(0.0, directional_speed, False)
 
         return False
@@ -825,3 +679,100 @@ class DriveTrain(object):
             The current robot heading in degrees.
         """
         return self._gyro_angle
+
+    def get_distance_traveled(self):
+        """Returns the distance traveled since the sensors were reset.
+
+        Returns:
+            The distance in meters calculated from the accelerometer.
+        """
+        return self._distance_traveled
+
+    def get_heading_setpoint(self):
+        """Returns the heading a turn in progress is turning to.
+
+        Returns:
+            The heading in degrees, or None if the robot is not turning to
+            a heading.
+        """
+        return self._heading_setpoint
+
+    def get_acceleration(self):
+        """Returns the acceleration read by the last read_sensors().
+
+        Returns:
+            The forward/backward acceleration from the accelerometer.
+        """
+        return self._acceleration
+
+    def get_motor_outputs(self):
+        """Returns the outputs of the left and right motor controllers.
+
+        Returns:
+            A tuple of the left and right motor outputs, 0.0 for a missing
+            controller.
+        """
+        left = 0.0
+        right = 0.0
+        if self._left_controller:
+            left = self._left_controller.get()
+        if self._right_controller:
+            right = self._right_controller.get()
+        return left, right
+
+    def get_output(self):
+        """Returns the linear and turn speed set by the last drive().
+
+        Returns:
+            A tuple of the linear and turn speed outputs.
+        """
+        return self._previous_linear_speed, self._previous_turn_speed
+
+    def drive_heading(self, linear, turn, heading, distance=None):
+        """Drives at speed outputs while correcting towards a heading.
+
+        This is used to replay outputs recorded from drive(), so the speed
+        ratios and smoothing have already been applied.  The turn output is
+        corrected in proportion to the heading error and the linear output
+        in proportion to the distance error, each limited to the maximum
+        trajectory correction.
+
+        Args:
+            linear: the linear speed output.
+            turn: the turn speed output.
+            heading: the desired heading in degrees, or None to drive
+                without correction.
+            distance: the desired distance traveled in meters, or None to
+                drive without correction.
+        """
+        config = self._config
+        self._heading_setpoint = heading
+        # Abort if the robot drive is not available
+        if not self._robot_drive:
+            return
+
+        if heading is not None and self.gyro_enabled:
+            error = heading - self._gyro_angle
+            correction = min(math.fabs(error) *
+                             config.trajectory_heading_gain,
+                             config.trajectory_maximum_correction)
+            if error < 0:
+                turn += correction * config.left_direction
+            else:
+                turn += correction * config.right_direction
+            turn = max(-1.0, min(1.0, turn))
+
+        if distance is not None and self.accelerometer_enabled:
+            error = distance - self._distance_traveled
+            correction = min(math.fabs(error) *
+                             config.trajectory_distance_gain,
+                             config.trajectory_maximum_correction)
+            if error < 0:
+                linear += correction * config.backward_direction
+            else:
+                linear += correction * config.forward_direction
+            linear = max(-1.0, min(1.0, linear))
+
+        self._robot_drive.arcadeDrive(linear, turn, False)
+        self._previous_linear_speed = linear
+        self._previous_turn_speed = turn
@@ -2,15 +2,14 @@
 
 # Imports
 import wpilib
+import asynclog
 import common
 import feeder_arm
-import logging
-import logging.config
 import parameters
-import stopwatch
+import schemas
 
 
-class Feeder(object):
+class Feeder(parameters.Tunable):
     """A mechanism that pulls objects into the robot.
 
     This class desribes a feeder mechanism that uses two arms with spinning
@@ -29,22 +28,19 @@ class Feeder(object):
     arms_control_enabled = False
 
     # Private member objects
+    # Parameters read from the feeder section of the parameters file
+    _schema = schemas.FEEDER_SCHEMA
     _log = None
     _parameters = None
+    _config = None
+    _profiles = None
     _left_arm = None
     _right_arm = None
     _arms_controller = None
-    _movement_timer = None
-
-    # Private parameters
-    _time_threshold = 0
-    _open_direction = None
-    _close_direction = None
-    _open_speed_ratio = None
-    _close_speed_ratio = None
 
     # Private member variables
     _log_enabled = False
+    _profile = None
     _parameters_file = None
     _robot_state = common.ProgramState.DISABLED
 
@@ -74,7 +70,6 @@ class Feeder(object):
         self._left_arm = None
         self._right_arm = None
         self._arms_controller = None
-        self._movement_timer = None
 
     def _initialize(self, params, logging_enabled):
         """Initialize and configure a Feeder object.
@@ -100,39 +95,27 @@ class Feeder(object):
         self._left_arm = None
         self._right_arm = None
         self._arms_controller = None
-        self._movement_timer = None
 
         # Initialize private parameters
-        self._time_threshold = 0.1
-        self._open_direction = 1.0
-        self._close_direction = -1.0
-        self._open_speed_ratio = 1.0
-        self._close_speed_ratio = 1.0
+        self._config = self._schema.defaults()
+        self._profiles = {parameters.DEFAULT_PROFILE: self._config}
 
         # Initialize private member variables
         self._log_enabled = False
+        self._profile = parameters.DEFAULT_PROFILE
         self._robot_state = common.ProgramState.DISABLED
         self._parameters_file = None
 
         # Enable logging if specified
         if logging_enabled:
             # Create a new data log object
-            self._log = logging.getLogger('feeder')
-            self._log.setLevel(logging.DEBUG)
-            fh = logging.FileHandler('/home/lvuser/log/feeder.log')
-            fh.setLevel(logging.DEBUG)
-            formatter = logging.Formatter(
-                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            fh.setFormatter(formatter)
-            self._log.addHandler(fh)
+            self._log = asynclog.get_logger('feeder')
 
             if self._log:
                 self._log_enabled = True
             else:
                 self._log = None
 
-        self._movement_timer = stopwatch.Stopwatch()
-
         # Read parameters file
         self._parameters_file = params
         self.load_parameters()
@@ -147,37 +130,19 @@ class Feeder(object):
             True if the parameter file was processed successfully.
 
         """
-        # Define and initialize local variables
-        motor_channel = -1
-
         # Close and delete old objects
         self._parameters = None
         self._arms_controller = None
 
         # Read the parameters file
         self._parameters = parameters.Parameters(self._parameters_file)
-        section = __name__.lower()
-
-        # Store parameters from the file to local variables
-        if self._parameters:
-            motor_channel = self._parameters.get_value(section,
-                                            "MOTOR_CHANNEL")
-            self._time_threshold = self._parameters.get_value(section,
-                                            "TIME_THRESHOLD")
-            self._open_direction = self._parameters.get_value(section,
-                                            "OPEN_DIRECTION")
-            self._close_direction = self._parameters.get_value(
-                                            section,
-                                            "CLOSE_DIRECTION")
-            self._open_speed_ratio = self._parameters.get_value(section,
-                                            "OPEN_SPEED_RATIO")
-            self._close_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "CLOSE_SPEED_RATIO")
+
+        # Read and validate the parameters
+        self._config = self._load_config()
 
         # Create motor controllers
-        if motor_channel >= 0:
-            self._arms_controller = wpilib.Talon(motor_channel)
+        if self._config.motor_channel >= 0:
+            self._arms_controller = wpilib.Talon(self._config.motor_channel)
             self.arms_control_enabled = True
 
         self.right_arm_enabled = False
@@ -208,6 +173,57 @@ class Feeder(object):
 
         return True
 
+    def reload_tunables(self):
+        """Reload tuning values from the feeder and arm parameter files.
+
+        Returns:
+            True if the feeder parameter file was processed successfully.
+
+        """
+        if not parameters.Tunable.reload_tunables(self):
+            return False
+        if self._right_arm:
+            self._right_arm.reload_tunables()
+        if self._left_arm:
+            self._left_arm.reload_tunables()
+        return True
+
+    def get_profiles(self):
+        """Return the sorted List of profiles of the feeder and its arms."""
+        names = set(self._profiles)
+        for arm in [self._right_arm, self._left_arm]:
+            if arm:
+                names.update(arm.get_profiles())
+        return sorted(names)
+
+    def set_profile(self, profile):
+        """Switch the feeder and its arms to another profile.
+
+        The feeder and each arm switch on their own, and any of them whose
+        parameter file lacks the profile uses its default profile, so a
+        profile can tune only the arms.
+
+        Args:
+            profile: the name of the profile.
+
+        Returns:
+            True if the feeder or either arm has the profile.
+
+        """
+        found = False
+        for arm in [self._right_arm, self._left_arm]:
+            if not arm:
+                continue
+            if arm.set_profile(profile):
+                found = True
+            else:
+                arm.set_profile(parameters.DEFAULT_PROFILE)
+        if parameters.Tunable.set_profile(self, profile):
+            found = True
+        else:
+            parameters.Tunable.set_profile(self, parameters.DEFAULT_PROFILE)
+        return found
+
     def set_robot_state(self, state):
         """Set the current game state of the robot.
 
@@ -278,14 +294,14 @@ class Feeder(object):
                 self._right_arm.spin(common.Direction.STOP, 0)
                 self._left_arm.spin(common.Direction.STOP, 0)
 
-    def feed_time(self, time, direction, speed):
+    def feed_time(self, time_left, direction, speed):
         """Controls the feeder arms for a time duration.
 
-        Using a timer, spins the feeder arms in or out for a certain time
-        duration.
+        The caller keeps the time, so several timed commands can run at
+        once.
 
         Args:
-            time: the amount of time to feed.
+            time_left: the time left to feed in seconds.
             direction: the direction to feed.
             speed: the motor speed ratio.
 
@@ -308,8 +324,10 @@ class Feeder(object):
             right_direction = common.Direction.STOP
             left_direction = common.Direction.STOP
 
-        right_finished = self._right_arm.spin_time(time, right_direction, speed)
-        left_finished = self._left_arm.spin_time(time, left_direction, speed)
+        right_finished = self._right_arm.spin_time(time_left, right_direction,
+                                                   speed)
+        left_finished = self._left_arm.spin_time(time_left, left_direction,
+                                                 speed)
 
         if right_finished and left_finished:
             return True
@@ -324,54 +342,49 @@ class Feeder(object):
             speed: The speed that the arms move.
 
         """
+        config = self._config
         if self.arms_control_enabled:
             if direction == common.Direction.OPEN:
-                self._arms_controller.set((self._open_direction * speed *
-                    self._open_speed_ratio), 0)
+                self._arms_controller.set((config.open_direction * speed *
+                    config.open_speed_ratio), 0)
             elif direction == common.Direction.CLOSE:
-                self._arms_controller.set((self._close_direction * speed *
-                    self._close_speed_ratio), 0)
+                self._arms_controller.set((config.close_direction * speed *
+                    config.close_speed_ratio), 0)
             elif direction == common.Direction.STOP:
                 self._arms_controller.set(0.0, 0)
 
-    def arms_time(self, time, direction, speed):
+    def arms_time(self, time_left, direction, speed):
         """Controls the arms for a time duration.
 
-        Using a timer, moves the arms for a certain time duration.
+        The caller keeps the time, so several timed commands can run at
+        once.
 
         Args:
-            time: the amount of time to move.
+            time_left: the time left to move in seconds.
             direction: the direction to move.
             speed: the motor speed ratio.
 
         Returns:
             True when the time duration has been reached.
         """
-        # Abort if arm controller or timer is not available
-        if not self.arms_control_enabled or not self._movement_timer:
+        config = self._config
+        # Abort if arm controller is not available
+        if not self.arms_control_enabled:
             return True
 
-        # Get the timer value since we started moving
-        elapsed_time = self._movement_timer.elapsed_time_in_secs()
-
-        # Calculate time left
-        time_left = time - elapsed_time
-
         # Check if we've moved long enough
-        if time_left < self._time_threshold or time_left < 0:
+        if time_left < config.time_threshold or time_left < 0:
             self._arms_controller.set(0.0, 0)
-            self._movement_timer.stop()
             return True
         else:
             if direction == common.Direction.OPEN:
-                self._arms_controller.set((self._open_direction * speed *
-                                            self._open_speed_ratio), 0)
+                self._arms_controller.set((config.open_direction * speed *
+                                            config.open_speed_ratio), 0)
             elif direction == common.Direction.CLOSE:
-                self._arms_controller.set((self._close_direction * speed *
-                                           self._close_speed_ratio), 0)
+                self._arms_controller.set((config.close_direction * speed *
+                                           config.close_speed_ratio), 0)
             else:
                 self._arms_controller.set(0.0, 0)
-                self._movement_timer.stop()
                 return True
 
         return False
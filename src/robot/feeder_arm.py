@@ -2,14 +2,13 @@
 
 # Imports
 import wpilib
+import asynclog
 import common
-import logging
-import logging.config
 import parameters
-import stopwatch
+import schemas
 
 
-class FeederArm(object):
+class FeederArm(parameters.Tunable):
     """An arm that pulls objects in to the robot.
 
     This class describes a feeder arm with a spinning wheel on the end to pull
@@ -23,20 +22,17 @@ class FeederArm(object):
     arm_enabled = False
 
     # Private member objects
+    # Parameters read from the feeder_arm section of the parameters file
+    _schema = schemas.FEEDER_ARM_SCHEMA
     _log = None
     _parameters = None
+    _config = None
+    _profiles = None
     _wheel_controller = None
-    _movement_timer = None
-
-    # Private parameters
-    _time_threshold = 0
-    _clockwise_direction = None
-    _counter_clockwise_direction = None
-    _clockwise_speed_ratio = None
-    _counter_clockwise_speed_ratio = None
 
     # Private member variables
     _log_enabled = False
+    _profile = None
     _parameters_file = None
     _robot_state = common.ProgramState.DISABLED
 
@@ -64,7 +60,6 @@ class FeederArm(object):
         self._log = None
         self._parameters = None
         self._wheel_controller = None
-        self._movement_timer = None
 
     def _initialize(self, params, logging_enabled):
         """Initialize and configure a FeederArm object.
@@ -85,39 +80,27 @@ class FeederArm(object):
         self._log = None
         self._parameters = None
         self._wheel_controller = None
-        self._movement_timer = None
 
         # Initialize private parameters
-        self._time_threshold = 0.1
-        self._clockwise_direction = 1.0
-        self._counter_clockwise_direction = -1.0
-        self._clockwise_speed_ratio = 1.0
-        self._counter_clockwise_speed_ratio = 1.0
+        self._config = self._schema.defaults()
+        self._profiles = {parameters.DEFAULT_PROFILE: self._config}
 
         # Initialize private member variables
         self._log_enabled = False
+        self._profile = parameters.DEFAULT_PROFILE
         self._robot_state = common.ProgramState.DISABLED
         self._parameters_file = None
 
         # Enable logging if specified
         if logging_enabled:
             # Create a new data log object
-            self._log = logging.getLogger('feederarm')
-            self._log.setLevel(logging.DEBUG)
-            fh = logging.FileHandler('/home/lvuser/log/feederarm.log')
-            fh.setLevel(logging.DEBUG)
-            formatter = logging.Formatter(
-                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            fh.setFormatter(formatter)
-            self._log.addHandler(fh)
+            self._log = asynclog.get_logger('feederarm')
 
             if self._log:
                 self._log_enabled = True
             else:
                 self._log = None
 
-        self._movement_timer = stopwatch.Stopwatch()
-
         # Read parameters file
         self._parameters_file = params
         self.load_parameters()
@@ -132,37 +115,19 @@ class FeederArm(object):
             True if the parameter file was processed successfully.
 
         """
-        # Define and initialize local variables
-        motor_channel = -1
-
         # Close and delete old objects
         self._parameters = None
         self._wheel_controller = None
 
         # Read the parameters file
         self._parameters = parameters.Parameters(self._parameters_file)
-        section = __name__.lower()
-
-        # Store parameters from the file to local variables
-        if self._parameters:
-            motor_channel = self._parameters.get_value(section,
-                                            "MOTOR_CHANNEL")
-            self._time_threshold = self._parameters.get_value(section,
-                                            "TIME_THRESHOLD")
-            self._clockwise_direction = self._parameters.get_value(section,
-                                            "CLOCKWISE_DIRECTION")
-            self._counter_clockwise_direction = self._parameters.get_value(
-                                            section,
-                                            "COUNTER_CLOCKWISE_DIRECTION")
-            self._clockwise_speed_ratio = self._parameters.get_value(section,
-                                            "CLOCKWISE_SPEED_RATIO")
-            self._counter_clockwise_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "COUNTER_CLOCKWISE_SPEED_RATIO")
+
+        # Read and validate the parameters
+        self._config = self._load_config()
 
         # Create motor controllers
-        if motor_channel >= 0:
-            self._wheel_controller = wpilib.Victor(motor_channel)
+        if self._config.motor_channel >= 0:
+            self._wheel_controller = wpilib.Victor(self._config.motor_channel)
             self.arm_enabled = True
 
         if self._log_enabled:
@@ -185,10 +150,6 @@ class FeederArm(object):
         """
         self._robot_state = state
 
-        # Clear the movement time
-        if self._movement_timer:
-            self._movement_timer.stop()
-
         if state == common.ProgramState.DISABLED:
             pass
         if state == common.ProgramState.TELEOP:
@@ -216,12 +177,6 @@ class FeederArm(object):
         """Reset sensors."""
         pass
 
-    def reset_and_start_timer(self):
-        """Resets and restarts the timer for time based movement."""
-        if self._movement_timer:
-            self._movement_timer.stop()
-            self._movement_timer.start()
-
     def get_current_state(self):
         """Return a string containing sensor and status variables.
 
@@ -243,56 +198,53 @@ class FeederArm(object):
             speed: The speed of the wheel.
 
         """
+        config = self._config
         if direction == common.Direction.CLOCKWISE:
             if self.arm_enabled:
-                self._wheel_controller.set((self._clockwise_direction * speed *
-                    self._clockwise_speed_ratio), 0)
+                self._wheel_controller.set((config.clockwise_direction *
+                    speed * config.clockwise_speed_ratio), 0)
         elif direction == common.Direction.COUNTERCLOCKWISE:
             if self.arm_enabled:
-                self._wheel_controller.set((self._counter_clockwise_direction *
-                    speed * self._counter_clockwise_speed_ratio), 0)
+                self._wheel_controller.set(
+                        (config.counter_clockwise_direction *
+                         speed * config.counter_clockwise_speed_ratio), 0)
         elif direction == common.Direction.STOP:
             if self.arm_enabled:
                 self._wheel_controller.set(0.0, 0)
 
-    def spin_time(self, time, direction, speed):
+    def spin_time(self, time_left, direction, speed):
         """Controls the wheel on the end of the arm for a time duration.
 
-        Using a timer, spins the wheel for a certain time duration.
+        The caller keeps the time, so several timed commands can run at
+        once.
 
         Args:
-            time: the amount of time to spin.
+            time_left: the time left to spin in seconds.
             direction: the direction to spin.
             speed: the motor speed ratio.
 
         Returns:
             True when the time duration has been reached.
         """
-        # Abort if arm or timer is not available
-        if not self.arm_enabled or not self._movement_timer:
+        config = self._config
+        # Abort if arm is not available
+        if not self.arm_enabled:
             return True
 
-        # Get the timer value since we started moving
-        elapsed_time = self._movement_timer.elapsed_time_in_secs()
-
-        # Calculate time left to turn
-        time_left = time - elapsed_time
-
         # Check if we've spun long enough
-        if time_left < self._time_threshold or time_left < 0:
+        if time_left < config.time_threshold or time_left < 0:
             if self.arm_enabled:
                 self._wheel_controller.set(0.0, 0)
-            self._movement_timer.stop()
             return True
         else:
             if direction == common.Direction.CLOCKWISE:
                 if self.arm_enabled:
-                    self._wheel_controller.set((self._clockwise_direction *
-                        speed * self._clockwise_speed_ratio), 0)
+                    self._wheel_controller.set((config.clockwise_direction *
+                        speed * config.clockwise_speed_ratio), 0)
             elif direction == common.Direction.COUNTERCLOCKWISE:
                 if self.arm_enabled:
                     self._wheel_controller.set(
-                            (self._counter_clockwise_direction *
-                             speed * self._counter_clockwise_speed_ratio), 0)
+                            (config.counter_clockwise_direction *
+                             speed * config.counter_clockwise_speed_ratio), 0)
 
         return False
@@ -2,15 +2,14 @@
 
 # Imports
 import wpilib
+import asynclog
 import common
-import logging
-import logging.config
 import math
 import parameters
-import stopwatch
+import schemas
 
 
-class Lift(object):
+class Lift(parameters.Tunable):
     """A mechanism that lifts things off of the ground.
 
     This class desribes a lift mechanism that uses a metal bracket attached to
@@ -27,32 +26,20 @@ class Lift(object):
     encoder_enabled = False
 
     # Private member objects
+    # Parameters read from the lift section of the parameters file
+    _schema = schemas.LIFT_SCHEMA
     _log = None
     _parameters = None
+    _config = None
+    _profiles = None
     _lift_controller = None
     _encoder = None
-    _movement_timer = None
-
-    # Private parameters
-    _encoder_threshold = None
-    _auto_medium_encoder_threshold = None
-    _auto_far_encoder_threshold = None
-    _encoder_max_limit = None
-    _encoder_min_limit = None
-    _time_threshold = None
-    _auto_medium_time_threshold = None
-    _auto_far_time_threshold = None
-    _auto_far_speed_ratio = None
-    _auto_medium_speed_ratio = None
-    _auto_near_speed_ratio = None
-    _up_direction = None
-    _down_direction = None
-    _up_speed_ratio = None
-    _down_speed_ratio = None
 
     # Private member variables
     _encoder_count = None
+    _position_setpoint = None
     _log_enabled = False
+    _profile = None
     _parameters_file = None
     _ignore_encoder_limits = None
     _robot_state = common.ProgramState.DISABLED
@@ -81,7 +68,6 @@ class Lift(object):
         self._parameters = None
         self._encoder = None
         self._lift_controller = None
-        self._movement_timer = None
 
     def _initialize(self, params, logging_enabled):
         """Initialize and configure a Lift object.
@@ -104,50 +90,29 @@ class Lift(object):
         self._parameters = None
         self._encoder = None
         self._lift_controller = None
-        self._movement_timer = None
 
         # Initialize private parameters
-        self._encoder_threshold = 10
-        self._auto_medium_encoder_threshold = 50
-        self._auto_far_encoder_threshold = 100
-        self._encoder_max_limit = 10000
-        self._encoder_min_limit = 0
-        self._time_threshold = 0.1
-        self._auto_medium_time_threshold = 0.5
-        self._auto_far_time_threshold = 1.0
-        self._auto_far_speed_ratio = 1.0
-        self._auto_medium_speed_ratio = 1.0
-        self._auto_near_speed_ratio = 1.0
-        self._up_direction = 0.1
-        self._down_direction = 0.1
-        self._up_speed_ratio = 1.0
-        self._down_speed_ratio = 1.0
+        self._config = self._schema.defaults()
+        self._profiles = {parameters.DEFAULT_PROFILE: self._config}
 
         # Initialize private member variables
         self._encoder_count = 0
+        self._position_setpoint = None
         self._ignore_encoder_limits = False
         self._log_enabled = False
+        self._profile = parameters.DEFAULT_PROFILE
         self._robot_state = common.ProgramState.DISABLED
 
         # Enable logging if specified
         if logging_enabled:
             # Create a new data log object
-            self._log = logging.getLogger('lift')
-            self._log.setLevel(logging.DEBUG)
-            fh = logging.FileHandler('/home/lvuser/log/lift.log')
-            fh.setLevel(logging.DEBUG)
-            formatter = logging.Formatter(
-                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            fh.setFormatter(formatter)
-            self._log.addHandler(fh)
+            self._log = asynclog.get_logger('lift')
 
             if self._log:
                 self._log_enabled = True
             else:
                 self._log = None
 
-        self._movement_timer = stopwatch.Stopwatch()
-
         # Read parameters file
         self._parameters_file = params
         self.load_parameters()
@@ -162,13 +127,6 @@ class Lift(object):
             True if the parameter file was processed successfully.
 
         """
-        # Define and initialize local variables
-        lift_motor_channel = -1
-        encoder_a_channel = -1
-        encoder_b_channel = -1
-        encoder_reverse = 0
-        encoder_type = 2
-
         # Close and delete old objects
         self._parameters = None
         self._encoder = None
@@ -176,70 +134,25 @@ class Lift(object):
 
         # Read the parameters file
         self._parameters = parameters.Parameters(self._parameters_file)
-        section = __name__.lower()
-
-        # Store parameters from the file to local variables
-        if self._parameters:
-            encoder_a_channel = self._parameters.get_value(section,
-                                                "ENCODER_A_CHANNEL")
-            encoder_b_channel = self._parameters.get_value(section,
-                                                "ENCODER_B_CHANNEL")
-            encoder_reverse = self._parameters.get_value(section,
-                                                "ENCODER_REVERSE")
-            encoder_type = self._parameters.get_value(section,
-                                                "ENCODER_TYPE")
-            lift_motor_channel = self._parameters.get_value(section,
-                                            "LIFT_MOTOR_CHANNEL")
-            self._up_direction = self._parameters.get_value(section,
-                                            "UP_DIRECTION")
-            self._down_direction = self._parameters.get_value(section,
-                                            "DOWN_DIRECTION")
-            self._up_speed_ratio = self._parameters.get_value(section,
-                                                "UP_SPEED_RATIO")
-            self._down_speed_ratio = self._parameters.get_value(section,
-                                                "DOWN_SPEED_RATIO")
-            self._auto_far_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_FAR_SPEED_RATIO")
-            self._auto_medium_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_MEDIUM_SPEED_RATIO")
-            self._auto_near_speed_ratio = self._parameters.get_value(
-                                            section,
-                                            "AUTO_NEAR_SPEED_RATIO")
-            self._encoder_threshold = self._parameters.get_value(section,
-                                            "ENCODER_THRESHOLD")
-            self._encoder_max_limit = self._parameters.get_value(section,
-                                                "ENCODER_MAX_LIMIT")
-            self._encoder_min_limit = self._parameters.get_value(section,
-                                                "ENCODER_MIN_LIMIT")
-            self._time_threshold = self._parameters.get_value(section,
-                                            "TIME_THRESHOLD")
-            self._auto_medium_time_threshold = self._parameters.get_value(
-                                            section,
-                                            "AUTO_MEDIUM_TIME_THRESHOLD")
-            self._auto_far_time_threshold = self._parameters.get_value(section,
-                                            "AUTO_FAR_TIME_THRESHOLD")
-            self._auto_medium_encoder_threshold = self._parameters.get_value(
-                                            section,
-                                            "AUTO_MEDIUM_ENCODER_THRESHOLD")
-            self._auto_far_encoder_threshold = self._parameters.get_value(
-                                            section,
-                                            "AUTO_FAR_ENCODER_THRESHOLD")
+
+        # Read and validate the parameters
+        self._config = self._load_config()
 
         # Create the encoder object if the channel is valid
         self.encoder_enabled = False
-        if encoder_a_channel >= 0 and encoder_b_channel >= 0:
-            self._encoder = wpilib.Encoder(aChannel=int(encoder_a_channel),
-                                           bChannel=int(encoder_b_channel),
-                                           reverseDirection=bool(encoder_reverse),
-                                           encodingType=int(encoder_type))
+        config = self._config
+        if config.encoder_a_channel >= 0 and config.encoder_b_channel >= 0:
+            self._encoder = wpilib.Encoder(aChannel=config.encoder_a_channel,
+                                           bChannel=config.encoder_b_channel,
+                                           reverseDirection=(
+                                                config.encoder_reverse),
+                                           encodingType=config.encoder_type)
             if self._encoder:
                 self.encoder_enabled = True
 
         # Create motor controller
-        if lift_motor_channel >= 0:
-            self._lift_controller = wpilib.Talon(lift_motor_channel)
+        if config.lift_motor_channel >= 0:
+            self._lift_controller = wpilib.Talon(config.lift_motor_channel)
             self.lift_enabled = True
 
         if self._log_enabled:
@@ -266,10 +179,6 @@ class Lift(object):
         """
         self._robot_state = state
 
-        # Clear the movement time
-        if self._movement_timer:
-            self._movement_timer.stop()
-
         if state == common.ProgramState.DISABLED:
             pass
         if state == common.ProgramState.TELEOP:
@@ -293,7 +202,15 @@ class Lift(object):
         """Read and store current sensor values."""
         if self.encoder_enabled:
             self._encoder_count = self._encoder.get()
-            wpilib.SmartDashboard.putNumber("Lift Encoder", self._encoder_count)
+
+    def register_dashboard(self, publisher):
+        """Register the values shown on the dashboard.
+
+        Args:
+            publisher: the dashboard.DashboardPublisher.
+        """
+        if self.encoder_enabled:
+            publisher.register("Lift Encoder", self.get_encoder_count)
 
     def reset_sensors(self):
         """Reset sensor values."""
@@ -301,11 +218,28 @@ class Lift(object):
             self._encoder.reset()
             self._encoder_count = self._encoder.get()
 
-    def reset_and_start_timer(self):
-        """Resets and restarts the timer for time based movement."""
-        if self._movement_timer:
-            self._movement_timer.stop()
-            self._movement_timer.start()
+    def get_encoder_count(self):
+        """Return the encoder count read by the last read_sensors()."""
+        return self._encoder_count
+
+    def get_position_setpoint(self):
+        """Return the position set_lift_position() is moving to.
+
+        Returns:
+            The position in encoder counts, or None if the lift is not
+            moving to a position.
+        """
+        return self._position_setpoint
+
+    def get_output(self):
+        """Return the output of the lift motor controller.
+
+        Returns:
+            The lift motor output, 0.0 if there is no controller.
+        """
+        if self._lift_controller:
+            return self._lift_controller.get()
+        return 0.0
 
     def get_current_state(self):
         """Return a string containing sensor and status variables.
@@ -319,7 +253,7 @@ class Lift(object):
         """Log sensor and status variables."""
         if self._log:
             if self.encoder_enabled:
-                self._log.debug("Encoder: " + str(self._encoder_count))
+                self._log.debug("Encoder: %s", self._encoder_count)
 
     def set_lift_position(self, position, speed):
         """Sets the lift to a specified position.
@@ -332,56 +266,65 @@ class Lift(object):
             True when the desired position is reached.
 
         """
+        config = self._config
         # Abort if we don't have the encoder or motors
         if not self.encoder_enabled or not self.lift_enabled:
             return True
 
         movement_direction = 0.0
+        self._position_setpoint = position
 
         # Check the encoder position against the boundaries (if enabled)
         # Check max boundary
-        if (not self._ignore_encoder_limits and self._encoder_max_limit > 0 and
+        if (not self._ignore_encoder_limits and
+            config.encoder_max_limit > 0 and
             position > self._encoder_count and
-            self._encoder_count > self._encoder_max_limit):
+            self._encoder_count > config.encoder_max_limit):
             self._lift_controller.set(0, 0)
+            self._position_setpoint = None
             return True
         # Check min boundary
         if (not self._ignore_encoder_limits and position < self._encoder_count
-            and self._encoder_count < self._encoder_min_limit):
+            and self._encoder_count < config.encoder_min_limit):
             self._lift_controller.set(0, 0)
+            self._position_setpoint = None
             return True
 
         # Check to see if we've reached the correct position
-        if math.fabs(position - self._encoder_count) <= self._encoder_threshold:
+        if math.fabs(position - self._encoder_count) <= config.encoder_threshold:
             self._lift_controller.set(0, 0)
+            self._position_setpoint = None
             return True
 
         # Continue moving
         if (position - self._encoder_count) < 0:
-            direction = (self._down_direction * self._down_speed_ratio)
+            direction = (config.down_direction * config.down_speed_ratio)
         else:
-            direction = (self._up_direction * self._up_speed_ratio)
+            direction = (config.up_direction * config.up_speed_ratio)
 
         if (math.fabs(position - self._encoder_count) >
-            self._auto_far_encoder_threshold):
+            config.auto_far_encoder_threshold):
             movement_direction = (direction * speed *
-                                  self._auto_far_speed_ratio)
+                                  config.auto_far_speed_ratio)
         elif (math.fabs(position - self._encoder_count) >
-            self._auto_medium_encoder_threshold):
+            config.auto_medium_encoder_threshold):
             movement_direction = (direction * speed *
-                                  self._auto_medium_speed_ratio)
+                                  config.auto_medium_speed_ratio)
         else:
             movement_direction = (direction  * speed *
-                                  self._auto_near_speed_ratio)
+                                  config.auto_near_speed_ratio)
 
         self._lift_controller.set(movement_direction, 0)
         return False
 
-    def lift_time(self, time, direction, speed):
-        """Moves the lift for a certain time and speed.
+    def lift_time(self, time_left, direction, speed):
+        """Moves the lift until a time duration has passed.
+
+        The caller keeps the time, so several timed commands can run at
+        once.
 
         Args:
-            time: the time to move the lift.
+            time_left: the time left to move the lift in seconds.
             direction: the common.Direction enum in which to move.
             speed: the motor speed ratio.
 
@@ -389,51 +332,47 @@ class Lift(object):
             True when finished.
 
         """
-        # Abort if we don't have the timer or motors
-        if not self._movement_timer or not self.lift_enabled:
+        config = self._config
+        # Abort if we don't have the motors
+        if not self.lift_enabled:
             return True
 
-        # Get the timer value since we started moving
-        elapsed_time = self._movement_timer.elapsed_time_in_secs()
-
-        # Calculate time left to move
-        time_left = time - elapsed_time
-
         # Check the encoder position against the boundaries (if enabled)
         if self.encoder_enabled:
             # Check max boundary
-            if (not self._ignore_encoder_limits and self._encoder_max_limit > 0
-                and direction == common.Direction.UP and
-                self._encoder_count > self._encoder_max_limit):
+            if (not self._ignore_encoder_limits and
+                config.encoder_max_limit > 0 and
+                direction == common.Direction.UP and
+                self._encoder_count > config.encoder_max_limit):
                 self._lift_controller.set(0, 0)
                 return True
             # Check min boundary
-            if (not self._ignore_encoder_limits and self._encoder_min_limit > 0
-                and direction == common.Direction.DOWN and
-                self._encoder_count < self._encoder_min_limit):
+            if (not self._ignore_encoder_limits and
+                config.encoder_min_limit > 0 and
+                direction == common.Direction.DOWN and
+                self._encoder_count < config.encoder_min_limit):
                 self._lift_controller.set(0, 0)
                 return True
 
         # Check if we've reached the time duration
-        if time_left < self._time_threshold or time_left < 0:
+        if time_left < config.time_threshold or time_left < 0:
             self._lift_controller.set(0, 0)
-            self._movement_timer.stop()
             return True
         directional_speed = 0
         if direction == common.Direction.DOWN:
-            directional_speed = (self._down_direction * self._down_speed_ratio)
+            directional_speed = config.down_direction * config.down_speed_ratio
         else:
-            directional_speed = (self._up_direction * self._up_speed_ratio)
+            directional_speed = config.up_direction * config.up_speed_ratio
 
-        if time_left > self._auto_far_time_threshold:
+        if time_left > config.auto_far_time_threshold:
             directional_speed = (directional_speed * speed *
-                    self._auto_far_speed_ratio)
-        elif time_left > self._auto_medium_time_threshold:
+                    config.auto_far_speed_ratio)
+        elif time_left > config.auto_medium_time_threshold:
             directional_speed = (directional_speed * speed *
-                    self._auto_medium_speed_ratio)
+                    config.auto_medium_speed_ratio)
         else:
             directional_speed = (directional_speed * speed *
-                    self._auto_near_speed_ratio)
+                    config.auto_near_speed_ratio)
 
         self._lift_controller.set(directional_speed, 0)
         return False
@@ -445,6 +384,8 @@ class Lift(object):
             directional_speed: the speed and direction for moving.
 
         """
+        config = self._config
+        self._position_setpoint = None
         # Abort if the lift is not available
         if not self.lift_enabled:
             return
@@ -452,22 +393,24 @@ class Lift(object):
         # Check the encoder position against the boundaries (if enabled)
         if self.encoder_enabled:
             # Check max boundary
-            if (not self._ignore_encoder_limits and self._encoder_max_limit > 0
-                and self._up_direction * directional_speed > 0 and
-                self._encoder_count > self._encoder_max_limit):
+            if (not self._ignore_encoder_limits and
+                config.encoder_max_limit > 0 and
+                config.up_direction * directional_speed > 0 and
+                self._encoder_count > config.encoder_max_limit):
                 self._lift_controller.set(0, 0)
                 return True
             # Check min boundary
-            if (not self._ignore_encoder_limits and self._encoder_min_limit > 0
-                and self._down_direction * directional_speed > 0 and
-                self._encoder_count < self._encoder_min_limit):
+            if (not self._ignore_encoder_limits and
+                config.encoder_min_limit > 0 and
+                config.down_direction * directional_speed > 0 and
+                self._encoder_count < config.encoder_min_limit):
                 self._lift_controller.set(0, 0)
                 return True
 
-        if self._up_direction * directional_speed > 0:
-            directional_speed = directional_speed * self._up_speed_ratio
+        if config.up_direction * directional_speed > 0:
+            directional_speed = directional_speed * config.up_speed_ratio
         else:
-            directional_speed = directional_speed * self._down_speed_ratio
+            directional_speed = directional_speed * config.down_speed_ratio
 
         self._lift_controller.set(directional_speed, 0)
 
@@ -0,0 +1,293 @@
+"""This module records and plays back driver input macros.
+
+A macro is a sequence of UserInterface snapshots (every axis and the button
+bitmask of each controller) with the time of each robot loop iteration.
+Macros are stored as packed arrays so they can be saved and loaded with a
+single read or write.  Button bitmasks are 64 bits wide, so every button
+allowed by the userinterface schema fits.
+
+"""
+
+# Imports
+import array
+import struct
+import sys
+import stopwatch
+
+
+# File header: magic, version, controller count, axes per controller and
+# frame count
+_HEADER = struct.Struct('<4sHHHI')
+_MAGIC = b'MACR'
+_VERSION = 2
+
+# Button bitmask array type of each file version; version 1 files used 32
+# bit masks
+_BUTTON_TYPECODES = {1: 'I', 2: 'Q'}
+
+
+class Macro(object):
+    """A recorded sequence of controller snapshots.
+
+    Attributes:
+        controller_count: the number of controllers in each frame.
+        axis_count: the number of axes stored for each controller.
+        timestamps: the array of frame times in seconds from the start.
+        axis_values: the array of axis values, frame by frame and controller
+            by controller.
+        button_masks: the array of button bitmasks, frame by frame and
+            controller by controller.
+
+    """
+    # Public member variables
+    controller_count = 0
+    axis_count = 0
+    timestamps = None
+    axis_values = None
+    button_masks = None
+
+    def __init__(self, controller_count=0, axis_count=0):
+        """Create and initialize an empty Macro.
+
+        Args:
+            controller_count: the number of controllers in each frame.
+            axis_count: the number of axes stored for each controller.
+
+        """
+        self.controller_count = controller_count
+        self.axis_count = axis_count
+        self.timestamps = array.array('d')
+        self.axis_values = array.array('d')
+        self.button_masks = array.array(_BUTTON_TYPECODES[_VERSION])
+
+    def get_frame_count(self):
+        """Return the number of frames in the macro."""
+        return len(self.timestamps)
+
+    def get_duration(self):
+        """Return the length of the macro in seconds."""
+        if not self.timestamps:
+            return 0.0
+        return self.timestamps[-1]
+
+    def save(self, path):
+        """Write the macro to a file.
+
+        Args:
+            path: the path and filename to write.
+
+        Returns:
+            True if the file was written.
+
+        """
+        arrays = [self.timestamps, self.axis_values, self.button_masks]
+        if sys.byteorder != 'little':
+            arrays = [array.array(a.typecode, a) for a in arrays]
+            for a in arrays:
+                a.byteswap()
+        try:
+            with open(path, 'wb') as macro_file:
+                macro_file.write(_HEADER.pack(_MAGIC, _VERSION,
+                                              self.controller_count,
+                                              self.axis_count,
+                                              len(self.timestamps)))
+                for a in arrays:
+                    a.tofile(macro_file)
+        except (OSError, IOError):
+            return False
+        return True
+
+    def load(self, path):
+        """Read the macro from a file.
+
+        Args:
+            path: the path and filename to read.
+
+        Returns:
+            True if the file was read and is a valid macro.
+
+        """
+        try:
+            with open(path, 'rb') as macro_file:
+                header = macro_file.read(_HEADER.size)
+                if len(header) != _HEADER.size:
+                    return False
+                (magic, version, controller_count, axis_count,
+                 frame_count) = _HEADER.unpack(header)
+                if magic != _MAGIC or version not in _BUTTON_TYPECODES:
+                    return False
+                timestamps = array.array('d')
+                axis_values = array.array('d')
+                button_masks = array.array(_BUTTON_TYPECODES[version])
+                timestamps.fromfile(macro_file, frame_count)
+                axis_values.fromfile(macro_file, frame_count *
+                                     controller_count * axis_count)
+                button_masks.fromfile(macro_file, frame_count *
+                                      controller_count)
+        except (OSError, IOError, EOFError):
+            return False
+
+        if sys.byteorder != 'little':
+            for a in [timestamps, axis_values, button_masks]:
+                a.byteswap()
+        self.controller_count = controller_count
+        self.axis_count = axis_count
+        self.timestamps = timestamps
+        self.axis_values = axis_values
+        self.button_masks = array.array(_BUTTON_TYPECODES[_VERSION],
+                                        button_masks)
+        return True
+
+
+class MacroRecorder(object):
+    """Records UserInterface snapshots into a Macro.
+
+    Attributes:
+        recording: True while frames are being recorded.
+
+    """
+    # Public member variables
+    recording = False
+
+    # Private member objects
+    _macro = None
+    _timer = None
+
+    # Private member variables
+    _max_frames = 0
+
+    def __init__(self, max_frames=1500):
+        """Create and initialize a MacroRecorder.
+
+        Args:
+            max_frames: the maximum number of frames to record (1500 is 30
+                seconds at 50Hz).
+
+        """
+        self.recording = False
+        self._macro = None
+        self._timer = stopwatch.Stopwatch()
+        self._max_frames = max_frames
+
+    def start(self, user_interface):
+        """Start recording a new macro.
+
+        Args:
+            user_interface: the UserInterface that will be recorded.
+
+        """
+        self._macro = Macro(user_interface.get_controller_count(),
+                            user_interface.get_snapshot_axis_count())
+        self._timer.start()
+        self.recording = True
+
+    def record(self, user_interface):
+        """Record the current UserInterface snapshot as a frame.
+
+        Args:
+            user_interface: the UserInterface to record.
+
+        """
+        if not self.recording:
+            return
+        if self._macro.get_frame_count() >= self._max_frames:
+            return
+        self._macro.timestamps.append(self._timer.elapsed_time_in_secs())
+        user_interface.write_snapshot(self._macro.axis_values,
+                                      self._macro.button_masks,
+                                      self._macro.axis_count)
+
+    def stop(self):
+        """Stop recording.
+
+        Returns:
+            The recorded Macro, or None if nothing was recorded.
+
+        """
+        macro = None
+        if self.recording and self._macro.get_frame_count():
+            macro = self._macro
+        self.recording = False
+        self._macro = None
+        self._timer.stop()
+        return macro
+
+
+class MacroPlayer(object):
+    """Replays a Macro into a UserInterface.
+
+    Attributes:
+        playing: True while a macro is being played.
+
+    """
+    # Public member variables
+    playing = False
+
+    # Private member objects
+    _macro = None
+    _timer = None
+
+    # Private member variables
+    _frame = 0
+
+    def __init__(self):
+        """Create and initialize a MacroPlayer."""
+        self.playing = False
+        self._macro = None
+        self._timer = stopwatch.Stopwatch()
+        self._frame = 0
+
+    def start(self, macro):
+        """Start playing a macro from the beginning.
+
+        Args:
+            macro: the Macro to play.
+
+        """
+        if not macro or not macro.get_frame_count():
+            return
+        self._macro = macro
+        self._frame = 0
+        self._timer.start()
+        self.playing = True
+
+    def stop(self):
+        """Stop playing."""
+        self.playing = False
+        self._timer.stop()
+
+    def step(self, user_interface, live_buttons=None):
+        """Replace the UserInterface snapshot with the current frame.
+
+        The frame is chosen by the time since playback started, so the macro
+        runs at the recorded pace regardless of loop jitter.
+
+        Args:
+            user_interface: the UserInterface to update.
+            live_buttons: a dictionary of {controller: button bitmask} of
+                the buttons that keep their live states, or None.
+
+        Returns:
+            True when the macro has finished.
+
+        """
+        if not self.playing:
+            return True
+
+        elapsed = self._timer.elapsed_time_in_secs()
+        timestamps = self._macro.timestamps
+        frame_count = len(timestamps)
+        while (self._frame + 1 < frame_count and
+               timestamps[self._frame + 1] <= elapsed):
+            self._frame += 1
+
+        user_interface.read_snapshot(self._macro.axis_values,
+                                     self._macro.button_masks,
+                                     self._frame,
+                                     self._macro.controller_count,
+                                     self._macro.axis_count, live_buttons)
+
+        if self._frame + 1 >= frame_count and elapsed >= timestamps[-1]:
+            self.stop()
+            return True
+        return False
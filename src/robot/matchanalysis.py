@@ -0,0 +1,435 @@
+"""This module analyzes the telemetry rings recorded during matches.
+
+The records of every ring file are loaded into NumPy arrays and all of the
+statistics are worked out with array operations, so a whole event's worth
+of rings is analyzed in a few seconds.  The report covers:
+
+- loop period jitter and overruns (iterations that took long enough to miss
+  a driver station packet), overall and per mode;
+- control error per mode: the heading error while the drive train is
+  turning to or holding a heading, and the lift position error while the
+  lift is moving to a position;
+- the duration and time to settle of every autoscript line run in
+  autonomous;
+- the latency from the driver's linear input to the drive train output.
+
+Records more than a gap apart (the robot was off or restarted) start a new
+session, and nothing is compared across sessions.  NumPy is needed to run
+the analysis but not on the robot.
+
+Run from the command line on the rings copied off the robot:
+
+    python matchanalysis.py -p ../../parameters rings/*.ring
+
+"""
+
+# Imports
+import argparse
+import glob
+import json
+import os
+import sys
+import numpy
+import common
+import parameters
+import schemas
+import telemetry
+
+
+# The names of the robot modes in the report
+MODE_NAMES = {
+    common.ProgramState.DISABLED: "disabled",
+    common.ProgramState.AUTONOMOUS: "autonomous",
+    common.ProgramState.TELEOP: "teleop",
+}
+
+
+def load_rings(paths, gap=1.0):
+    """Read ring files into one set of arrays.
+
+    Args:
+        paths: the ring files to read.
+        gap: the longest time between records of the same session in
+            seconds.
+
+    Returns:
+        The arrays returned by combine_rings().
+
+    Raises:
+        ValueError: if a file is not a telemetry ring.
+        OSError: if a file could not be read.
+
+    """
+    return combine_rings([telemetry.read_ring_arrays(path)
+                          for path in paths], gap)
+
+
+def combine_rings(rings, gap=1.0):
+    """Join the arrays of several rings and number their sessions.
+
+    Args:
+        rings: a List of the arrays returned by
+            telemetry.read_ring_arrays().
+        gap: the longest time between records of the same session in
+            seconds.
+
+    Returns:
+        A dictionary of {field name: NumPy array} of every record in ring
+        order, with a 'session' array numbering the sessions.
+
+    """
+    if not rings:
+        arrays = dict((name, numpy.zeros(0, dtype))
+                      for name, dtype in telemetry.FIELDS)
+        arrays['session'] = numpy.zeros(0, numpy.int64)
+        return arrays
+
+    sessions = []
+    first = 0
+    for ring in rings:
+        interval = numpy.diff(ring['timestamp'])
+        breaks = (interval <= 0.0) | (interval > gap)
+        session = first + numpy.concatenate(([0], numpy.cumsum(breaks)))
+        session = session[:len(ring['timestamp'])]
+        sessions.append(session)
+        if len(session):
+            first = session[-1] + 1
+    arrays = dict((name, numpy.concatenate([ring[name] for ring in rings]))
+                  for name, dtype in telemetry.FIELDS)
+    arrays['session'] = numpy.concatenate(sessions).astype(numpy.int64)
+    return arrays
+
+
+def loop_statistics(arrays, period=0.02):
+    """Work out the loop period jitter and overruns.
+
+    Args:
+        arrays: the arrays returned by load_rings().
+        period: the expected loop period in seconds.
+
+    Returns:
+        A dictionary of the overall statistics, with a 'modes' dictionary
+        of the statistics of each mode.
+
+    """
+    same = arrays['session'][1:] == arrays['session'][:-1]
+    intervals = numpy.diff(arrays['timestamp'])[same]
+    modes = arrays['mode'][1:][same]
+    statistics = _interval_statistics(intervals, period)
+    statistics['modes'] = {}
+    for mode, name in sorted(MODE_NAMES.items()):
+        selected = intervals[modes == mode]
+        if len(selected):
+            statistics['modes'][name] = _interval_statistics(selected,
+                                                             period)
+    return statistics
+
+
+def _interval_statistics(intervals, period):
+    """Return the statistics of an array of loop intervals."""
+    if not len(intervals):
+        return {'count': 0}
+    jitter = intervals - period
+    return {
+        'count': int(len(intervals)),
+        'mean': float(intervals.mean()),
+        'jitter': float(numpy.sqrt(numpy.mean(jitter * jitter))),
+        'p99': float(numpy.percentile(intervals, 99)),
+        'maximum': float(intervals.max()),
+        # An iteration 1.5 periods long has missed a packet
+        'overruns': int(numpy.count_nonzero(intervals > 1.5 * period)),
+    }
+
+
+def control_error(measured, setpoints, modes):
+    """Work out the control error while a setpoint is active.
+
+    Args:
+        measured: the array of measured values.
+        setpoints: the array of setpoints, NaN where none was active.
+        modes: the array of robot modes.
+
+    Returns:
+        A dictionary of {mode name: statistics} of the modes that had an
+        active setpoint.
+
+    """
+    active = ~numpy.isnan(setpoints)
+    errors = (setpoints - measured)[active].astype(numpy.float64)
+    modes = modes[active]
+    report = {}
+    for mode, name in sorted(MODE_NAMES.items()):
+        selected = numpy.abs(errors[modes == mode])
+        if len(selected):
+            report[name] = {
+                'count': int(len(selected)),
+                'mean': float(selected.mean()),
+                'rms': float(numpy.sqrt(numpy.mean(selected * selected))),
+                'maximum': float(selected.max()),
+            }
+    return report
+
+
+def command_statistics(arrays, heading_tolerance, lift_tolerance):
+    """Work out the duration and time to settle of autoscript lines.
+
+    A command runs from the first to the last autonomous record with its
+    line.  It has settled once its heading or lift error stays within the
+    tolerance (or its setpoint is cleared) for the rest of the command;
+    commands without a setpoint settle when they start.
+
+    Args:
+        arrays: the arrays returned by load_rings().
+        heading_tolerance: the settled heading error in degrees.
+        lift_tolerance: the settled lift error in encoder counts.
+
+    Returns:
+        A List of dictionaries of the statistics of each line, in line
+        order.
+
+    """
+    selected = ((arrays['mode'] == common.ProgramState.AUTONOMOUS) &
+                (arrays['line'] > 0))
+    index = numpy.flatnonzero(selected)
+    if not len(index):
+        return []
+    lines = arrays['line'][index]
+    sessions = arrays['session'][index]
+    timestamps = arrays['timestamp'][index]
+
+    # A command starts wherever the line, the session or the record
+    # sequence changes
+    starts = numpy.flatnonzero(numpy.concatenate((
+                [True],
+                (lines[1:] != lines[:-1]) | (sessions[1:] != sessions[:-1]) |
+                (index[1:] != index[:-1] + 1))))
+    ends = numpy.concatenate((starts[1:], [len(index)])) - 1
+
+    heading_error = numpy.abs(arrays['heading_setpoint'][index] -
+                              arrays['gyro'][index])
+    lift_error = numpy.abs(arrays['lift_setpoint'][index] -
+                           arrays['encoder'][index])
+    unsettled = ((heading_error > heading_tolerance) |
+                 (lift_error > lift_tolerance))
+    last_unsettled = numpy.maximum.reduceat(
+                numpy.where(unsettled, numpy.arange(len(index)), -1), starts)
+    settled = numpy.where(last_unsettled >= 0,
+                          numpy.minimum(last_unsettled + 1, ends), starts)
+
+    durations = timestamps[ends] - timestamps[starts]
+    settle_times = timestamps[settled] - timestamps[starts]
+    heading_maximum = numpy.fmax.reduceat(heading_error, starts)
+    lift_maximum = numpy.fmax.reduceat(lift_error, starts)
+
+    report = []
+    command_lines = lines[starts]
+    for line in numpy.unique(command_lines):
+        runs = command_lines == line
+        statistics = {
+            'line': int(line),
+            'count': int(numpy.count_nonzero(runs)),
+            'duration': float(durations[runs].mean()),
+            'maximum_duration': float(durations[runs].max()),
+            'settle': float(settle_times[runs].mean()),
+            'maximum_settle': float(settle_times[runs].max()),
+        }
+        if not numpy.isnan(heading_maximum[runs]).all():
+            statistics['heading_error'] = float(
+                                    numpy.nanmax(heading_maximum[runs]))
+        if not numpy.isnan(lift_maximum[runs]).all():
+            statistics['lift_error'] = float(
+                                    numpy.nanmax(lift_maximum[runs]))
+        report.append(statistics)
+    return report
+
+
+def input_latency(arrays, period=0.02, max_lag=25):
+    """Estimate the latency from the driver input to the drive output.
+
+    The latency is the lag at which the teleop drive output best matches
+    the driver's linear input.
+
+    Args:
+        arrays: the arrays returned by load_rings().
+        period: the loop period in seconds.
+        max_lag: the longest lag tried in loop iterations.
+
+    Returns:
+        A dictionary of the lag in iterations and seconds and the
+        correlation at that lag, or None if there was no driver input.
+
+    """
+    teleop = arrays['mode'] == common.ProgramState.TELEOP
+    inputs = numpy.where(teleop, arrays['drive_input'], 0.0)
+    outputs = numpy.where(teleop, arrays['drive_output'], 0.0)
+    if not numpy.any(inputs):
+        return None
+
+    sessions = arrays['session']
+    best_lag = 0
+    best_correlation = -1.0
+    for lag in range(min(max_lag, len(inputs) - 2) + 1):
+        count = len(inputs) - lag
+        same = sessions[:count] == sessions[lag:]
+        x = inputs[:count][same]
+        y = outputs[lag:][same]
+        if x.std() == 0.0 or y.std() == 0.0:
+            continue
+        correlation = float(numpy.corrcoef(x, y)[0, 1])
+        if correlation > best_correlation:
+            best_lag = lag
+            best_correlation = correlation
+    if best_correlation < 0.0:
+        return None
+    return {'lag': best_lag, 'latency': best_lag * period,
+            'correlation': best_correlation}
+
+
+def analyze(arrays, period=0.02, heading_tolerance=1.0, lift_tolerance=10.0):
+    """Work out every statistic of a set of telemetry records.
+
+    Args:
+        arrays: the arrays returned by load_rings().
+        period: the expected loop period in seconds.
+        heading_tolerance: the settled heading error in degrees.
+        lift_tolerance: the settled lift error in encoder counts.
+
+    Returns:
+        A dictionary of the statistics, which can be written as JSON to
+        compare builds.
+
+    """
+    sessions = arrays['session']
+    return {
+        'records': int(len(sessions)),
+        'sessions': int(len(numpy.unique(sessions))),
+        'loop': loop_statistics(arrays, period),
+        'heading_error': control_error(arrays['gyro'],
+                                       arrays['heading_setpoint'],
+                                       arrays['mode']),
+        'lift_error': control_error(arrays['encoder'],
+                                    arrays['lift_setpoint'],
+                                    arrays['mode']),
+        'commands': command_statistics(arrays, heading_tolerance,
+                                       lift_tolerance),
+        'latency': input_latency(arrays, period),
+    }
+
+
+def format_report(report):
+    """Format a report from analyze() as lines of text.
+
+    Args:
+        report: the dictionary returned by analyze().
+
+    Returns:
+        A List of strings.
+
+    """
+    lines = ["%d records in %d sessions" % (report['records'],
+                                            report['sessions'])]
+    loop = report['loop']
+    for name, statistics in [("all", loop)] + sorted(loop['modes'].items()):
+        if statistics['count']:
+            lines.append("loop %-10s mean %.1fms jitter %.1fms p99 %.1fms "
+                         "max %.1fms overruns %d" %
+                         (name, statistics['mean'] * 1000.0,
+                          statistics['jitter'] * 1000.0,
+                          statistics['p99'] * 1000.0,
+                          statistics['maximum'] * 1000.0,
+                          statistics['overruns']))
+    for key, units in (('heading_error', "deg"), ('lift_error', "counts")):
+        for name, statistics in sorted(report[key].items()):
+            lines.append("%s %-10s mean %.2f rms %.2f max %.2f %s" %
+                         (key.replace('_', ' '), name, statistics['mean'],
+                          statistics['rms'], statistics['maximum'], units))
+    for command in report['commands']:
+        lines.append("line %3d x%d: %.2fs (max %.2fs), settled in %.2fs "
+                     "(max %.2fs)" %
+                     (command['line'], command['count'], command['duration'],
+                      command['maximum_duration'], command['settle'],
+                      command['maximum_settle']))
+    latency = report['latency']
+    if latency:
+        lines.append("input latency %d iterations (%.0fms), correlation "
+                     "%.2f" % (latency['lag'], latency['latency'] * 1000.0,
+                               latency['correlation']))
+    return lines
+
+
+def _tolerances(par_directory, profile):
+    """Read the heading and lift thresholds from the parameter files."""
+    drive_config = parameters.load_profile(
+                            schemas.DRIVETRAIN_SCHEMA,
+                            os.path.join(par_directory, "drivetrain.par"),
+                            profile)
+    lift_config = parameters.load_profile(
+                            schemas.LIFT_SCHEMA,
+                            os.path.join(par_directory, "lift.par"), profile)
+    return drive_config.heading_threshold, lift_config.encoder_threshold
+
+
+def main(argv=None):
+    """Report the statistics of telemetry rings.
+
+    Args:
+        argv: the command line arguments, or None to use sys.argv.
+
+    Returns:
+        0 if every ring was read, otherwise 1.
+
+    """
+    parser = argparse.ArgumentParser(
+                description="Analyze telemetry rings recorded in matches.")
+    parser.add_argument("rings", nargs="+",
+                        help="ring files or directories of ring files")
+    parser.add_argument("-p", "--par-directory", default="/home/lvuser/par",
+                        help="directory containing the parameter files")
+    parser.add_argument("--profile", default=parameters.DEFAULT_PROFILE,
+                        help="parameter profile to use")
+    parser.add_argument("--period", type=float, default=0.02,
+                        help="expected loop period in seconds")
+    parser.add_argument("--json", action="store_true",
+                        help="write the report as JSON")
+    parser.add_argument("-s", "--separate", action="store_true",
+                        help="report each ring separately")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.rings:
+        if os.path.isdir(path):
+            paths.extend(sorted(glob.glob(os.path.join(path, "*.ring"))))
+        else:
+            paths.append(path)
+    heading_tolerance, lift_tolerance = _tolerances(args.par_directory,
+                                                    args.profile)
+
+    result = 0
+    rings = []
+    for path in paths:
+        try:
+            rings.append((path, telemetry.read_ring_arrays(path)))
+        except (ValueError, OSError, IOError) as error:
+            print("%s: %s" % (path, error), file=sys.stderr)
+            result = 1
+
+    if args.separate:
+        groups = [(path, [ring]) for path, ring in rings]
+    else:
+        groups = [("all", [ring for path, ring in rings])]
+    reports = {}
+    for name, group in groups:
+        reports[name] = analyze(combine_rings(group), args.period,
+                                heading_tolerance, lift_tolerance)
+    if args.json:
+        print(json.dumps(reports, indent=2, sort_keys=True))
+    else:
+        for name in sorted(reports):
+            print("%s:" % name)
+            for line in format_report(reports[name]):
+                print("  " + line)
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,527 @@
-"""This module provides a class to read from config files."""
+"""This module provides a class to read from config files.
+
+Parsed files are kept in a process-wide store, so each file is only parsed
+once no matter how many objects read it.  Values are converted to numbers
+when the file is parsed, and lookups are plain dictionary accesses.
+
+The store can be saved as a binary snapshot and loaded with a single read at
+startup.  Files whose source is newer than the snapshot are parsed again.
+
+A section can have named profiles.  A [section:profile] section holds the
+values of the profile that differ from the base section.
+
+"""
 
 
 import configparser
+import marshal
+import math
+import os
+import stopwatch
+import time
 from text_utilities import convert_to_number
 
 
+# Process-wide store of parsed files, keyed by real path.  Each entry is a
+# tuple of (modification time, {section: {parameter: value}}).
+_store = {}
+
+# The store entries in the snapshot file as last loaded or saved
+_snapshot_files = {}
+
+# Store statistics
+_statistics = {
+    'parses': 0,
+    'parse_time': 0.0,
+    'hits': 0,
+    'misses': 0,
+    'missing': 0,
+    'snapshot_files': 0,
+}
+
+# Snapshot format version
+_SNAPSHOT_VERSION = 1
+
+# Name of the profile made from the base section alone
+DEFAULT_PROFILE = "default"
+
+
+def get_statistics():
+    """Return statistics for the parameter store.
+
+    Returns:
+        A dictionary with the number of files in the store ('files'), the
+        number of times a file was parsed ('parses'), the total time spent
+        parsing in seconds ('parse_time'), and the number of times a file was
+        served from the store ('hits') or had to be parsed ('misses'), the
+        number of times a file was requested but did not exist ('missing'),
+        and the number of files loaded from a snapshot ('snapshot_files').
+
+    """
+    statistics = dict(_statistics)
+    statistics['files'] = len(_store)
+    return statistics
+
+
+def invalidate(path=None):
+    """Remove a file from the parameter store so it is parsed again.
+
+    Args:
+        path: the path of the file to remove, or None to clear the store.
+
+    """
+    if path is None:
+        _store.clear()
+    else:
+        _store.pop(os.path.realpath(path), None)
+
+
+def _get_mtime(path):
+    """Return the modification time of a file, or None if it is missing."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _parse(path):
+    """Parse a parameters file into typed values.
+
+    Args:
+        path: the path to the file.
+
+    Returns:
+        A dictionary of {section: {parameter: value}} where numeric values
+        have been converted to numbers, or None if the file could not be
+        parsed.
+
+    """
+    config = configparser.ConfigParser()
+    try:
+        if not config.read(path):
+            return None
+        sections = {}
+        for section in config.sections():
+            values = {}
+            for parameter, read_value in config.items(section):
+                param_value = convert_to_number(read_value)
+                if param_value is not None:
+                    values[parameter] = param_value
+                else:
+                    values[parameter] = read_value
+            sections[section] = values
+    except configparser.Error:
+        return None
+    return sections
+
+
+def load(path):
+    """Return the parsed contents of a parameters file.
+
+    The file is parsed the first time it is requested and again only if it
+    has been modified since.
+
+    Args:
+        path: the path to the file.
+
+    Returns:
+        A dictionary of {section: {parameter: value}}, or None if the file
+        could not be parsed.
+
+    """
+    real_path = os.path.realpath(path)
+    mtime = _get_mtime(real_path)
+    if mtime is None:
+        _statistics['missing'] += 1
+        _store.pop(real_path, None)
+        return None
+    entry = _store.get(real_path)
+    if entry is not None and entry[0] == mtime:
+        _statistics['hits'] += 1
+        return entry[1]
+
+    _statistics['misses'] += 1
+    start = time.time()
+    sections = _parse(real_path)
+    _statistics['parse_time'] += time.time() - start
+    _statistics['parses'] += 1
+    if sections is None:
+        _store.pop(real_path, None)
+    else:
+        _store[real_path] = (mtime, sections)
+    return sections
+
+
+def snapshot_differs():
+    """Return True if the store differs from the snapshot file.
+
+    The store is compared with the snapshot as it was last loaded or saved,
+    so a snapshot only needs to be written again when a file was parsed
+    with new contents or a file in the snapshot is gone.
+
+    """
+    return _store != _snapshot_files
+
+
+def save_snapshot(path):
+    """Write the parameter store to a binary snapshot file.
+
+    The snapshot is written to a temporary file and renamed into place, so a
+    partially written snapshot is never read.
+
+    Args:
+        path: the path of the snapshot file.
+
+    Returns:
+        True if the snapshot was written.
+
+    """
+    snapshot = {'version': _SNAPSHOT_VERSION, 'files': dict(_store)}
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as snapshot_file:
+            marshal.dump(snapshot, snapshot_file)
+        os.rename(temp_path, path)
+    except (OSError, IOError, ValueError):
+        return False
+    _snapshot_files.clear()
+    _snapshot_files.update(snapshot['files'])
+    return True
+
+
+def load_snapshot(path):
+    """Load parsed files from a binary snapshot into the parameter store.
+
+    Files that are missing or have been modified since the snapshot was
+    saved are skipped, so they are parsed from text when first requested.
+
+    Args:
+        path: the path of the snapshot file.
+
+    Returns:
+        The number of files loaded from the snapshot.
+
+    """
+    _snapshot_files.clear()
+    try:
+        with open(path, 'rb') as snapshot_file:
+            snapshot = marshal.load(snapshot_file)
+    except (OSError, IOError, EOFError, ValueError, TypeError):
+        return 0
+
+    if (not isinstance(snapshot, dict) or
+            snapshot.get('version') != _SNAPSHOT_VERSION or
+            not isinstance(snapshot.get('files'), dict)):
+        return 0
+
+    loaded = 0
+    for real_path, entry in snapshot['files'].items():
+        if not _valid_entry(entry):
+            continue
+        _snapshot_files[real_path] = entry
+        if _get_mtime(real_path) != entry[0]:
+            continue
+        _store[real_path] = entry
+        loaded += 1
+    _statistics['snapshot_files'] += loaded
+    return loaded
+
+
+def _valid_entry(entry):
+    """Check that a snapshot entry has the layout of a store entry."""
+    if not isinstance(entry, tuple) or len(entry) != 2:
+        return False
+    if not isinstance(entry[1], dict):
+        return False
+    for values in entry[1].values():
+        if not isinstance(values, dict):
+            return False
+        for value in values.values():
+            if not isinstance(value, (int, float, str)):
+                return False
+    return True
+
+
+def save_values(path, section, values):
+    """Write parameter values back to a parameters file.
+
+    Only the lines holding the given parameters are changed, so comments and
+    layout are kept.  Parameters that are not in the file are added at the
+    end of the section.  The file is written to a temporary file and renamed
+    into place.
+
+    Args:
+        path: the path to the file.
+        section: the section holding the parameters.
+        values: a dictionary of {parameter: value}.
+
+    Returns:
+        True if the file was written.
+
+    """
+    try:
+        with open(path, 'r') as par_file:
+            lines = par_file.readlines()
+    except (OSError, IOError):
+        return False
+
+    remaining = dict((name.lower(), (name, value))
+                     for name, value in values.items())
+    current = None
+    section_end = None
+    output = []
+    for line in lines:
+        text = line.strip()
+        if text.startswith('[') and text.endswith(']'):
+            current = text[1:-1].strip()
+            if current == section:
+                section_end = len(output) + 1
+        elif (current == section and '=' in text and
+              not text.startswith(('#', ';'))):
+            name = text.split('=', 1)[0].strip()
+            entry = remaining.pop(name.lower(), None)
+            if entry is not None:
+                line = "%s = %s\n" % (name, entry[1])
+            section_end = len(output) + 1
+        output.append(line)
+
+    if remaining:
+        added = ["%s = %s\n" % entry for entry in remaining.values()]
+        if section_end is None:
+            if output and not output[-1].endswith('\n'):
+                output[-1] += '\n'
+            output.append("[%s]\n" % section)
+            section_end = len(output)
+        output[section_end:section_end] = added
+
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'w') as par_file:
+            par_file.writelines(output)
+        os.rename(temp_path, path)
+    except (OSError, IOError):
+        return False
+    return True
+
+
+class Field(object):
+    """Describes one parameter of a Schema.
+
+    Attributes:
+        name: the parameter name in the file.
+        attribute: the name of the config object attribute.
+        type: the type of the value (int, float, bool or str).
+        default: the value used when the parameter is missing or invalid.
+        minimum: the smallest valid value, or None.
+        maximum: the largest valid value, or None.
+        tunable: True if the value can be changed while the robot is running.
+
+    """
+    name = None
+    attribute = None
+    type = None
+    default = None
+    minimum = None
+    maximum = None
+    tunable = False
+
+    def __init__(self, name, value_type, default, minimum=None,
+                 maximum=None, attribute=None, tunable=False):
+        """Create and initialize a Field.
+
+        Args:
+            name: the parameter name in the file.
+            value_type: the type of the value (int, float, bool or str).
+            default: the value used when the parameter is missing or invalid.
+            minimum: the smallest valid value, or None.
+            maximum: the largest valid value, or None.
+            attribute: the name of the config object attribute, or None to
+                use the lower case parameter name.
+            tunable: True if the value can be changed while the robot is
+                running.
+
+        """
+        self.name = name
+        self.attribute = attribute or name.lower()
+        self.type = value_type
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tunable = tunable
+
+    def convert(self, value):
+        """Convert and validate a value read from a file.
+
+        Args:
+            value: the value from the parameter store.
+
+        Returns:
+            A tuple of the converted value and an error message, which is
+            None if the value is valid.  The default is returned with the
+            error if the value is invalid.
+
+        """
+        if value is None:
+            return self.default, "%s missing" % self.name
+        try:
+            if self.type is str:
+                converted = str(value)
+            elif isinstance(value, int):
+                converted = self.type(value)
+            else:
+                # Reject NaN and infinity, which pass every range check,
+                # and fractions that int() would silently truncate
+                number = float(value)
+                if not math.isfinite(number):
+                    raise ValueError(value)
+                if self.type is float:
+                    converted = number
+                elif number != int(number):
+                    raise ValueError(value)
+                else:
+                    converted = self.type(int(number))
+        except (TypeError, ValueError):
+            return self.default, "%s invalid: %r" % (self.name, value)
+        if ((self.minimum is not None and converted < self.minimum) or
+                (self.maximum is not None and converted > self.maximum)):
+            return self.default, "%s out of range: %r" % (self.name, value)
+        return converted, None
+
+
+class Schema(object):
+    """Declares the parameters of a section and builds config objects.
+
+    The config objects are instances of a class generated from the fields
+    with one __slots__ attribute per field.  Every attribute always holds a
+    value of the declared type, so code using a config object never has to
+    check for missing parameters.
+
+    Attributes:
+        section: the section of the parameters file.
+        fields: the List of Field objects.
+
+    """
+    section = None
+    fields = None
+
+    # Private member variables
+    _config_class = None
+
+    def __init__(self, section, fields):
+        """Create and initialize a Schema.
+
+        Args:
+            section: the section of the parameters file.
+            fields: the List of Field objects.
+
+        """
+        self.section = section
+        self.fields = fields
+        self._config_class = type(
+                str(section.title().replace('_', '') + 'Config'),
+                (object,),
+                {'__slots__': tuple(f.attribute for f in fields),
+                 '__doc__': "Parameters of the %s section." % section})
+
+    def defaults(self):
+        """Return a config object holding the default values."""
+        config = self._config_class()
+        for field in self.fields:
+            setattr(config, field.attribute, field.default)
+        return config
+
+    def copy(self, config, changes=None):
+        """Return a copy of a config object with some values changed.
+
+        The original is left untouched, so a subsystem can switch to the new
+        values by replacing its config reference in one assignment.
+
+        Args:
+            config: the config object to copy.
+            changes: a dictionary of {attribute: value} to change, or None.
+
+        Returns:
+            The new config object.
+
+        """
+        new_config = self._config_class()
+        for field in self.fields:
+            setattr(new_config, field.attribute,
+                    getattr(config, field.attribute))
+        if changes:
+            for attribute, value in changes.items():
+                setattr(new_config, attribute, value)
+        return new_config
+
+    def load(self, params, section=None):
+        """Read and validate a config object from a Parameters object.
+
+        Args:
+            params: the Parameters object to read.
+            section: the section to read, or None to use the schema section.
+
+        Returns:
+            A tuple of the config object and a List of error messages for
+            parameters that were missing or invalid and were given their
+            default values.
+
+        """
+        if section is None:
+            section = self.section
+        config = self._config_class()
+        errors = []
+        for field in self.fields:
+            value = None
+            if params is not None:
+                value = params.get_value(section, field.name)
+            value, error = field.convert(value)
+            if error:
+                errors.append(error)
+            setattr(config, field.attribute, value)
+        return config, errors
+
+    def load_profiles(self, params):
+        """Read and validate a config object for every profile.
+
+        The default profile is read from the schema section.  Every other
+        profile starts from the default profile and applies the values in
+        its [section:profile] section.  Only tunable fields can be changed
+        by a profile, since hardware is only configured once.
+
+        Args:
+            params: the Parameters object to read.
+
+        Returns:
+            A tuple of a dictionary of {profile name: config object} and a
+            List of error messages for parameters that were missing or
+            invalid.
+
+        """
+        default, errors = self.load(params)
+        configs = {DEFAULT_PROFILE: default}
+        if params is None:
+            return configs, errors
+
+        for profile in params.get_profiles(self.section):
+            section = "%s:%s" % (self.section, profile)
+            changes = {}
+            for field in self.fields:
+                value = params.get_value(section, field.name)
+                if value is None:
+                    continue
+                if not field.tunable:
+                    errors.append("%s not tunable in profile %s" %
+                                  (field.name, profile))
+                    continue
+                value, error = field.convert(value)
+                if error:
+                    errors.append("%s in profile %s" % (error, profile))
+                    continue
+                changes[field.attribute] = value
+            configs[profile] = self.copy(default, changes)
+        return configs, errors
+
+
 class Parameters(object):
     """ Reads in a parameters file.
 
@@ -13,11 +530,14 @@ class Parameters(object):
 
     Attributes:
         file_opened:    True if the parameters file is open
+        get_value_timer: the stopwatch.Stopwatch timing every call of
+            get_value()
 
     """
 
     # Public member variables
     file_opened = False
+    get_value_timer = stopwatch.Stopwatch()
 
     # Private member objects
 
@@ -42,36 +562,18 @@ class Parameters(object):
     def _open(self, path):
         """ Open a file with the mode "r".
 
-         Open a file for reading parameters
+         Open a file for reading parameters from the parameter store
 
          Args:
             path: Path to the file
 
         """
         self.file_opened = False
+        self._config = None
         if path:
-            self._config = configparser.SafeConfigParser()
-            try:
-                self._config.read(path)
+            self._config = load(path)
+            if self._config is not None:
                 self.file_opened = True
-            except configparser.NoSectionError:
-                pass
-            except configparser.DuplicateSectionError:
-                pass
-            except configparser.DuplicateOptionError:
-                pass
-            except configparser.NoOptionError:
-                pass
-            except configparser.InterpolationDepthError:
-                pass
-            except configparser.InterpolationMissingOptionError:
-                pass
-            except configparser.InterpolationSyntaxError:
-                pass
-            except configparser.MissingSectionHeaderError:
-                pass
-            except configparser.ParsingError:
-                pass
         return self.file_opened
 
     def _close(self):
@@ -80,11 +582,10 @@ class Parameters(object):
         Close the file and mark not opened
 
         """
-        if self._file:
-            self._file.close()
-            self.file_opened = False
-            self._config = None
+        self.file_opened = False
+        self._config = None
 
+    @get_value_timer
     def get_value(self, section, parameter):
         """ Search the configuration dictionary for the parameter
 
@@ -96,24 +597,155 @@ class Parameters(object):
             parameter: The parameter to read from the file
 
         Return:
-            the parameter value that is read from the file
+            the parameter value that is read from the file, or None if it is
+            not present
 
         """
 
-        if not self._config:
+        if not self._config or not section or not parameter:
             return None
 
-        if section and parameter:
-            try:
-                read_value = self._config.get(section, parameter.lower())
-            except configparser.NoSectionError:
-                return None
-        else:
+        values = self._config.get(section)
+        if values is None:
             return None
+        return values.get(parameter.lower())
 
-        param_value = convert_to_number(read_value)
+    def get_profiles(self, section):
+        """ Return the names of the profiles of a section
+
+        Profiles are stored in sections named [section:profile].
+
+        Args:
+            section: The base section of the profiles
+
+        Return:
+            the sorted List of profile names
 
-        if param_value is not None:
-            return param_value
-        else:
-            return read_value
+        """
+        if not self._config or not section:
+            return []
+        prefix = section + ":"
+        return sorted(name[len(prefix):] for name in self._config
+                      if name.startswith(prefix) and len(name) > len(prefix))
+
+
+class Tunable(object):
+    """Adds tuning values read through a Schema to a subsystem.
+
+    The subsystem sets _schema to its Schema and _parameters_file to its
+    parameters file, and reads its values with _load_config() when it loads
+    its parameters.  Every profile is read at once, so switching profiles
+    only replaces the config reference.
+
+    """
+    # Private member objects
+    _schema = None
+    _log = None
+    _parameters = None
+    _config = None
+    _profiles = None
+
+    # Private member variables
+    _log_enabled = False
+    _profile = None
+    _parameters_file = None
+
+    def reload_tunables(self):
+        """Reload tuning values from the parameter file.
+
+        Speed ratios, thresholds and other tuning values are updated in
+        place.  Hardware objects are not recreated, so this can be used to
+        apply parameter changes while the robot is disabled.
+
+        Returns:
+            True if the parameter file was processed successfully.
+
+        """
+        self._parameters = Parameters(self._parameters_file)
+        if not self._parameters.file_opened:
+            return False
+        self._config = self._load_config()
+        return True
+
+    def _load_config(self):
+        """Read and validate the parameters of every profile.
+
+        Missing or invalid parameters are given their default values and
+        logged.  The profile in use is kept if it is still in the file.
+
+        Returns:
+            The config object of the profile in use.
+
+        """
+        self._profiles, errors = self._schema.load_profiles(self._parameters)
+        if self._log_enabled:
+            for error in errors:
+                self._log.warning("Parameter %s", error)
+        if self._profile not in self._profiles:
+            self._profile = DEFAULT_PROFILE
+        return self._profiles[self._profile]
+
+    @classmethod
+    def get_schema(cls):
+        """Return the schema of the parameters."""
+        return cls._schema
+
+    def get_config(self):
+        """Return the current config object."""
+        return self._config
+
+    def set_config(self, config):
+        """Replace the config object.
+
+        The new values are used from the next call that reads them.
+
+        Args:
+            config: the config object built from the schema.
+
+        """
+        self._config = config
+        self._profiles[self._profile] = config
+
+    def get_profiles(self):
+        """Return the sorted List of profile names."""
+        return sorted(self._profiles)
+
+    def get_profile(self):
+        """Return the name of the profile in use."""
+        return self._profile
+
+    def set_profile(self, profile):
+        """Switch to another profile.
+
+        Args:
+            profile: the name of the profile.
+
+        Returns:
+            True if the profile exists.
+
+        """
+        config = self._profiles.get(profile)
+        if config is None:
+            return False
+        self._profile = profile
+        self._config = config
+        return True
+
+
+def load_profile(schema, path, profile=DEFAULT_PROFILE):
+    """Read the config object of one profile from a parameters file.
+
+    Missing or invalid parameters are given their default values, and a
+    profile that is not in the file falls back to the default profile.
+
+    Args:
+        schema: the Schema object to read.
+        path: the path to the parameters file.
+        profile: the name of the profile.
+
+    Returns:
+        The config object.
+
+    """
+    configs = schema.load_profiles(Parameters(path))[0]
+    return configs.get(profile, configs[DEFAULT_PROFILE])
@@ -0,0 +1,157 @@
+"""This module watches parameter files for changes.
+
+On Linux the directory is watched with inotify, so checking for changes is
+a single non-blocking read.  If inotify is not available, the modification
+time of each file is polled instead.
+
+"""
+
+# Imports
+import ctypes
+import ctypes.util
+import fnmatch
+import glob
+import os
+import struct
+import stopwatch
+
+
+# inotify constants (from sys/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class ParameterWatcher(object):
+    """Reports parameter files that have changed.
+
+    Attributes:
+        using_inotify: True if changes are detected with inotify, False if
+            modification times are polled.
+
+    """
+    # Public member variables
+    using_inotify = False
+
+    # Private member objects
+    _poll_timer = None
+
+    # Private member variables
+    _directory = None
+    _pattern = None
+    _inotify_fd = None
+    _mtimes = None
+    _poll_interval = 0.5
+
+    def __init__(self, directory="/home/lvuser/par", pattern="*.par",
+                 poll_interval=0.5):
+        """Create and initialize a ParameterWatcher.
+
+        Args:
+            directory: the directory containing the parameter files.
+            pattern: the filename pattern of the files to watch.
+            poll_interval: the minimum time in seconds between modification
+                time checks when inotify is not available.
+
+        """
+        self._directory = os.path.realpath(directory)
+        self._pattern = pattern
+        self._poll_interval = poll_interval
+        self._inotify_fd = None
+        self._mtimes = {}
+        self._poll_timer = stopwatch.Stopwatch()
+        self.using_inotify = self._open_inotify()
+        if not self.using_inotify:
+            self._mtimes = self._read_mtimes()
+            self._poll_timer.start()
+
+    def dispose(self):
+        """Dispose of a ParameterWatcher object."""
+        if self._inotify_fd is not None:
+            try:
+                os.close(self._inotify_fd)
+            except OSError:
+                pass
+        self._inotify_fd = None
+        self._poll_timer = None
+
+    def _open_inotify(self):
+        """Start watching the directory with inotify.
+
+        Returns:
+            True if inotify is watching the directory.
+
+        """
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError, TypeError):
+            return False
+        if fd < 0:
+            return False
+        # Only report files once they have been completely written
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO
+        if libc.inotify_add_watch(fd, self._directory.encode(), mask) < 0:
+            os.close(fd)
+            return False
+        self._inotify_fd = fd
+        return True
+
+    def _read_mtimes(self):
+        """Return a dictionary of the watched files and their mtimes."""
+        mtimes = {}
+        for path in glob.glob(os.path.join(self._directory, self._pattern)):
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                pass
+        return mtimes
+
+    def poll(self):
+        """Return the files that changed since the last poll.
+
+        Returns:
+            A List of the full paths of the changed files.
+
+        """
+        if self.using_inotify:
+            return self._poll_inotify()
+        return self._poll_mtimes()
+
+    def _poll_inotify(self):
+        """Read any pending inotify events without blocking."""
+        changed = []
+        while True:
+            try:
+                data = os.read(self._inotify_fd, 4096)
+            except OSError:
+                # EAGAIN: no more events
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data,
+                                                                     offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode()
+                offset += length
+                if name and fnmatch.fnmatch(name, self._pattern):
+                    path = os.path.join(self._directory, name)
+                    if path not in changed:
+                        changed.append(path)
+        return changed
+
+    def _poll_mtimes(self):
+        """Compare the current modification times with the last poll."""
+        elapsed = self._poll_timer.elapsed_time_in_secs()
+        if elapsed is not None and elapsed < self._poll_interval:
+            return []
+        self._poll_timer.start()
+        mtimes = self._read_mtimes()
+        changed = [path for path, mtime in mtimes.items()
+                   if self._mtimes.get(path) != mtime]
+        self._mtimes = mtimes
+        return changed
@@ -2,14 +2,26 @@
 
 # Imports
 import wpilib
-#import autoscript
+import asynclog
+import autocommands
+import autoscript
 import common
+import dashboard
+import dashserver
 import drivetrain
 import feeder
 import lift
-import logging
-import logging.config
+import macro
 import math
+import os
+import parameters
+import parwatch
+import schemas
+import telemetry
+import time
+import timerwheel
+import trajectory
+import tuning
 import userinterface
 
 
@@ -21,15 +33,61 @@ class MyRobot(wpilib.IterativeRobot):
     # Public member variables
 
     # Private member objects
+    _autoscript_chooser = None
+    _autoscript_compiler = None
+    _autoscript_interpreter = None
+    _autoscript_library = None
+    _autoscript_watcher = None
+    _dashboard = None
     _drive_train = None
     _feeder = None
     _lift = None
     _log = None
+    _macro = None
+    _macro_player = None
+    _macro_recorder = None
+    _parameters = None
+    _parameter_watcher = None
+    _profile_chooser = None
+    _telemetry = None
+    _timer_wheel = None
+    _trajectories = None
+    _trajectory_player = None
+    _trajectory_recorder = None
+    _tuner = None
     _user_interface = None
 
+    # Private parameters
+    _autoscript_name = None
+    _autoscript_path = None
+    _macro_controller = None
+    _macro_record_button = None
+    _macro_play_button = None
+    _macro_file = None
+    _macro_abort_threshold = None
+    _profile_controller = None
+    _profile_button = None
+    _trajectory_controller = None
+    _trajectory_record_button = None
+    _trajectory_path = None
+    _trajectory_file = None
+    _telemetry_file = None
+
     # Private member variables
     _log_enabled = False
+    _log_records_dropped = 0
     _driver_alternate = False
+    _profile = None
+    _profiles = None
+    _chooser_profile = None
+    _chooser_autoscript = None
+    _autoscript_names = None
+    _robot_state = None
+    _drive_input = 0.0
+    _macro_unsaved = False
+    _trajectory_unsaved = False
+    _autoscripts_stale = False
+    _macro_live_buttons = None
 
 
     # Iterative robot methods that we override.
@@ -40,8 +98,19 @@ class MyRobot(wpilib.IterativeRobot):
         Called upon robot power-on.
 
         """
+        # Load the compiled parameter snapshot before anything reads a
+        # parameter file
+        snapshot = "/home/lvuser/par/parameters.snapshot"
+        parameters.load_snapshot(snapshot)
+
         self._initialize("/home/lvuser/par/robot.par", True)
 
+        # Recompile the snapshot if any parameter file had to be parsed and
+        # the parsed values are not the ones in the snapshot
+        if (parameters.get_statistics()['misses'] and
+                parameters.snapshot_differs()):
+            parameters.save_snapshot(snapshot)
+
     def disabledInit(self):
         """Prepares the robot for Disabled mode.
 
@@ -50,6 +119,19 @@ class MyRobot(wpilib.IterativeRobot):
         """
         self._set_robot_state(common.ProgramState.DISABLED)
 
+        # Stop any macro or trajectory that is recording or playing
+        self._stop_macros()
+        self._stop_trajectory_recording()
+
+        # Stop the autonomous script if it did not finish
+        self._stop_autoscript()
+
+        # Report any log records dropped while the robot was enabled, the
+        # dashboard bandwidth used and the time spent in timed methods
+        self._report_dropped_log_records()
+        self._report_dashboard_statistics()
+        self._report_timing_statistics()
+
         # Read sensors
         self._read_sensors()
 
@@ -64,6 +146,15 @@ class MyRobot(wpilib.IterativeRobot):
         # Read sensors
         self._read_sensors()
 
+        # Start the autonomous script chosen on the dashboard
+        if self._autoscript_interpreter and self._autoscript_library:
+            name = self._get_selected_autoscript()
+            instructions = self._autoscript_library.get(name)
+            if instructions:
+                self._autoscript_interpreter.start(instructions)
+            elif self._log_enabled:
+                self._log.warning("Autoscript %s is not available", name)
+
     def teleopInit(self):
         """Prepares the robot for Teleop mode.
 
@@ -90,13 +181,37 @@ class MyRobot(wpilib.IterativeRobot):
         giving a periodic frequency of about 50Hz (50 times per second).
 
         """
+        # Fire any scheduled actions that are due
+        self._tick_timers()
+
+        # Apply any tuning values edited on the dashboard
+        self._apply_tuning()
+
         # Set all motors to be stopped (prevent motor safety errors)
         if self._drive_train:
             self._drive_train.drive(0.0, 0.0, False)
 
+        # Save dashboard tuning values and any recorded macro or
+        # trajectory, then apply any tuning changes made to the parameter
+        # files
+        self._save_tuning()
+        self._save_macro()
+        self._save_trajectory()
+        self._apply_parameter_changes()
+
+        # Recompile any autonomous scripts that changed and show the chosen
+        # script
+        self._apply_autoscript_changes()
+
         # Read sensors
         self._read_sensors()
 
+        # Record this iteration in the telemetry ring
+        self._write_telemetry()
+
+        # Update the dashboard
+        self._publish_dashboard()
+
     def autonomousPeriodic(self):
         """Called iteratively during autonomous mode.
 
@@ -104,9 +219,30 @@ class MyRobot(wpilib.IterativeRobot):
         giving a periodic frequency of about 50Hz (50 times per second).
 
         """
+        # Fire any scheduled actions that are due
+        self._tick_timers()
+
+        # Apply any tuning values edited on the dashboard
+        self._apply_tuning()
+
         # Read sensors
         self._read_sensors()
 
+        # Run the current autonomous script instruction, and keep the drive
+        # train stopped once the script has finished
+        if (self._autoscript_interpreter and
+                self._autoscript_interpreter.running):
+            if self._autoscript_interpreter.step():
+                self._log_autoscript_times()
+        elif self._drive_train:
+            self._drive_train.drive(0.0, 0.0, False)
+
+        # Record this iteration in the telemetry ring
+        self._write_telemetry()
+
+        # Update the dashboard
+        self._publish_dashboard()
+
     def teleopPeriodic(self):
         """Called iteratively during teleop mode.
 
@@ -114,24 +250,45 @@ class MyRobot(wpilib.IterativeRobot):
         giving a periodic frequency of about 50Hz (50 times per second).
 
         """
+        # Fire any scheduled actions that are due
+        self._tick_timers()
+
+        # Apply any tuning values edited on the dashboard
+        self._apply_tuning()
+
         # Read sensors
         self._read_sensors()
 
         # Perform user controlled actions
         if self._user_interface:
-            # Check for alternate speed mode request
-            self._check_alternate_speed_modes()
+            # Sample the controllers once for this iteration, replacing the
+            # inputs with the macro frame while one is playing, and run any
+            # button bindings
+            playback = None
+            if self._macro_player and self._macro_player.playing:
+                playback = self._play_macro_frame
+            self._user_interface.update(playback)
+
+            # Record driver input macros
+            if (not playback and self._macro_recorder and
+                    self._macro_recorder.recording):
+                self._macro_recorder.record(self._user_interface)
 
             # Manually control the robot
             self._control_drive_train()
             self._control_feeder()
             self._control_lift()
 
-            # Update/store the UI button state
-            self._user_interface.store_button_states(
-                    userinterface.UserControllers.DRIVER)
-            self._user_interface.store_button_states(
-                    userinterface.UserControllers.SCORING)
+            # Record the drive train output for trajectory replay
+            if (self._trajectory_recorder and
+                    self._trajectory_recorder.recording):
+                self._trajectory_recorder.record(self._drive_train)
+
+        # Record this iteration in the telemetry ring
+        self._write_telemetry()
+
+        # Update the dashboard
+        self._publish_dashboard()
 
     def testPeriodic(self):
         """Called iteratively during test mode.
@@ -158,32 +315,85 @@ class MyRobot(wpilib.IterativeRobot):
         # Initialize public member variables
 
         # Initialize private member objects
+        self._autoscript_chooser = None
+        self._autoscript_compiler = None
+        self._autoscript_interpreter = None
+        self._autoscript_library = None
+        self._autoscript_watcher = None
+        self._dashboard = None
         self._drive_train = None
         self._feeder = None
         self._lift = None
         self._log = None
+        self._macro = None
+        self._macro_player = None
+        self._macro_recorder = None
+        self._parameters = None
+        self._parameter_watcher = None
+        self._profile_chooser = None
+        self._telemetry = None
+        self._timer_wheel = None
+        self._trajectories = None
+        self._trajectory_player = None
+        self._trajectory_recorder = None
+        self._tuner = None
         self._user_interface = None
 
         # Initialize private member variables
         self._log_enabled = False
+        self._log_records_dropped = 0
         self._driver_alternate = False
+        self._profile = None
+        self._profiles = []
+        self._chooser_profile = None
+        self._chooser_autoscript = None
+        self._autoscript_names = []
+        self._robot_state = common.ProgramState.DISABLED
+        self._drive_input = 0.0
+        self._macro_unsaved = False
+        self._trajectory_unsaved = False
+        self._autoscripts_stale = False
+        self._macro_live_buttons = {}
 
         # Enable logging if specified
         if logging_enabled:
             # Create a new data log object
-            self._log = logging.getLogger('robot')
-            self._log.setLevel(logging.DEBUG)
-            fh = logging.FileHandler('/home/lvuser/log/robot.log')
-            fh.setLevel(logging.DEBUG)
-            formatter = logging.Formatter(
-                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            fh.setFormatter(formatter)
-            self._log.addHandler(fh)
+            self._log = asynclog.get_logger('robot')
             if self._log:
                 self._log_enabled = True
             else:
                 self._log = None
 
+        # Read and validate the parameters file
+        self._parameters = parameters.Parameters(params)
+        config, errors = schemas.ROBOT_SCHEMA.load(self._parameters)
+        if self._log_enabled:
+            if not self._parameters.file_opened:
+                self._log.warning("Parameter file %s not found", params)
+            else:
+                for error in errors:
+                    self._log.warning("Parameter %s", error)
+
+        # Initialize private parameters
+        self._autoscript_name = config.autoscript
+        self._autoscript_path = config.autoscript_path
+        self._macro_controller = config.macro_controller
+        self._macro_record_button = config.macro_record_button
+        self._macro_play_button = config.macro_play_button
+        self._macro_file = config.macro_file
+        self._macro_abort_threshold = config.macro_abort_threshold
+        self._profile_controller = config.profile_controller
+        self._profile_button = config.profile_button
+        self._trajectory_controller = config.trajectory_controller
+        self._trajectory_record_button = config.trajectory_record_button
+        self._trajectory_path = config.trajectory_path
+        self._trajectory_file = config.trajectory_file
+        self._telemetry_file = config.telemetry_file
+        profile = config.profile
+
+        # Create the timer wheel used for delayed actions and deadlines
+        self._timer_wheel = timerwheel.TimerWheel()
+
         # Create robot objects
         self._drive_train = drivetrain.DriveTrain(
                                     "/home/lvuser/par/drivetrain.par",
@@ -195,6 +405,430 @@ class MyRobot(wpilib.IterativeRobot):
                                     "/home/lvuser/par/userinterface.par",
                                     self._log_enabled)
 
+        # Map the telemetry ring that records the sensors and outputs every
+        # loop iteration
+        if self._telemetry:
+            self._telemetry.dispose()
+        self._telemetry = telemetry.TelemetryRing(self._telemetry_file,
+                                                  config.telemetry_records)
+        if not self._telemetry.opened and self._log_enabled:
+            self._log.warning("Telemetry ring %s could not be opened",
+                              self._telemetry_file)
+
+        # Publish the subsystem values to the SmartDashboard at their own
+        # rates, and only when they change.  A simulated robot can publish to
+        # a stand-in dashboard server instead.
+        table = None
+        if config.dashboard_server:
+            host, separator, port = config.dashboard_server.rpartition(":")
+            if separator and port.isdigit():
+                table = dashserver.DashboardClient(host, int(port))
+            elif self._log_enabled:
+                self._log.warning("DASHBOARD_SERVER %s is not host:port",
+                                  config.dashboard_server)
+        self._dashboard = dashboard.DashboardPublisher(
+                                    period=config.dashboard_period,
+                                    refresh=config.dashboard_refresh,
+                                    table=table)
+        self._drive_train.register_dashboard(self._dashboard)
+        self._lift.register_dashboard(self._dashboard)
+
+        # Publish the tuning values to the SmartDashboard
+        self._tuner = tuning.ParameterTuner(self._log)
+        self._tuner.add(self._drive_train, "/home/lvuser/par/drivetrain.par")
+        self._tuner.add(self._feeder, "/home/lvuser/par/feeder.par")
+        self._tuner.add(self._lift, "/home/lvuser/par/lift.par")
+
+        # Offer every profile in the parameter files on the dashboard and
+        # start with the profile named in the robot parameters
+        self._profiles = self._get_profiles()
+        if profile not in self._profiles:
+            profile = parameters.DEFAULT_PROFILE
+        self._profile_chooser = wpilib.SendableChooser()
+        for name in self._profiles:
+            if name == profile:
+                self._profile_chooser.addDefault(name, name)
+            else:
+                self._profile_chooser.addObject(name, name)
+        wpilib.SmartDashboard.putData("Profile", self._profile_chooser)
+        self._chooser_profile = profile
+        self._set_profile(profile)
+
+        # Watch the parameter files so tuning changes can be applied while
+        # disabled
+        self._parameter_watcher = parwatch.ParameterWatcher(
+                                    os.path.dirname(os.path.realpath(params)))
+
+        # Create the macro recorder/player and load the saved macro
+        self._macro_recorder = macro.MacroRecorder(config.macro_max_frames)
+        self._macro_player = macro.MacroPlayer()
+        self._macro = macro.Macro()
+        if not self._macro.load(self._macro_file):
+            self._macro = None
+
+        # Create the trajectory recorder/player and load the saved
+        # trajectories so replaying one in autonomous needs no file access
+        self._trajectory_recorder = trajectory.TrajectoryRecorder(
+                                    config.trajectory_max_frames)
+        self._trajectory_player = trajectory.TrajectoryPlayer()
+        self._trajectories = trajectory.load_trajectories(
+                                    self._trajectory_path)
+
+        # Compile every autonomous script now so errors are reported at
+        # startup and choosing a script on the dashboard needs no file access
+        self._autoscript_compiler = self._create_autoscript_compiler()
+        self._autoscript_library = autoscript.AutoScriptLibrary(
+                                    self._autoscript_compiler,
+                                    self._autoscript_path)
+        self._autoscript_chooser = wpilib.SendableChooser()
+        self._load_autoscripts()
+        wpilib.SmartDashboard.putData("Autoscript", self._autoscript_chooser)
+        self._autoscript_watcher = parwatch.ParameterWatcher(
+                                    self._autoscript_path, "*.as")
+        self._autoscript_interpreter = autoscript.AutoScriptInterpreter()
+
+        # Bind controller buttons to actions
+        self._bind_controls()
+
+        if self._log_enabled:
+            self._log.debug("Parameters: %(files)d files, "
+                            "%(snapshot_files)d from snapshot, %(parses)d "
+                            "parses in %(parse_time).3fs, %(hits)d cache hits",
+                            parameters.get_statistics())
+
+    def _report_dropped_log_records(self):
+        """Log the number of log records dropped since the last report."""
+        if not self._log_enabled:
+            return
+        dropped = asynclog.get_statistics()['dropped']
+        if dropped != self._log_records_dropped:
+            self._log.warning("%d log records dropped",
+                              dropped - self._log_records_dropped)
+            self._log_records_dropped = dropped
+
+    def _report_dashboard_statistics(self):
+        """Log the dashboard updates sent since the last report."""
+        if not self._dashboard:
+            return
+        if self._log_enabled:
+            statistics = self._dashboard.get_statistics()
+            self._log.debug("Dashboard: %d updates, %d skipped, "
+                            "%.0f bytes/s", statistics['updates'],
+                            statistics['skipped'],
+                            statistics['bytes_per_second'])
+        self._dashboard.reset_statistics()
+
+    def _report_timing_statistics(self):
+        """Log the time spent in timed methods since the last report."""
+        for name, timer in (("DriveTrain.drive",
+                             drivetrain.DriveTrain.drive_timer),
+                            ("Parameters.get_value",
+                             parameters.Parameters.get_value_timer)):
+            statistics = timer.get_statistics()
+            if self._log_enabled and statistics.count:
+                self._log.debug("%s: %d calls, mean %.6fs, 99th "
+                                "percentile %.6fs, max %.6fs", name,
+                                statistics.count, statistics.mean,
+                                statistics.percentile(99),
+                                statistics.maximum)
+            statistics.reset()
+
+    def _publish_dashboard(self):
+        """Publish the dashboard values that are due and have changed."""
+        if self._dashboard:
+            self._dashboard.publish()
+
+    def _tick_timers(self):
+        """Advance the timer wheel and fire any callbacks that are due."""
+        if self._timer_wheel:
+            self._timer_wheel.tick()
+
+    def _apply_parameter_changes(self):
+        """Reload tuning values from any parameter files that changed.
+
+        Only tuning values are reloaded; hardware objects are not recreated.
+        This is only called from disabledPeriodic, so a file edited while the
+        robot is enabled takes effect the next time the robot is disabled.
+        """
+        if not self._parameter_watcher:
+            return
+        changed = self._parameter_watcher.poll()
+        if not changed:
+            return
+
+        for path in changed:
+            parameters.invalidate(path)
+            if self._log_enabled:
+                self._log.debug("Parameter file changed: %s", path)
+
+        # Unchanged files are served from the parameter store, so reloading
+        # every object is cheap
+        if self._drive_train:
+            self._drive_train.reload_tunables()
+        if self._feeder:
+            self._feeder.reload_tunables()
+        if self._lift:
+            self._lift.reload_tunables()
+        if self._user_interface:
+            self._user_interface.reload_tunables()
+
+        # Show the reloaded values on the dashboard
+        if self._tuner:
+            self._tuner.publish()
+
+    def _apply_tuning(self):
+        """Apply any profile selection or tuning values from the dashboard."""
+        if self._profile_chooser:
+            selected = self._profile_chooser.getSelected()
+            if selected is not None and selected != self._chooser_profile:
+                self._chooser_profile = selected
+                self._set_profile(selected)
+        if self._tuner:
+            self._tuner.update()
+
+    def _get_profiles(self):
+        """Return the names of the profiles in any subsystem parameter file.
+
+        The default profile is always first.
+        """
+        names = set()
+        for subsystem in [self._drive_train, self._feeder, self._lift]:
+            if subsystem:
+                names.update(subsystem.get_profiles())
+        names.discard(parameters.DEFAULT_PROFILE)
+        return [parameters.DEFAULT_PROFILE] + sorted(names)
+
+    def _set_profile(self, profile):
+        """Switch every subsystem to a profile.
+
+        Each subsystem has already read all of its profiles, so this only
+        swaps config references and is safe to call in the middle of a loop
+        iteration.  Subsystems without the profile use their default values.
+
+        Args:
+            profile: the name of the profile.
+
+        """
+        for subsystem in [self._drive_train, self._feeder, self._lift]:
+            if subsystem and not subsystem.set_profile(profile):
+                subsystem.set_profile(parameters.DEFAULT_PROFILE)
+        self._profile = profile
+        wpilib.SmartDashboard.putString("Active Profile", profile)
+        if self._tuner:
+            self._tuner.publish()
+        if self._log_enabled:
+            self._log.info("Profile: %s", profile)
+
+    def _next_profile(self):
+        """Switch to the next profile in the list."""
+        if not self._profiles:
+            return
+        index = 0
+        if self._profile in self._profiles:
+            index = self._profiles.index(self._profile) + 1
+        self._set_profile(self._profiles[index % len(self._profiles)])
+
+    def _save_tuning(self):
+        """Write tuning values edited on the dashboard to the parameter files.
+
+        This is only called while disabled so the files are never written
+        during a match.
+        """
+        if not self._tuner or not self._tuner.has_unsaved_changes():
+            return
+        for path in self._tuner.flush():
+            if self._log_enabled:
+                self._log.debug("Tuning values saved to %s", path)
+
+    def _save_macro(self):
+        """Write a newly recorded driver input macro to its file.
+
+        This is only called while disabled so the file is never written
+        during a match.
+        """
+        if not self._macro_unsaved:
+            return
+        self._macro_unsaved = False
+        saved = self._macro.save(self._macro_file)
+        if self._log_enabled:
+            self._log.debug("Macro saved to %s: %s", self._macro_file, saved)
+
+    def _save_trajectory(self):
+        """Write a newly recorded trajectory to its file.
+
+        This is only called while disabled so the trajectory is never
+        compressed and written during a match.
+        """
+        if not self._trajectory_unsaved:
+            return
+        self._trajectory_unsaved = False
+        path = os.path.join(self._trajectory_path, self._trajectory_file)
+        saved = self._trajectories[self._trajectory_file].save(path)
+        if self._log_enabled:
+            self._log.debug("Trajectory saved to %s: %s", path, saved)
+
+    def _create_autoscript_compiler(self):
+        """Create an autoscript compiler with the robot's commands.
+
+        Returns:
+            The autoscript.AutoScriptCompiler object.
+
+        """
+        compiler = autoscript.AutoScriptCompiler(self._timer_wheel)
+        register = autocommands.register
+        register(compiler, "wait", self._wait)
+        register(compiler, "wait_time", self._wait)
+        if self._drive_train:
+            drive_train = self._drive_train
+            register(compiler, "drive_time", drive_train.drive_time, None,
+                     self._stop_drive)
+            register(compiler, "turn_time", drive_train.turn_time, None,
+                     self._stop_drive)
+            register(compiler, "drive_distance", drive_train.drive_distance,
+                     None, self._stop_drive)
+            register(compiler, "turn_to_heading", drive_train.turn_to_heading,
+                     None, self._stop_drive)
+            register(compiler, "adjust_heading", drive_train.adjust_heading,
+                     None, self._stop_drive)
+            register(compiler, "replay_trajectory", self._replay_trajectory,
+                     None, self._stop_trajectory_replay,
+                     self._check_trajectory)
+            compiler.register_sensor("gyro", drive_train.get_heading)
+        if self._feeder:
+            register(compiler, "feed_time", self._feeder.feed_time, None,
+                     self._stop_feeder)
+            register(compiler, "arms_time", self._feeder.arms_time, None,
+                     self._stop_arms)
+        if self._lift:
+            register(compiler, "lift_time", self._lift.lift_time, None,
+                     self._stop_lift)
+            register(compiler, "set_lift_position",
+                     self._lift.set_lift_position, None, self._stop_lift)
+            compiler.register_sensor("lift_encoder",
+                                     self._lift.get_encoder_count)
+        return compiler
+
+    def _stop_drive(self):
+        """Stop the drive train when an autoscript command is stopped."""
+        self._drive_train.drive(0.0, 0.0, False)
+
+    def _stop_feeder(self):
+        """Stop the feeder when an autoscript command is stopped."""
+        self._feeder.feed(common.Direction.STOP, 0.0)
+
+    def _stop_arms(self):
+        """Stop the feeder arms when an autoscript command is stopped."""
+        self._feeder.move_arms(common.Direction.STOP, 0.0)
+
+    def _stop_lift(self):
+        """Stop the lift when an autoscript command is stopped."""
+        self._lift.move_lift(0.0)
+
+    def _load_autoscripts(self):
+        """Compile any new or changed autoscripts and offer them for choice.
+
+        Scripts that could not be compiled are still offered so the errors
+        are shown when they are chosen.
+        """
+        library = self._autoscript_library
+        changed = library.refresh()
+        for name in changed:
+            errors = library.get_errors(name)
+            if not self._log_enabled:
+                continue
+            for message in errors:
+                self._log.error("Autoscript %s: %s", name, message)
+            if library.get(name):
+                self._log.debug("Autoscript %s: %d statements", name,
+                                len(library.get(name)))
+
+        # A chooser option cannot be removed, so names are only added
+        for name in library.get_names():
+            if name in self._autoscript_names:
+                continue
+            self._autoscript_names.append(name)
+            if name == self._autoscript_name:
+                self._autoscript_chooser.addDefault(name, name)
+            else:
+                self._autoscript_chooser.addObject(name, name)
+        if changed or self._chooser_autoscript is None:
+            self._show_autoscript(self._get_selected_autoscript())
+
+    def _apply_autoscript_changes(self):
+        """Recompile changed autoscripts and show the chosen script."""
+        if not self._autoscript_library:
+            return
+        if self._autoscript_watcher and self._autoscript_watcher.poll():
+            self._autoscripts_stale = True
+        if self._autoscripts_stale:
+            self._autoscripts_stale = False
+            self._load_autoscripts()
+        name = self._get_selected_autoscript()
+        if name != self._chooser_autoscript:
+            self._show_autoscript(name)
+
+    def _get_selected_autoscript(self):
+        """Return the name of the autoscript chosen on the dashboard."""
+        name = None
+        if self._autoscript_chooser:
+            name = self._autoscript_chooser.getSelected()
+        if name is None:
+            name = self._autoscript_name
+        return name
+
+    def _show_autoscript(self, name):
+        """Show the chosen autoscript and any compile errors.
+
+        Args:
+            name: the autoscript name.
+
+        """
+        self._chooser_autoscript = name
+        errors = self._autoscript_library.get_errors(name)
+        if errors:
+            status = "%s: %s" % (name, "; ".join(errors))
+        elif self._autoscript_library.get(name) is None:
+            status = "%s: not found" % name
+        else:
+            status = name
+        wpilib.SmartDashboard.putString("Autoscript Status", status)
+
+    def _stop_autoscript(self):
+        """Stop the autonomous script if it is still running."""
+        interpreter = self._autoscript_interpreter
+        if interpreter and interpreter.running:
+            instruction = interpreter.get_current_instruction()
+            interpreter.stop()
+            if self._log_enabled:
+                self._log.info("Autoscript stopped at line %s: %s",
+                               instruction.line, instruction.command)
+            self._log_autoscript_times()
+
+    def _log_autoscript_times(self):
+        """Log the wall time of each autonomous script instruction."""
+        if not self._log_enabled or not self._autoscript_interpreter:
+            return
+        total = 0.0
+        for instruction, duration in (
+                self._autoscript_interpreter.get_instruction_times()):
+            total += duration
+            self._log.info("Autoscript line %s %s%r: %.3fs",
+                           instruction.line, instruction.command,
+                           instruction.arguments, duration)
+        self._log.info("Autoscript total: %.3fs", total)
+
+    def _wait(self, time_left):
+        """Wait for a time duration (autoscript "wait" command).
+
+        Args:
+            time_left: the time left to wait in seconds.
+
+        Returns:
+            True when the time has passed.
+
+        """
+        return time_left <= 0.0
+
     def _read_sensors(self):
         """Have the objects read their sensors."""
         if self._drive_train:
@@ -204,8 +838,47 @@ class MyRobot(wpilib.IterativeRobot):
         if self._lift:
             self._lift.read_sensors()
 
+    def _write_telemetry(self):
+        """Write the sensors and motor outputs to the telemetry ring."""
+        if not self._telemetry or not self._telemetry.opened:
+            return
+        gyro = 0.0
+        acceleration = 0.0
+        distance = 0.0
+        left = 0.0
+        right = 0.0
+        drive_output = 0.0
+        heading_setpoint = None
+        if self._drive_train:
+            gyro = self._drive_train.get_heading()
+            acceleration = self._drive_train.get_acceleration()
+            distance = self._drive_train.get_distance_traveled()
+            left, right = self._drive_train.get_motor_outputs()
+            drive_output = self._drive_train.get_output()[0]
+            heading_setpoint = self._drive_train.get_heading_setpoint()
+        encoder = 0
+        lift_output = 0.0
+        lift_setpoint = None
+        if self._lift:
+            encoder = self._lift.get_encoder_count()
+            lift_output = self._lift.get_output()
+            lift_setpoint = self._lift.get_position_setpoint()
+        line = 0
+        interpreter = self._autoscript_interpreter
+        if interpreter:
+            instruction = interpreter.get_current_instruction()
+            if instruction is not None and instruction.line:
+                line = instruction.line
+        self._telemetry.write(time.time(), gyro, acceleration, distance,
+                              encoder, left, right, lift_output,
+                              self._drive_input, drive_output,
+                              heading_setpoint, lift_setpoint, line,
+                              self._robot_state)
+        self._drive_input = 0.0
+
     def _set_robot_state(self, state):
         """Notify objects of the current mode."""
+        self._robot_state = state
         if self._drive_train:
             self._drive_train.set_robot_state(state)
         if self._feeder:
@@ -215,14 +888,215 @@ class MyRobot(wpilib.IterativeRobot):
         if self._user_interface:
             self._user_interface.set_robot_state(state)
 
-    def _check_alternate_speed_modes(self):
-        """Check for alternate speed mode."""
-        if (self._user_interface.get_button_state(
-                        userinterface.UserControllers.DRIVER,
-                        userinterface.JoystickButtons.LEFTBUMPER) == 1):
-            self._driver_alternate = True
-        else:
-            self._driver_alternate = False
+    def _bind_controls(self):
+        """Bind controller buttons to robot actions."""
+        if not self._user_interface:
+            return
+
+        # Alternate speed mode while the driver holds the left bumper
+        self._user_interface.on_press(
+                                userinterface.UserControllers.DRIVER,
+                                userinterface.JoystickButtons.LEFTBUMPER,
+                                lambda: self._set_driver_alternate(True))
+        self._user_interface.on_release(
+                                userinterface.UserControllers.DRIVER,
+                                userinterface.JoystickButtons.LEFTBUMPER,
+                                lambda: self._set_driver_alternate(False))
+
+        # Ignore the lift encoder limits while scoring holds the left bumper
+        if self._lift:
+            self._user_interface.on_press(
+                                userinterface.UserControllers.SCORING,
+                                userinterface.JoystickButtons.LEFTBUMPER,
+                                lambda: self._lift.ignore_encoder_limits(True))
+            self._user_interface.on_release(
+                                userinterface.UserControllers.SCORING,
+                                userinterface.JoystickButtons.LEFTBUMPER,
+                                lambda: self._lift.ignore_encoder_limits(False))
+
+        # Record a macro while the record button is held, play it back when
+        # the play button is pressed
+        self._user_interface.on_press(self._macro_controller,
+                                      self._macro_record_button,
+                                      self._start_macro_recording)
+        self._user_interface.on_release(self._macro_controller,
+                                        self._macro_record_button,
+                                        self._stop_macro_recording)
+        self._user_interface.on_press(self._macro_controller,
+                                      self._macro_play_button,
+                                      self._play_macro)
+
+        # Record a trajectory while the record button is held
+        if self._drive_train:
+            self._user_interface.on_press(self._trajectory_controller,
+                                          self._trajectory_record_button,
+                                          self._start_trajectory_recording)
+            self._user_interface.on_release(self._trajectory_controller,
+                                            self._trajectory_record_button,
+                                            self._stop_trajectory_recording)
+
+        # Step through the parameter profiles
+        self._user_interface.on_press(self._profile_controller,
+                                      self._profile_button,
+                                      self._next_profile)
+
+        # The macro, profile and trajectory buttons keep their live states
+        # while a macro plays, so replaying them does not restart the macro,
+        # change the profile or record a trajectory
+        live_buttons = {}
+        for controller, button in (
+                (self._macro_controller, self._macro_record_button),
+                (self._macro_controller, self._macro_play_button),
+                (self._profile_controller, self._profile_button),
+                (self._trajectory_controller,
+                 self._trajectory_record_button)):
+            live_buttons[controller] = (live_buttons.get(controller, 0) |
+                                        (1 << button))
+        self._macro_live_buttons = live_buttons
+
+    def _start_macro_recording(self):
+        """Start recording a driver input macro."""
+        if self._macro_player.playing:
+            return
+        self._macro_recorder.start(self._user_interface)
+        if self._log_enabled:
+            self._log.debug("Macro recording started")
+
+    def _stop_macro_recording(self):
+        """Stop recording the driver input macro.
+
+        The macro can be played back at once; it is saved to its file the
+        next time the robot is disabled.
+        """
+        if not self._macro_recorder.recording:
+            return
+        recorded = self._macro_recorder.stop()
+        if recorded:
+            self._macro = recorded
+            self._macro_unsaved = True
+            if self._log_enabled:
+                self._log.debug("Macro recorded: %d frames",
+                                self._macro.get_frame_count())
+
+    def _play_macro(self):
+        """Start playing the driver input macro, or stop it if it is playing.
+        """
+        if self._macro_player.playing:
+            self._macro_player.stop()
+            if self._log_enabled:
+                self._log.debug("Macro playback stopped by the driver")
+        elif self._macro and not self._macro_recorder.recording:
+            self._macro_player.start(self._macro)
+
+    def _play_macro_frame(self, user_interface):
+        """Replace the controller snapshot with the current macro frame.
+
+        This is the playback function passed to UserInterface.update.  The
+        driver takes over, and playback stops, as soon as a stick on the
+        macro controller is moved past the abort threshold.
+
+        Args:
+            user_interface: the UserInterface holding the live snapshot.
+
+        """
+        for axis in (userinterface.JoystickAxis.LEFTX,
+                     userinterface.JoystickAxis.LEFTY,
+                     userinterface.JoystickAxis.RIGHTX,
+                     userinterface.JoystickAxis.RIGHTY):
+            value = user_interface.get_axis_value(self._macro_controller,
+                                                  axis)
+            if math.fabs(value) > self._macro_abort_threshold:
+                self._macro_player.stop()
+                if self._log_enabled:
+                    self._log.debug("Macro playback stopped by the driver")
+                return
+        self._macro_player.step(user_interface, self._macro_live_buttons)
+
+    def _start_trajectory_recording(self):
+        """Start recording a trajectory of the driver's driving."""
+        self._trajectory_recorder.start(self._drive_train)
+        if self._log_enabled:
+            self._log.debug("Trajectory recording started")
+
+    def _stop_trajectory_recording(self):
+        """Stop recording a trajectory.
+
+        The trajectory can be replayed at once; it is saved to its file the
+        next time the robot is disabled.
+        """
+        if (not self._trajectory_recorder or
+                not self._trajectory_recorder.recording):
+            return
+        recorded = self._trajectory_recorder.stop()
+        if recorded:
+            # Scripts that replay a trajectory recorded for the first time
+            # no longer have a compile error
+            if (self._autoscript_library and
+                    self._trajectory_file not in self._trajectories):
+                self._autoscript_library.invalidate()
+                self._autoscripts_stale = True
+            self._trajectories[self._trajectory_file] = recorded
+            self._trajectory_unsaved = True
+            if self._log_enabled:
+                self._log.debug("Trajectory recorded: %d frames, %.2fs",
+                                recorded.get_frame_count(),
+                                recorded.get_duration())
+
+    def _replay_trajectory(self, name):
+        """Replay a recorded trajectory (autoscript "replay_trajectory").
+
+        Args:
+            name: the filename of the trajectory.
+
+        Returns:
+            True when the trajectory has finished.
+
+        """
+        player = self._trajectory_player
+        if not player.playing:
+            recorded = self._trajectories.get(name)
+            if not recorded:
+                if self._log_enabled:
+                    self._log.warning("Trajectory %s is not available", name)
+                return True
+            player.start(recorded, self._drive_train)
+        return player.step(self._drive_train)
+
+    def _check_trajectory(self, name):
+        """Check the trajectory name of a "replay_trajectory" command.
+
+        Args:
+            name: the filename of the trajectory.
+
+        Returns:
+            An error message if the trajectory has not been recorded, or
+            None.
+
+        """
+        if name not in self._trajectories:
+            return "trajectory '%s' has not been recorded" % name
+        return None
+
+    def _stop_trajectory_replay(self):
+        """Stop replaying when an autoscript command is stopped."""
+        self._trajectory_player.stop()
+        self._stop_drive()
+
+    def _stop_macros(self):
+        """Stop any macro recording or playback."""
+        if self._macro_recorder and self._macro_recorder.recording:
+            self._stop_macro_recording()
+        if self._macro_player:
+            self._macro_player.stop()
+
+    def _set_driver_alternate(self, state):
+        """Set the alternate speed mode for driving.
+
+        Args:
+            state: True if the drive train should use alternate speed.
+
+        """
+        self._driver_alternate = state
 
     def _control_drive_train(self):
         """Manually control the drive train."""
@@ -233,6 +1107,7 @@ class MyRobot(wpilib.IterativeRobot):
             driver_right_x = self._user_interface.get_axis_value(
                     userinterface.UserControllers.DRIVER,
                     userinterface.JoystickAxis.RIGHTX)
+            self._drive_input = driver_left_y
             if driver_left_y != 0.0 or driver_right_x != 0.0:
                 self._drive_train.drive(driver_left_y, driver_right_x,
                                         self._driver_alternate)
@@ -279,14 +1154,6 @@ class MyRobot(wpilib.IterativeRobot):
             scoring_left_y = self._user_interface.get_axis_value(
                     userinterface.UserControllers.SCORING,
                     userinterface.JoystickAxis.LEFTY)
-            scoring_left_bumper = self._user_interface.get_button_state(
-                    userinterface.UserControllers.SCORING,
-                    userinterface.JoystickButtons.LEFTBUMPER)
-
-            if scoring_left_bumper != 0.0:
-                self._lift.ignore_encoder_limits(True)
-            else:
-                self._lift.ignore_encoder_limits(False)
 
             if scoring_left_y != 0.0:
                 self._lift.move_lift(scoring_left_y)
@@ -0,0 +1,160 @@
+"""This module defines the parameter schemas of the robot and its subsystems.
+
+The schemas are kept apart from the subsystem classes so the offline tools
+(autotiming and matchanalysis) can read the parameter files without wpilib.
+
+"""
+
+# Imports
+import parameters
+
+
+# Parameters read from the drivetrain section of the parameters file
+DRIVETRAIN_SCHEMA = parameters.Schema("drivetrain", [
+    parameters.Field("LEFT_MOTOR_CHANNEL", int, -1, -1),
+    parameters.Field("LEFT_MOTOR_INVERTED", bool, False),
+    parameters.Field("RIGHT_MOTOR_CHANNEL", int, -1, -1),
+    parameters.Field("RIGHT_MOTOR_INVERTED", bool, False),
+    parameters.Field("ACCELEROMETER_RANGE", int, -1, -1, 2),
+    parameters.Field("GYRO_CHANNEL", int, -1, -1),
+    parameters.Field("GYRO_SENSITIVITY", float, 0.007, 0.0),
+    parameters.Field("FORWARD_DIRECTION", float, 1.0, -1.0, 1.0, tunable=True),
+    parameters.Field("BACKWARD_DIRECTION", float, -1.0, -1.0, 1.0,
+                     tunable=True),
+    parameters.Field("LEFT_DIRECTION", float, -1.0, -1.0, 1.0, tunable=True),
+    parameters.Field("RIGHT_DIRECTION", float, 1.0, -1.0, 1.0, tunable=True),
+    parameters.Field("NORMAL_LINEAR_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("ALTERNATE_LINEAR_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("NORMAL_TURNING_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("ALTERNATE_TURNING_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("AUTO_FAR_LINEAR_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("AUTO_MEDIUM_LINEAR_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("AUTO_NEAR_LINEAR_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("AUTO_FAR_TURNING_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("AUTO_MEDIUM_TURNING_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("AUTO_NEAR_TURNING_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("DISTANCE_THRESHOLD", float, 0.5, 0.0, tunable=True),
+    parameters.Field("HEADING_THRESHOLD", float, 3.0, 0.0, tunable=True),
+    parameters.Field("TIME_THRESHOLD", float, 0.1, 0.0, tunable=True),
+    parameters.Field("AUTO_MEDIUM_TIME_THRESHOLD", float, 0.5, 0.0,
+                     tunable=True),
+    parameters.Field("AUTO_FAR_TIME_THRESHOLD", float, 1.0, 0.0, tunable=True),
+    parameters.Field("AUTO_MEDIUM_DISTANCE_THRESHOLD", float, 2.0, 0.0,
+                     tunable=True),
+    parameters.Field("AUTO_FAR_DISTANCE_THRESHOLD", float, 5.0, 0.0,
+                     tunable=True),
+    parameters.Field("AUTO_MEDIUM_HEADING_THRESHOLD", float, 15.0, 0.0,
+                     tunable=True),
+    parameters.Field("AUTO_FAR_HEADING_THRESHOLD", float, 25.0, 0.0,
+                     tunable=True),
+    parameters.Field("MAXIMUM_LINEAR_SPEED_CHANGE", float, 2.0, 0.0,
+                     tunable=True),
+    parameters.Field("MAXIMUM_TURN_SPEED_CHANGE", float, 2.0, 0.0,
+                     tunable=True),
+    parameters.Field("LINEAR_FILTER_CONSTANT", float, 0.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("TURN_FILTER_CONSTANT", float, 0.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("TRAJECTORY_HEADING_GAIN", float, 0.02, 0.0,
+                     tunable=True),
+    parameters.Field("TRAJECTORY_DISTANCE_GAIN", float, 0.5, 0.0,
+                     tunable=True),
+    parameters.Field("TRAJECTORY_MAXIMUM_CORRECTION", float, 0.3, 0.0, 1.0,
+                     tunable=True),
+])
+
+
+# Parameters read from the feeder section of the parameters file
+FEEDER_SCHEMA = parameters.Schema("feeder", [
+    parameters.Field("MOTOR_CHANNEL", int, -1, -1),
+    parameters.Field("TIME_THRESHOLD", float, 0.1, 0.0, tunable=True),
+    parameters.Field("OPEN_DIRECTION", float, 1.0, -1.0, 1.0, tunable=True),
+    parameters.Field("CLOSE_DIRECTION", float, -1.0, -1.0, 1.0, tunable=True),
+    parameters.Field("OPEN_SPEED_RATIO", float, 1.0, 0.0, 1.0, tunable=True),
+    parameters.Field("CLOSE_SPEED_RATIO", float, 1.0, 0.0, 1.0, tunable=True),
+])
+
+
+# Parameters read from the feeder_arm section of the parameters file
+FEEDER_ARM_SCHEMA = parameters.Schema("feeder_arm", [
+    parameters.Field("MOTOR_CHANNEL", int, -1, -1),
+    parameters.Field("TIME_THRESHOLD", float, 0.1, 0.0, tunable=True),
+    parameters.Field("CLOCKWISE_DIRECTION", float, 1.0, -1.0, 1.0,
+                     tunable=True),
+    parameters.Field("COUNTER_CLOCKWISE_DIRECTION", float, -1.0, -1.0, 1.0,
+                     tunable=True),
+    parameters.Field("CLOCKWISE_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("COUNTER_CLOCKWISE_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+])
+
+
+# Parameters read from the lift section of the parameters file
+LIFT_SCHEMA = parameters.Schema("lift", [
+    parameters.Field("LIFT_MOTOR_CHANNEL", int, -1, -1),
+    parameters.Field("ENCODER_A_CHANNEL", int, -1, -1),
+    parameters.Field("ENCODER_B_CHANNEL", int, -1, -1),
+    parameters.Field("ENCODER_REVERSE", bool, False),
+    parameters.Field("ENCODER_TYPE", int, 2, 0, 2),
+    parameters.Field("UP_DIRECTION", float, 0.1, -1.0, 1.0, tunable=True),
+    parameters.Field("DOWN_DIRECTION", float, 0.1, -1.0, 1.0, tunable=True),
+    parameters.Field("UP_SPEED_RATIO", float, 1.0, 0.0, 1.0, tunable=True),
+    parameters.Field("DOWN_SPEED_RATIO", float, 1.0, 0.0, 1.0, tunable=True),
+    parameters.Field("AUTO_FAR_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("AUTO_MEDIUM_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("AUTO_NEAR_SPEED_RATIO", float, 1.0, 0.0, 1.0,
+                     tunable=True),
+    parameters.Field("ENCODER_THRESHOLD", float, 10.0, 0.0, tunable=True),
+    parameters.Field("ENCODER_MAX_LIMIT", float, 10000.0, tunable=True),
+    parameters.Field("ENCODER_MIN_LIMIT", float, 0.0, tunable=True),
+    parameters.Field("TIME_THRESHOLD", float, 0.1, 0.0, tunable=True),
+    parameters.Field("AUTO_MEDIUM_TIME_THRESHOLD", float, 0.5, 0.0,
+                     tunable=True),
+    parameters.Field("AUTO_FAR_TIME_THRESHOLD", float, 1.0, 0.0, tunable=True),
+    parameters.Field("AUTO_MEDIUM_ENCODER_THRESHOLD", float, 50.0, 0.0,
+                     tunable=True),
+    parameters.Field("AUTO_FAR_ENCODER_THRESHOLD", float, 100.0, 0.0,
+                     tunable=True),
+])
+
+
+# Parameters read from the robot section of the parameters file.  The
+# controllers are numbered as in userinterface.UserControllers (0 is the
+# driver, 1 scoring) and the buttons as in userinterface.JoystickButtons.
+ROBOT_SCHEMA = parameters.Schema("robot", [
+    parameters.Field("MACRO_CONTROLLER", int, 0, 0, 5),
+    parameters.Field("MACRO_RECORD_BUTTON", int, 9, 1, 32),
+    parameters.Field("MACRO_PLAY_BUTTON", int, 10, 1, 32),
+    parameters.Field("MACRO_FILE", str, "/home/lvuser/macro/macro.mac"),
+    parameters.Field("MACRO_MAX_FRAMES", int, 1500, 1),
+    parameters.Field("MACRO_ABORT_THRESHOLD", float, 0.25, 0.0, 1.0),
+    parameters.Field("PROFILE", str, parameters.DEFAULT_PROFILE),
+    parameters.Field("PROFILE_CONTROLLER", int, 1, 0, 5),
+    parameters.Field("PROFILE_BUTTON", int, 9, 1, 32),
+    parameters.Field("TRAJECTORY_CONTROLLER", int, 0, 0, 5),
+    parameters.Field("TRAJECTORY_RECORD_BUTTON", int, 4, 1, 32),
+    parameters.Field("TRAJECTORY_PATH", str, "/home/lvuser/trajectory"),
+    parameters.Field("TRAJECTORY_FILE", str, "recorded.trj"),
+    parameters.Field("TRAJECTORY_MAX_FRAMES", int, 750, 1),
+    parameters.Field("AUTOSCRIPT_PATH", str, "/home/lvuser/autoscript"),
+    parameters.Field("AUTOSCRIPT", str, "drive_only.as"),
+    parameters.Field("TELEMETRY_FILE", str,
+                     "/home/lvuser/log/telemetry.ring"),
+    parameters.Field("TELEMETRY_RECORDS", int, 15000, 1),
+    parameters.Field("DASHBOARD_PERIOD", float, 0.1, 0.0),
+    parameters.Field("DASHBOARD_REFRESH", float, 1.0, 0.0),
+    parameters.Field("DASHBOARD_SERVER", str, ""),
+])
@@ -1,18 +1,127 @@
 """This module provides a stopwatch timing class."""
 
 # Imports
+import functools
+import math
 import time
 
 
+class RunningStatistics(object):
+    """Keeps running statistics for a series of durations.
+
+    The count, mean, minimum and maximum are updated incrementally.
+    Percentiles are estimated from a fixed set of logarithmic buckets, so the
+    memory used does not grow with the number of samples.  Each bucket spans
+    roughly 12% of its lower edge, which bounds the percentile error.
+
+    Attributes:
+        count: the number of samples recorded.
+        mean: the mean of the samples in seconds.
+        minimum: the smallest sample in seconds.
+        maximum: the largest sample in seconds.
+
+    """
+    # Bucket layout: 20 buckets per decade from 1 microsecond to 100 seconds
+    BUCKETS_PER_DECADE = 20
+    SMALLEST_BUCKET = 1e-6
+    DECADES = 8
+
+    # Public member variables
+    count = 0
+    mean = None
+    minimum = None
+    maximum = None
+
+    # Private member variables
+    _buckets = None
+
+    def __init__(self):
+        """Create and initialize a RunningStatistics object."""
+        self.reset()
+
+    def reset(self):
+        """Clear all recorded samples."""
+        self.count = 0
+        self.mean = None
+        self.minimum = None
+        self.maximum = None
+        self._buckets = [0] * (self.BUCKETS_PER_DECADE * self.DECADES)
+
+    def add(self, value):
+        """Record a sample.
+
+        Args:
+            value: the duration in seconds.
+
+        """
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+            self.minimum = value
+            self.maximum = value
+        else:
+            self.mean += (value - self.mean) / self.count
+            if value < self.minimum:
+                self.minimum = value
+            if value > self.maximum:
+                self.maximum = value
+        self._buckets[self._bucket_index(value)] += 1
+
+    def percentile(self, percent):
+        """Return an estimate of a percentile of the recorded samples.
+
+        Args:
+            percent: the percentile to estimate, from 0 to 100.
+
+        Returns:
+            The estimated duration in seconds, or None if there are no
+            samples.
+
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(math.ceil(self.count * percent / 100.0)))
+        total = 0
+        for index, bucket_count in enumerate(self._buckets):
+            total += bucket_count
+            if total >= rank:
+                upper = self.SMALLEST_BUCKET * 10 ** (
+                        (index + 1.0) / self.BUCKETS_PER_DECADE)
+                return max(self.minimum, min(upper, self.maximum))
+        return self.maximum
+
+    def _bucket_index(self, value):
+        """Return the index of the bucket a sample belongs to."""
+        if value <= self.SMALLEST_BUCKET:
+            return 0
+        index = int(math.log10(value / self.SMALLEST_BUCKET) *
+                    self.BUCKETS_PER_DECADE)
+        return min(index, len(self._buckets) - 1)
+
+
 class Stopwatch(object):
     """Provides stopwatch timing functionality.
 
     This class provides simple time keeping functionality like a stopwatch.
+    Laps are recorded into running statistics, and a Stopwatch can also be
+    used as a context manager or as a decorator to time a block or function:
+
+        with timer:
+            do_work()
+
+        @timer
+        def do_work():
+            ...
+
+    Blocks may be nested or reentered (for example by a recursive timed
+    function); each block records its own duration, and the stopwatch
+    stops when the outermost block ends.
 
     """
     # Public member variables
 
     # Private member objects
+    _statistics = None
 
     # Private member variables
     _running = False
@@ -20,6 +129,8 @@ class Stopwatch(object):
     _end = None
     _secs = None
     _msecs = None
+    _lap_start = None
+    _block_starts = None
 
     def __init__(self):
         """Create and initialize a Stopwatch."""
@@ -28,10 +139,48 @@ class Stopwatch(object):
         self._secs = None
         self._msecs = None
         self._running = False
+        self._lap_start = None
+        self._block_starts = []
+        self._statistics = RunningStatistics()
+
+    def __enter__(self):
+        """Start timing a block."""
+        if not self._block_starts:
+            self.start()
+            self._block_starts.append(self._start)
+        else:
+            self._block_starts.append(time.time())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Record the block duration as a lap and stop timing."""
+        now = time.time()
+        self._statistics.add(now - self._block_starts.pop())
+        if not self._block_starts:
+            self._lap_start = now
+            self.stop()
+        return False
+
+    def __call__(self, function):
+        """Decorate a function so each call is recorded as a lap.
+
+        Args:
+            function: the function to time.
+
+        Returns:
+            The wrapped function.
+
+        """
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            with self:
+                return function(*args, **kwargs)
+        return timed
 
     def start(self):
         """Mark current time as the starting time."""
         self._start = time.time()
+        self._lap_start = self._start
         self._running = True
         self._end = None
         self._secs = None
@@ -45,6 +194,7 @@ class Stopwatch(object):
 
         """
         self._start = time.time()
+        self._lap_start = self._start
         self._end = None
         self._secs = None
         self._msecs = None
@@ -91,3 +241,35 @@ class Stopwatch(object):
             self._msecs = secs * 1000
         return self._msecs
 
+    def lap(self):
+        """Record a lap and start the next one.
+
+        The time since the previous lap (or since the start) is added to the
+        lap statistics.  If the stopwatch is not running, do nothing.
+
+        Returns:
+            The lap time in seconds, or None if the stopwatch is not running.
+
+        """
+        if not self._running:
+            return None
+        now = time.time()
+        lap_time = now - self._lap_start
+        self._lap_start = now
+        self._statistics.add(lap_time)
+        return lap_time
+
+    def split(self):
+        """Return the time since the start without ending the current lap.
+
+        Returns:
+            The split time in seconds, or None if the stopwatch is not running.
+
+        """
+        if not self._running:
+            return None
+        return time.time() - self._start
+
+    def get_statistics(self):
+        """Return the RunningStatistics of the recorded laps."""
+        return self._statistics
@@ -0,0 +1,262 @@
+"""This module records robot telemetry in a memory-mapped ring file.
+
+Every robot loop iteration writes one fixed-layout binary record (sensor
+readings, driver input, motor outputs, control setpoints, the autoscript
+line being run and the robot mode) into a file of bounded size that
+is mapped into memory, so recording is a struct pack into memory and the
+operating system writes the pages to flash in the background.  When the ring
+is full the oldest records are overwritten, so the file always holds the
+last few minutes of full-rate data.  The ring is continued after a restart,
+so the data from before a brown out or crash is kept.
+
+read_ring() returns the records in the order they were written, and
+read_ring_arrays() returns them as NumPy arrays for analysis on a laptop.
+
+"""
+
+# Imports
+import mmap
+import os
+import struct
+
+
+# File header: magic, version, record size, capacity and number of records
+# written
+_HEADER = struct.Struct('<4sHHIQ')
+_MAGIC = b'TLMR'
+_VERSION = 2
+_NAN = float('nan')
+
+# Record: tick, timestamp, gyro, acceleration, distance, encoder, left
+# drive output, right drive output, lift output, driver linear input, drive
+# linear output, heading setpoint, lift setpoint, autoscript line and robot
+# mode
+_RECORD = struct.Struct('<IdfffifffffffHb')
+
+# The record fields and their NumPy types, in record order
+FIELDS = (
+    ('tick', '<u4'),
+    ('timestamp', '<f8'),
+    ('gyro', '<f4'),
+    ('acceleration', '<f4'),
+    ('distance', '<f4'),
+    ('encoder', '<i4'),
+    ('left', '<f4'),
+    ('right', '<f4'),
+    ('lift', '<f4'),
+    ('drive_input', '<f4'),
+    ('drive_output', '<f4'),
+    ('heading_setpoint', '<f4'),
+    ('lift_setpoint', '<f4'),
+    ('line', '<u2'),
+    ('mode', 'i1'),
+)
+
+
+class TelemetryRing(object):
+    """Writes telemetry records into a memory-mapped ring file.
+
+    Attributes:
+        opened: True if the ring file is mapped and records can be written.
+
+    """
+    # Public member variables
+    opened = False
+
+    # Private member objects
+    _file = None
+    _map = None
+
+    # Private member variables
+    _capacity = 0
+    _count = 0
+
+    def __init__(self, path="/home/lvuser/log/telemetry.ring",
+                 capacity=15000):
+        """Create and initialize a TelemetryRing.
+
+        An existing ring with the same layout is continued, otherwise the
+        file is created.
+
+        Args:
+            path: the path and filename of the ring file.
+            capacity: the number of records kept (15000 is 5 minutes at
+                50Hz).
+
+        """
+        self.opened = False
+        self._file = None
+        self._map = None
+        self._capacity = capacity
+        self._count = 0
+        if capacity > 0:
+            self.opened = self._open(path)
+
+    def dispose(self):
+        """Dispose of a TelemetryRing object."""
+        self.close()
+
+    def _open(self, path):
+        """Map the ring file, creating it if needed.
+
+        Returns:
+            True if the file is mapped.
+
+        """
+        size = _HEADER.size + self._capacity * _RECORD.size
+        try:
+            if os.path.exists(path):
+                self._file = open(path, 'r+b')
+            else:
+                self._file = open(path, 'w+b')
+            header = self._file.read(_HEADER.size)
+            count = 0
+            if len(header) == _HEADER.size:
+                (magic, version, record_size, capacity,
+                 count) = _HEADER.unpack(header)
+                if (magic != _MAGIC or version != _VERSION or
+                        record_size != _RECORD.size or
+                        capacity != self._capacity):
+                    count = 0
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        except (OSError, IOError, ValueError):
+            self.close()
+            return False
+        self._count = count
+        _HEADER.pack_into(self._map, 0, _MAGIC, _VERSION, _RECORD.size,
+                          self._capacity, count)
+        return True
+
+    def close(self):
+        """Write the ring to the file and unmap it."""
+        if self._map is not None:
+            try:
+                self._map.flush()
+                self._map.close()
+            except (OSError, IOError, ValueError):
+                pass
+        if self._file is not None:
+            try:
+                self._file.close()
+            except (OSError, IOError):
+                pass
+        self._map = None
+        self._file = None
+        self.opened = False
+
+    def get_count(self):
+        """Return the number of records written since the ring was made."""
+        return self._count
+
+    def write(self, timestamp, gyro, acceleration, distance, encoder, left,
+              right, lift, drive_input, drive_output, heading_setpoint,
+              lift_setpoint, line, mode):
+        """Write a record, overwriting the oldest if the ring is full.
+
+        Setpoints that are None are written as NaN.
+
+        Args:
+            timestamp: the time in seconds.
+            gyro: the heading in degrees.
+            acceleration: the forward acceleration.
+            distance: the distance traveled in meters.
+            encoder: the lift encoder count.
+            left: the left drive motor output.
+            right: the right drive motor output.
+            lift: the lift motor output.
+            drive_input: the driver linear speed input.
+            drive_output: the drive train linear speed output.
+            heading_setpoint: the heading being turned to, or None.
+            lift_setpoint: the lift position being moved to, or None.
+            line: the autoscript line being run, 0 if none.
+            mode: the common.ProgramState of the robot.
+
+        """
+        if not self.opened:
+            return
+        if heading_setpoint is None:
+            heading_setpoint = _NAN
+        if lift_setpoint is None:
+            lift_setpoint = _NAN
+        count = self._count
+        offset = _HEADER.size + (count % self._capacity) * _RECORD.size
+        _RECORD.pack_into(self._map, offset, count & 0xFFFFFFFF, timestamp,
+                          gyro, acceleration, distance, int(encoder), left,
+                          right, lift, drive_input, drive_output,
+                          heading_setpoint, lift_setpoint, line, mode)
+        # The count is updated after the record so a reader never sees a
+        # partly written record as valid
+        self._count = count + 1
+        struct.pack_into('<Q', self._map, _HEADER.size - 8, self._count)
+
+
+def _read(path):
+    """Return the capacity, record count and data of a ring file."""
+    with open(path, 'rb') as ring_file:
+        data = ring_file.read()
+    if len(data) < _HEADER.size:
+        raise ValueError("%s is not a telemetry ring" % path)
+    magic, version, record_size, capacity, count = _HEADER.unpack_from(data)
+    if (magic != _MAGIC or version != _VERSION or
+            record_size != _RECORD.size or
+            len(data) < _HEADER.size + capacity * record_size):
+        raise ValueError("%s is not a telemetry ring" % path)
+    return capacity, count, data
+
+
+def _order(capacity, count):
+    """Return the ring slots of the records from oldest to newest."""
+    if count <= capacity:
+        return list(range(count))
+    start = count % capacity
+    return list(range(start, capacity)) + list(range(start))
+
+
+def read_ring(path):
+    """Read the records of a ring file in the order they were written.
+
+    Args:
+        path: the path and filename of the ring file.
+
+    Returns:
+        A List of record tuples with the values in FIELDS order.
+
+    Raises:
+        ValueError: if the file is not a telemetry ring.
+        OSError: if the file could not be read.
+
+    """
+    capacity, count, data = _read(path)
+    return [_RECORD.unpack_from(data, _HEADER.size + slot * _RECORD.size)
+            for slot in _order(capacity, count)]
+
+
+def read_ring_arrays(path):
+    """Read the records of a ring file into NumPy arrays.
+
+    NumPy is only needed here, so the robot does not need it installed.
+
+    Args:
+        path: the path and filename of the ring file.
+
+    Returns:
+        A dictionary of {field name: NumPy array} with the records in the
+        order they were written.
+
+    Raises:
+        ValueError: if the file is not a telemetry ring.
+        OSError: if the file could not be read.
+
+    """
+    import numpy
+
+    capacity, count, data = _read(path)
+    records = numpy.frombuffer(data, numpy.dtype(list(FIELDS)),
+                               count=capacity, offset=_HEADER.size)
+    if count > capacity:
+        start = count % capacity
+        records = numpy.concatenate((records[start:], records[:start]))
+    else:
+        records = records[:count]
+    return dict((name, records[name].copy()) for name, dtype in FIELDS)
@@ -0,0 +1,208 @@
+"""This module provides a hierarchical timer wheel for scheduled callbacks."""
+
+# Imports
+import math
+import stopwatch
+
+
+class Timer(object):
+    """A callback scheduled on a TimerWheel.
+
+    Attributes:
+        expiry: the wheel tick on which the callback fires.
+        callback: the function to call when the timer expires.
+        args: the List of arguments passed to the callback.
+        cancelled: True if the timer was cancelled before it fired.
+        fired: True if the callback has been called.
+
+    """
+    __slots__ = ('expiry', 'callback', 'args', 'cancelled', 'fired')
+
+    def __init__(self, expiry, callback, args):
+        """Create and initialize a Timer.
+
+        Args:
+            expiry: the wheel tick on which the callback fires.
+            callback: the function to call when the timer expires.
+            args: the List of arguments passed to the callback.
+
+        """
+        self.expiry = expiry
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.fired = False
+
+    def cancel(self):
+        """Prevent the callback from firing.
+
+        Cancelled timers stay in their slot and are discarded when the wheel
+        reaches them, so cancelling is constant time.
+
+        """
+        self.cancelled = True
+
+    def is_pending(self):
+        """Return True if the timer has neither fired nor been cancelled."""
+        return not self.cancelled and not self.fired
+
+
+class TimerWheel(object):
+    """Schedules callbacks to run after a delay.
+
+    Time is divided into ticks of a fixed resolution.  The wheel has several
+    levels of slots; level 0 holds timers due within the next revolution and
+    each higher level covers a revolution of the level below it.  Advancing
+    one tick only visits the current level 0 slot, and timers on higher
+    levels are cascaded down once per revolution, so the cost of a tick does
+    not depend on how many timers are scheduled.
+
+    """
+    # Public member variables
+
+    # Private member objects
+    _clock = None
+    _wheels = None
+
+    # Private member variables
+    _resolution = 0.02
+    _slots = 64
+    _levels = 4
+    _current_tick = 0
+    _pending = 0
+
+    def __init__(self, resolution=0.02, slots=64, levels=4):
+        """Create and initialize a TimerWheel.
+
+        Args:
+            resolution: the length of one tick in seconds.
+            slots: the number of slots on each level.
+            levels: the number of levels in the hierarchy.
+
+        """
+        self._resolution = resolution
+        self._slots = slots
+        self._levels = levels
+        self._current_tick = 0
+        self._pending = 0
+        self._wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self._clock = stopwatch.Stopwatch()
+        self._clock.start()
+
+    def dispose(self):
+        """Dispose of a TimerWheel object."""
+        self._clock = None
+        self._wheels = None
+
+    def schedule(self, delay, callback, *args):
+        """Schedule a callback to run after a delay.
+
+        Args:
+            delay: the time in seconds to wait before calling the callback.
+            callback: the function to call.
+            args: any arguments to pass to the callback.
+
+        Returns:
+            The Timer object, which can be used to cancel the callback.
+
+        """
+        # The small epsilon keeps float rounding from adding a whole tick
+        ticks = max(1, int(math.ceil(delay / self._resolution - 1e-9)))
+        timer = Timer(self._current_tick + ticks, callback, args)
+        self._insert(timer)
+        self._pending += 1
+        return timer
+
+    def get_remaining(self, timer):
+        """Return the time left before a timer fires.
+
+        The time is counted in whole ticks from the last tick(), so it is
+        only as precise as the wheel resolution.
+
+        Args:
+            timer: a Timer returned by schedule().
+
+        Returns:
+            The time in seconds, or 0.0 once the timer has fired or been
+            cancelled.
+
+        """
+        if not timer.is_pending():
+            return 0.0
+        return max(timer.expiry - self._current_tick, 0) * self._resolution
+
+    def pending_count(self):
+        """Return the number of timers that have not fired yet.
+
+        Cancelled timers are included until the wheel reaches their slot.
+
+        """
+        return self._pending
+
+    def tick(self):
+        """Advance the wheel to the current time and fire any due callbacks.
+
+        This is intended to be called once per robot loop iteration.  If the
+        loop was delayed, the wheel catches up one tick at a time so that
+        callbacks still fire in order.
+
+        """
+        if not self._clock:
+            return
+        elapsed = self._clock.elapsed_time_in_secs()
+        if elapsed is None:
+            return
+        target_tick = int(elapsed / self._resolution)
+        while self._current_tick < target_tick:
+            self._advance()
+
+    def _insert(self, timer):
+        """Place a timer in the slot that matches its expiry."""
+        delta = timer.expiry - self._current_tick
+        span = self._slots
+        level = 0
+        while delta >= span and level < self._levels - 1:
+            span *= self._slots
+            level += 1
+        slot = (timer.expiry // (span // self._slots)) % self._slots
+        self._wheels[level][slot].append(timer)
+
+    def _cascade(self, level):
+        """Move the timers in the current slot of a level down a level."""
+        slot = ((self._current_tick // (self._slots ** level)) %
+                self._slots)
+        timers = self._wheels[level][slot]
+        self._wheels[level][slot] = []
+        for timer in timers:
+            if timer.cancelled:
+                self._pending -= 1
+            else:
+                self._insert(timer)
+
+    def _advance(self):
+        """Advance the wheel by one tick."""
+        self._current_tick += 1
+
+        # Cascade higher levels whenever the level below completes a
+        # revolution
+        level = 1
+        while (level < self._levels and
+               self._current_tick % (self._slots ** level) == 0):
+            level += 1
+        for cascade_level in range(level - 1, 0, -1):
+            self._cascade(cascade_level)
+
+        slot = self._current_tick % self._slots
+        timers = self._wheels[0][slot]
+        if not timers:
+            return
+        self._wheels[0][slot] = []
+        for timer in timers:
+            if timer.expiry > self._current_tick:
+                # Timer was too far out for the top level; keep it moving
+                self._insert(timer)
+                continue
+            self._pending -= 1
+            if not timer.cancelled:
+                timer.fired = True
+                timer.callback(*timer.args)
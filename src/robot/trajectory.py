@@ -0,0 +1,331 @@
+"""This module records and replays drive train trajectories.
+
+A trajectory is the drive train output (linear and turn speed), the distance
+traveled and the gyro heading at every robot loop iteration while a driver
+drives.  Replaying it drives the same outputs at the same times, correcting
+the turn speed towards the recorded heading and the linear speed towards the
+recorded distance, so small differences in the starting conditions, battery
+voltage or floor do not add up over the run.
+
+Trajectories are stored as packed arrays compressed with zlib, so a 15
+second run at 50Hz is a few kilobytes.
+
+"""
+
+# Imports
+import array
+import glob
+import os
+import struct
+import sys
+import zlib
+import stopwatch
+
+
+# File header: magic, version and frame count
+_HEADER = struct.Struct('<4sHI')
+_MAGIC = b'TRAJ'
+_VERSION = 1
+
+
+class Trajectory(object):
+    """A recorded sequence of drive train outputs and sensor readings.
+
+    Attributes:
+        timestamps: the array of frame times in seconds from the start.
+        linear: the array of linear speed outputs.
+        turn: the array of turn speed outputs.
+        distance: the array of distances traveled since the start.
+        heading: the array of headings in degrees relative to the start.
+
+    """
+    # Public member variables
+    timestamps = None
+    linear = None
+    turn = None
+    distance = None
+    heading = None
+
+    def __init__(self):
+        """Create and initialize an empty Trajectory."""
+        self.timestamps = array.array('d')
+        self.linear = array.array('d')
+        self.turn = array.array('d')
+        self.distance = array.array('d')
+        self.heading = array.array('d')
+
+    def _get_arrays(self):
+        """Return the arrays in the order they are stored."""
+        return [self.timestamps, self.linear, self.turn, self.distance,
+                self.heading]
+
+    def get_frame_count(self):
+        """Return the number of frames in the trajectory."""
+        return len(self.timestamps)
+
+    def get_duration(self):
+        """Return the length of the trajectory in seconds."""
+        if not self.timestamps:
+            return 0.0
+        return self.timestamps[-1]
+
+    def save(self, path):
+        """Write the trajectory to a file.
+
+        Args:
+            path: the path and filename to write.
+
+        Returns:
+            True if the file was written.
+
+        """
+        arrays = self._get_arrays()
+        if sys.byteorder != 'little':
+            arrays = [array.array(a.typecode, a) for a in arrays]
+            for a in arrays:
+                a.byteswap()
+        data = zlib.compress(b''.join(a.tobytes() for a in arrays))
+        try:
+            with open(path, 'wb') as trajectory_file:
+                trajectory_file.write(_HEADER.pack(_MAGIC, _VERSION,
+                                                   len(self.timestamps)))
+                trajectory_file.write(data)
+        except (OSError, IOError):
+            return False
+        return True
+
+    def load(self, path):
+        """Read the trajectory from a file.
+
+        Args:
+            path: the path and filename to read.
+
+        Returns:
+            True if the file was read and is a valid trajectory.
+
+        """
+        try:
+            with open(path, 'rb') as trajectory_file:
+                header = trajectory_file.read(_HEADER.size)
+                data = trajectory_file.read()
+        except (OSError, IOError):
+            return False
+        if len(header) != _HEADER.size:
+            return False
+        magic, version, frame_count = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            return False
+        try:
+            data = zlib.decompress(data)
+        except zlib.error:
+            return False
+
+        arrays = [array.array('d') for a in self._get_arrays()]
+        size = frame_count * arrays[0].itemsize
+        if len(data) != size * len(arrays):
+            return False
+        for index, a in enumerate(arrays):
+            a.frombytes(data[index * size:(index + 1) * size])
+            if sys.byteorder != 'little':
+                a.byteswap()
+        (self.timestamps, self.linear, self.turn, self.distance,
+         self.heading) = arrays
+        return True
+
+
+def load_trajectories(directory, pattern="*.trj"):
+    """Read every trajectory file in a directory.
+
+    Args:
+        directory: the directory containing the trajectory files.
+        pattern: the filename pattern of the trajectory files.
+
+    Returns:
+        A dictionary of {filename: Trajectory} of the valid files.
+
+    """
+    trajectories = {}
+    for path in glob.glob(os.path.join(directory, pattern)):
+        trajectory = Trajectory()
+        if trajectory.load(path):
+            trajectories[os.path.basename(path)] = trajectory
+    return trajectories
+
+
+class TrajectoryRecorder(object):
+    """Records the drive train outputs and sensors into a Trajectory.
+
+    Attributes:
+        recording: True while frames are being recorded.
+
+    """
+    # Public member variables
+    recording = False
+
+    # Private member objects
+    _trajectory = None
+    _timer = None
+
+    # Private member variables
+    _max_frames = 0
+    _start_distance = 0.0
+    _start_heading = 0.0
+
+    def __init__(self, max_frames=750):
+        """Create and initialize a TrajectoryRecorder.
+
+        Args:
+            max_frames: the maximum number of frames to record (750 is 15
+                seconds at 50Hz).
+
+        """
+        self.recording = False
+        self._trajectory = None
+        self._timer = stopwatch.Stopwatch()
+        self._max_frames = max_frames
+        self._start_distance = 0.0
+        self._start_heading = 0.0
+
+    def start(self, drive_train):
+        """Start recording a new trajectory.
+
+        Args:
+            drive_train: the DriveTrain that will be recorded.
+
+        """
+        self._trajectory = Trajectory()
+        self._start_distance = drive_train.get_distance_traveled()
+        self._start_heading = drive_train.get_heading()
+        self._timer.start()
+        self.recording = True
+
+    def record(self, drive_train):
+        """Record the drive train output and sensors as a frame.
+
+        This should be called after the drive train has been driven for the
+        current loop iteration.
+
+        Args:
+            drive_train: the DriveTrain to record.
+
+        """
+        if not self.recording:
+            return
+        trajectory = self._trajectory
+        if trajectory.get_frame_count() >= self._max_frames:
+            return
+        linear, turn = drive_train.get_output()
+        trajectory.timestamps.append(self._timer.elapsed_time_in_secs())
+        trajectory.linear.append(linear)
+        trajectory.turn.append(turn)
+        trajectory.distance.append(drive_train.get_distance_traveled() -
+                                   self._start_distance)
+        trajectory.heading.append(drive_train.get_heading() -
+                                  self._start_heading)
+
+    def stop(self):
+        """Stop recording.
+
+        Returns:
+            The recorded Trajectory, or None if nothing was recorded.
+
+        """
+        trajectory = None
+        if self.recording and self._trajectory.get_frame_count():
+            trajectory = self._trajectory
+        self.recording = False
+        self._trajectory = None
+        self._timer.stop()
+        return trajectory
+
+
+class TrajectoryPlayer(object):
+    """Replays a Trajectory through a DriveTrain.
+
+    Attributes:
+        playing: True while a trajectory is being played.
+
+    """
+    # Public member variables
+    playing = False
+
+    # Private member objects
+    _trajectory = None
+    _timer = None
+
+    # Private member variables
+    _frame = 0
+    _start_distance = 0.0
+    _start_heading = 0.0
+
+    def __init__(self):
+        """Create and initialize a TrajectoryPlayer."""
+        self.playing = False
+        self._trajectory = None
+        self._timer = stopwatch.Stopwatch()
+        self._frame = 0
+        self._start_distance = 0.0
+        self._start_heading = 0.0
+
+    def start(self, trajectory, drive_train):
+        """Start playing a trajectory from the beginning.
+
+        Recorded distances and headings are relative, so the trajectory is
+        replayed from wherever the robot is now.
+
+        Args:
+            trajectory: the Trajectory to play.
+            drive_train: the DriveTrain that will be driven.
+
+        """
+        if not trajectory or not trajectory.get_frame_count():
+            return
+        self._trajectory = trajectory
+        self._frame = 0
+        self._start_distance = drive_train.get_distance_traveled()
+        self._start_heading = drive_train.get_heading()
+        self._timer.start()
+        self.playing = True
+
+    def stop(self):
+        """Stop playing."""
+        self.playing = False
+        self._timer.stop()
+
+    def step(self, drive_train):
+        """Drive the output of the current frame.
+
+        The frame is chosen by the time since playback started, so the
+        trajectory runs at the recorded pace regardless of loop jitter.
+
+        Args:
+            drive_train: the DriveTrain to drive.
+
+        Returns:
+            True when the trajectory has finished.
+
+        """
+        if not self.playing:
+            return True
+
+        elapsed = self._timer.elapsed_time_in_secs()
+        trajectory = self._trajectory
+        timestamps = trajectory.timestamps
+        frame_count = len(timestamps)
+        while (self._frame + 1 < frame_count and
+               timestamps[self._frame + 1] <= elapsed):
+            self._frame += 1
+
+        if self._frame + 1 >= frame_count and elapsed >= timestamps[-1]:
+            drive_train.drive_heading(0.0, 0.0, None, None)
+            self.stop()
+            return True
+
+        frame = self._frame
+        drive_train.drive_heading(trajectory.linear[frame],
+                                  trajectory.turn[frame],
+                                  self._start_heading +
+                                  trajectory.heading[frame],
+                                  self._start_distance +
+                                  trajectory.distance[frame])
+        return False
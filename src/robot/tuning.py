@@ -0,0 +1,191 @@
+"""This module publishes tuning values to the SmartDashboard.
+
+Every tunable parameter of a subsystem is published as a number under
+Tuning/<section>/<PARAMETER>.  Edits made on the dashboard are checked once
+per robot loop iteration, validated against the subsystem schema and applied
+by swapping in a new config object, so a change always takes effect at the
+start of an iteration.  Edited values are only written back to the parameter
+files when flush() is called, which the robot does while disabled so flash is
+never written during a match.  Edits are saved to the section of the profile
+that was in use when they were made.
+
+"""
+
+# Imports
+import wpilib
+import parameters
+
+
+class TunedSubsystem(object):
+    """A subsystem whose tunable parameters are published.
+
+    Attributes:
+        subsystem: the subsystem object.
+        schema: the parameters.Schema of the subsystem.
+        path: the parameters file of the subsystem.
+        entries: the List of (dashboard key, Field) tuples.
+        published: a dictionary of {dashboard key: last published value}.
+        unsaved: a dictionary of {section: {parameter: value}} of edited
+            values that have not been written to the parameters file.
+
+    """
+    __slots__ = ('subsystem', 'schema', 'path', 'entries', 'published',
+                 'unsaved')
+
+    def __init__(self, subsystem, path, prefix):
+        """Create and initialize a TunedSubsystem.
+
+        Args:
+            subsystem: the subsystem object, which must provide get_schema(),
+                get_config(), set_config() and get_profile().
+            path: the parameters file of the subsystem.
+            prefix: the dashboard key prefix.
+
+        """
+        self.subsystem = subsystem
+        self.schema = subsystem.get_schema()
+        self.path = path
+        self.entries = [("%s/%s/%s" % (prefix, self.schema.section,
+                                       field.name), field)
+                        for field in self.schema.fields if field.tunable]
+        self.published = {}
+        self.unsaved = {}
+
+
+class ParameterTuner(object):
+    """Publishes tunable parameters and applies edits from the dashboard."""
+
+    # Private member objects
+    _log = None
+    _subsystems = None
+
+    # Private member variables
+    _prefix = "Tuning"
+
+    def __init__(self, log=None, prefix="Tuning"):
+        """Create and initialize a ParameterTuner.
+
+        Args:
+            log: the logger used to report rejected values, or None.
+            prefix: the dashboard key prefix.
+
+        """
+        self._log = log
+        self._prefix = prefix
+        self._subsystems = []
+
+    def dispose(self):
+        """Dispose of a ParameterTuner object."""
+        self._log = None
+        self._subsystems = None
+
+    def add(self, subsystem, path):
+        """Publish the tunable parameters of a subsystem.
+
+        Args:
+            subsystem: the subsystem object, which must provide get_schema(),
+                get_config(), set_config() and get_profile().
+            path: the parameters file the subsystem was loaded from.
+
+        """
+        if not subsystem:
+            return
+        tuned = TunedSubsystem(subsystem, path, self._prefix)
+        self._subsystems.append(tuned)
+        self._publish(tuned)
+
+    def publish(self):
+        """Publish the current values of every subsystem.
+
+        This is used after the parameter files have been reloaded so the
+        dashboard shows the values in use.
+
+        """
+        for tuned in self._subsystems:
+            self._publish(tuned)
+
+    def _publish(self, tuned):
+        """Publish the current values of one subsystem."""
+        config = tuned.subsystem.get_config()
+        for key, field in tuned.entries:
+            value = getattr(config, field.attribute)
+            tuned.published[key] = value
+            wpilib.SmartDashboard.putNumber(key, value)
+
+    def update(self):
+        """Apply any values that were edited on the dashboard.
+
+        Invalid values are logged and the dashboard is reset to the value in
+        use.  All the edits to a subsystem are applied together with a
+        single config swap.
+
+        Returns:
+            The number of values that were changed.
+
+        """
+        changed = 0
+        for tuned in self._subsystems:
+            changes = None
+            unsaved = None
+            for key, field in tuned.entries:
+                published = tuned.published[key]
+                value = wpilib.SmartDashboard.getNumber(key, published)
+                if value == published:
+                    continue
+                value, error = field.convert(value)
+                if error:
+                    if self._log:
+                        self._log.warning("Tuning %s", error)
+                    wpilib.SmartDashboard.putNumber(key, published)
+                    continue
+                tuned.published[key] = value
+                if changes is None:
+                    changes = {}
+                    unsaved = tuned.unsaved.setdefault(
+                                        self._get_section(tuned), {})
+                changes[field.attribute] = value
+                unsaved[field.name] = value
+
+            if changes:
+                subsystem = tuned.subsystem
+                subsystem.set_config(tuned.schema.copy(subsystem.get_config(),
+                                                       changes))
+                changed += len(changes)
+        return changed
+
+    def _get_section(self, tuned):
+        """Return the section of the profile a subsystem is using."""
+        profile = tuned.subsystem.get_profile()
+        if profile == parameters.DEFAULT_PROFILE:
+            return tuned.schema.section
+        return "%s:%s" % (tuned.schema.section, profile)
+
+    def has_unsaved_changes(self):
+        """Return True if edited values have not been written back."""
+        for tuned in self._subsystems:
+            if tuned.unsaved:
+                return True
+        return False
+
+    def flush(self):
+        """Write the edited values back to the parameter files.
+
+        Each file is rewritten once per section with all of its edited
+        values.  This should only be called while the robot is disabled.
+
+        Returns:
+            The List of files that were written.
+
+        """
+        written = []
+        for tuned in self._subsystems:
+            for section in list(tuned.unsaved):
+                if parameters.save_values(tuned.path, section,
+                                          tuned.unsaved[section]):
+                    del tuned.unsaved[section]
+                    if tuned.path not in written:
+                        written.append(tuned.path)
+                elif self._log:
+                    self._log.warning("Tuning values not saved to %s",
+                                      tuned.path)
+        return written
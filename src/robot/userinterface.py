@@ -3,13 +3,50 @@
 
 # Imports
 import wpilib
+import array
+import asynclog
 import os
 import common
-import logging
-import logging.config
 import parameters
 
 
+# Parameters read from the userinterface section of the parameters file
+_SCHEMA = parameters.Schema("userinterface", [
+    parameters.Field("CONTROLLER_COUNT", int, 2, 0, 6),
+])
+
+# Per-controller schemas, keyed by controller number
+_controller_schemas = {}
+
+
+def _get_controller_schema(number):
+    """Return the schema of the parameters for one controller.
+
+    Args:
+        number: the controller number, starting at 1.
+
+    Returns:
+        The Schema object.
+
+    """
+    schema = _controller_schemas.get(number)
+    if schema is None:
+        schema = parameters.Schema("userinterface", [
+            parameters.Field("CONTROLLER_%d_PORT" % number, int, -1, -1, 5,
+                             attribute="port"),
+            parameters.Field("CONTROLLER_%d_AXIS" % number, int, 0, 0, 12,
+                             attribute="axis_count"),
+            parameters.Field("CONTROLLER%d_BUTTONS" % number, int, 0, 0, 32,
+                             attribute="button_count"),
+            parameters.Field("CONTROLLER%d_DEAD_BAND" % number, float, 0.0,
+                             0.0, 1.0, attribute="dead_band"),
+            parameters.Field("CONTROLLER%d_EXPO" % number, float, 0.0,
+                             0.0, 1.0, attribute="expo"),
+        ])
+        _controller_schemas[number] = schema
+    return schema
+
+
 class JoystickAxis(object):
     """Enumerates joystick axis."""
     LEFTX = 0
@@ -39,21 +76,83 @@ class UserControllers(object):
     SCORING = 1
 
 
+class Controller(object):
+    """Stores the configuration and input snapshot of one controller.
+
+    Attributes:
+        joystick: the wpilib Joystick for the controller.
+        axis_count: the number of axes on the controller.
+        button_count: the number of buttons on the controller.
+        response: the array of axis gains indexed by quantized axis
+            position, with the expo curve applied.
+        dead_band: the axis magnitude below which the axis value is 0.
+        axis_values: the array of axis values from the last update.
+        pov: the POV angle from the last update.
+        button_mask: the button bitmask from the last update, where bit N is
+            set when button N is pressed.
+        previous_button_mask: the button bitmask from the update before.
+        press_bindings: the dictionary of button ID to press callbacks.
+        release_bindings: the dictionary of button ID to release callbacks.
+        held_bindings: the dictionary of button ID to held callbacks.
+        held_binding_mask: the bitmask of buttons with held callbacks.
+
+    """
+    joystick = None
+    axis_count = 0
+    button_count = 0
+    response = None
+    dead_band = 0.0
+    axis_values = None
+    pov = -1
+    button_mask = 0
+    previous_button_mask = 0
+    press_bindings = None
+    release_bindings = None
+    held_bindings = None
+    held_binding_mask = 0
+
+    def __init__(self, joystick, axis_count, button_count, response,
+                 dead_band):
+        """Create and initialize a Controller.
+
+        Args:
+            joystick: the wpilib Joystick for the controller.
+            axis_count: the number of axes on the controller.
+            button_count: the number of buttons on the controller.
+            response: the array of axis gains for the controller.
+            dead_band: the axis magnitude below which the axis value is 0.
+
+        """
+        self.joystick = joystick
+        self.axis_count = axis_count
+        self.button_count = button_count
+        self.response = response
+        self.dead_band = dead_band
+
+        # The snapshot is sized to hold the D-pad pseudo axes even if the
+        # controller has fewer axes
+        axis_slots = max(axis_count,
+                         max(JoystickAxis.DPADX, JoystickAxis.DPADY) + 1)
+        self.axis_values = array.array('d', [0.0] * axis_slots)
+        self.pov = -1
+        self.button_mask = 0
+        self.previous_button_mask = 0
+        self.press_bindings = {}
+        self.release_bindings = {}
+        self.held_bindings = {}
+        self.held_binding_mask = 0
+
+
 class UserInterface(object):
     """Provides the user interface connections."""
 
+    # Number of response table steps between 0 and full deflection
+    RESPONSE_STEPS = 127
+
     _log = None
     _parameters = None
 
-    _controller_1 = None
-    _controller_1_buttons = 0
-    _controller_1_previous_button_state = 0
-    _controller_1_dead_band = 0.0
-
-    _controller_2 = None
-    _controller_2_buttons = 0
-    _controller_2_previous_button_state = 0
-    _controller_2_dead_band = 0.0
+    _controllers = None
 
     _parameters_file = None
 
@@ -80,8 +179,7 @@ class UserInterface(object):
         """
         self._log = None
         self._parameters = None
-        self._controller_1 = None
-        self._controller_2 = None
+        self._controllers = None
 
     def _initialize(self, params, logging_enabled):
         """Initialize and configure the UserInterface object.
@@ -100,16 +198,7 @@ class UserInterface(object):
         # Intialize private member objects
         self._log = None
         self._parameters = None
-        self._controller_1 = None
-        self._controller_2 = None
-        self._controller_1_previous_button_state = []
-        self._controller_2_previous_button_state = []
-
-        # Initialize private parameters
-        self._controller_1_buttons = 4
-        self._controller_2_buttons = 4
-        self._controller_1_dead_band = 0.05
-        self._controller_2_dead_band = 0.05
+        self._controllers = []
 
         # Initialize private member variables
         self._display_line = 0
@@ -119,14 +208,7 @@ class UserInterface(object):
 
         if logging_enabled:
             #Create a new data log object
-            self._log = logging.getLogger('userinterface')
-            self._log.setLevel(logging.DEBUG)
-            fh = logging.FileHandler('/home/lvuser/log/userinterface.log')
-            fh.setLevel(logging.DEBUG)
-            formatter = logging.Formatter(
-                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            fh.setFormatter(formatter)
-            self._log.addHandler(fh)
+            self._log = asynclog.get_logger('userinterface')
 
             if self._log:
                 self._log_enabled = True
@@ -143,72 +225,128 @@ class UserInterface(object):
         Read parameter values from the specified file, instantiate required
         objects, and update status variables.
 
+        The parameters file describes CONTROLLER_COUNT controllers.  For each
+        controller N (starting at 1) it provides CONTROLLER_N_PORT,
+        CONTROLLER_N_AXIS, CONTROLLERN_BUTTONS, CONTROLLERN_DEAD_BAND and
+        CONTROLLERN_EXPO.  Controller N is addressed by the
+        UserControllers value N - 1.
+
         Returns:
             True if the parameter file was processed successfully.
 
         """
-        # Define and Initialize local variables
-        controller_1_port = 1
-        controller_2_port = 2
-        controller_1_axis = 2
-        controller_2_axis = 2
-        param_reader = None
-        section = __name__.lower()
-
-        # Close and delete old objects
+        # Close and delete old objects.  Bindings are kept so they survive a
+        # reload of the parameters.
+        old_controllers = self._controllers or []
         self._parameters = None
-        self._controller_1 = None
-        self._controller_2 = None
-        self._controller_1_previous_button_state = []
-        self._controller_2_previous_button_state = []
+        self._controllers = []
 
         # Read the parameters file
         self._parameters = parameters.Parameters(self._parameters_file)
 
-        if self._parameters is not None:
-            controller_1_port = self._parameters.get_value(section,
-                                                       "CONTROLLER_1_PORT")
-            controller_2_port = self._parameters.get_value(section,
-                                                       "CONTROLLER_2_PORT")
-            controller_1_axis = self._parameters.get_value(section,
-                                                       "CONTROLLER_1_AXIS")
-            controller_2_axis = self._parameters.get_value(section,
-                                                       "CONTROLLER_2_AXIS")
-
-            self._controller_1_buttons = self._parameters.get_value(section,
-                                                        "CONTROLLER1_BUTTONS")
-            self._controller_2_buttons = self._parameters.get_value(section,
-                                                        "CONTROLLER2_BUTTONS")
-
-            self._controller_1_dead_band = self._parameters.get_value(section,
-                                                      "CONTROLLER1_DEAD_BAND")
-            self._controller_2_dead_band = self._parameters.get_value(section,
-                                                      "CONTROLLER2_DEAD_BAND")
-            # Initialize previous button state lists
-            self._controller_1_previous_button_state = ([0] *
-                                            (self._controller_1_buttons + 1))
-            self._controller_2_previous_button_state = ([0] *
-                                            (self._controller_2_buttons + 1))
-
-            # Initialize  controller objects
-            self._controller_1 = wpilib.Joystick(controller_1_port,
-                                                 controller_1_axis,
-                                                 self._controller_1_buttons)
-            self._controller_2 = wpilib.Joystick(controller_2_port,
-                                                 controller_2_axis,
-                                                 self._controller_2_buttons)
+        config = self._load_config(_SCHEMA)
+        for index in range(config.controller_count):
+            controller_config = self._load_config(
+                                    _get_controller_schema(index + 1))
+            if controller_config.port < 0:
+                self._controllers.append(None)
+                continue
+
+            controller = Controller(
+                    wpilib.Joystick(controller_config.port,
+                                    controller_config.axis_count,
+                                    controller_config.button_count),
+                    controller_config.axis_count,
+                    controller_config.button_count,
+                    self._build_response(controller_config.expo),
+                    controller_config.dead_band)
+            if index < len(old_controllers) and old_controllers[index]:
+                old = old_controllers[index]
+                controller.press_bindings = old.press_bindings
+                controller.release_bindings = old.release_bindings
+                controller.held_bindings = old.held_bindings
+                controller.held_binding_mask = old.held_binding_mask
+            self._controllers.append(controller)
 
         if self._log_enabled:
-            if self._controller_1 is not None:
-                self._log.debug("Controller 1 created")
-            else:
-                self._log.debug("Controller 1 not created")
-            if self._controller_2 is not None:
-                self._log.debug("Controller 2 created")
-            else:
-                self._log.debug("Controller 2 not created")
+            for index, controller in enumerate(self._controllers):
+                if controller is not None:
+                    self._log.debug("Controller %d created", index + 1)
+                else:
+                    self._log.debug("Controller %d not created", index + 1)
+
+        return True
 
+    def reload_tunables(self):
+        """Reload the dead band and expo values from the parameter file.
 
+        The axis response tables are rebuilt in place.  The Joystick objects
+        and button bindings are left alone, so this can be used to apply
+        parameter changes while the robot is disabled.
+
+        Returns:
+            True if the parameter file was processed successfully.
+
+        """
+        self._parameters = parameters.Parameters(self._parameters_file)
+        if not self._parameters.file_opened:
+            return False
+        for index, controller in enumerate(self._controllers):
+            if controller is None:
+                continue
+            controller_config = self._load_config(
+                                    _get_controller_schema(index + 1))
+            controller.response = self._build_response(
+                                    controller_config.expo)
+            controller.dead_band = controller_config.dead_band
+        return True
+
+    def _load_config(self, schema):
+        """Read and validate the parameters using a schema.
+
+        Missing or invalid parameters are given their default values and
+        logged.
+
+        Args:
+            schema: the Schema object to read.
+
+        Returns:
+            The config object.
+
+        """
+        config, errors = schema.load(self._parameters)
+        if self._log_enabled:
+            for error in errors:
+                self._log.warning("Parameter %s", error)
+        return config
+
+    def _build_response(self, expo):
+        """Build the axis response table for a controller.
+
+        Entry i holds the gain applied to an axis reading of magnitude
+        i / RESPONSE_STEPS.  The expo curve blends a linear and a cubic
+        response: output = input * ((1 - expo) + expo * input^2).  The dead
+        band is not part of the table; it is compared with the raw reading
+        so quantizing does not move its edge.
+
+        Args:
+            expo: the amount of cubic response, from 0 (linear) to 1.
+
+        Returns:
+            The array of gains.
+
+        """
+        response = array.array('d', [0.0] * (self.RESPONSE_STEPS + 1))
+        for step in range(self.RESPONSE_STEPS + 1):
+            magnitude = step / float(self.RESPONSE_STEPS)
+            response[step] = (1.0 - expo) + expo * magnitude * magnitude
+        return response
+
+    def _get_controller(self, controller):
+        """Return the Controller for a UserControllers value, or None."""
+        if 0 <= controller < len(self._controllers):
+            return self._controllers[controller]
+        return None
 
     def set_robot_state(self, state):
         """Set the current state of the robot and perform any actions
@@ -243,23 +381,246 @@ class UserInterface(object):
             true if the button state has changed
 
         """
-        # Get the current button state
-        current_state = self.get_button_state(controller, button)
-        previous_state = 0
-
-        if controller == UserControllers.DRIVER:
-            previous_state = self._controller_1_previous_button_state[button]
-        elif controller == UserControllers.SCORING:
-            previous_state = self._controller_2_previous_button_state[button]
+        state = self._get_controller(controller)
+        if state is None:
+            return False
 
-        if current_state != previous_state:
+        if ((state.button_mask ^ state.previous_button_mask) >> button) & 1:
             return True
         else:
             return False
 
+    def on_press(self, controller, button, callback):
+        """Call a function when a button is pressed.
+
+        Args:
+            controller: the controller the button is on
+            button: the button ID
+            callback: the function to call, with no arguments
+
+        """
+        state = self._get_controller(controller)
+        if state is not None:
+            state.press_bindings.setdefault(button, []).append(callback)
+
+    def on_release(self, controller, button, callback):
+        """Call a function when a button is released.
+
+        Args:
+            controller: the controller the button is on
+            button: the button ID
+            callback: the function to call, with no arguments
+
+        """
+        state = self._get_controller(controller)
+        if state is not None:
+            state.release_bindings.setdefault(button, []).append(callback)
+
+    def while_held(self, controller, button, callback):
+        """Call a function every update while a button is held down.
+
+        Args:
+            controller: the controller the button is on
+            button: the button ID
+            callback: the function to call, with no arguments
+
+        """
+        state = self._get_controller(controller)
+        if state is not None:
+            state.held_bindings.setdefault(button, []).append(callback)
+            state.held_binding_mask |= 1 << button
+
+    def clear_bindings(self):
+        """Remove all button bindings."""
+        for state in self._controllers:
+            if state is not None:
+                state.press_bindings = {}
+                state.release_bindings = {}
+                state.held_bindings = {}
+                state.held_binding_mask = 0
+
+    def update(self, playback=None):
+        """Sample the current state of every controller.
+
+        Reads every axis, the POV and every button once and stores them in a
+        snapshot.  All axis and button queries are served from this snapshot
+        until the next update, so the inputs are consistent within a robot
+        loop iteration.  This should be called once at the start of each
+        iteration.
+
+        The button states from the previous update become the "stored" states
+        used by button_state_changed, and any bindings for buttons that
+        changed (or are held) are called.
+
+        Args:
+            playback: a function called with this UserInterface after the
+                controllers are sampled and before the bindings are
+                called, or None.  A macro player uses it to replace the
+                snapshot, so the bindings see the replayed buttons.
+
+        """
+        for state in self._controllers:
+            if state is None:
+                continue
+            state.previous_button_mask = state.button_mask
+            self._sample_controller(state)
+        if playback:
+            playback(self)
+        for state in self._controllers:
+            if state is not None:
+                self._dispatch_bindings(state)
+
+    def _sample_controller(self, state):
+        """Read a controller into its snapshot.
+
+        Args:
+            state: the Controller to read.
+
+        """
+        joystick = state.joystick
+        axis_values = state.axis_values
+        response = state.response
+        dead_band = state.dead_band
+        steps = self.RESPONSE_STEPS
+        for axis in range(state.axis_count):
+            if axis == JoystickAxis.DPADX or axis == JoystickAxis.DPADY:
+                continue
+            value = joystick.getRawAxis(axis)
+            magnitude = abs(value)
+            if magnitude < dead_band:
+                axis_values[axis] = 0.0
+                continue
+            step = int(magnitude * steps + 0.5)
+            if step > steps:
+                step = steps
+            axis_values[axis] = value * response[step]
+
+        # The D-pad is reported as a POV angle; convert it to two axes
+        pov = joystick.getPOV()
+        if pov == 90:
+            axis_values[JoystickAxis.DPADX] = 1.0
+        elif pov == 270:
+            axis_values[JoystickAxis.DPADX] = -1.0
+        else:
+            axis_values[JoystickAxis.DPADX] = 0.0
+        if pov == 0:
+            axis_values[JoystickAxis.DPADY] = -1.0
+        elif pov == 180:
+            axis_values[JoystickAxis.DPADY] = 1.0
+        else:
+            axis_values[JoystickAxis.DPADY] = 0.0
+        state.pov = pov
+
+        button_mask = 0
+        for button in range(1, state.button_count + 1):
+            if joystick.getRawButton(button):
+                button_mask |= 1 << button
+        state.button_mask = button_mask
+
+    def _dispatch_bindings(self, state):
+        """Call the bindings for the buttons that changed or are held.
+
+        Only the set bits of the changed and held masks are visited, so the
+        cost depends on how many buttons changed rather than on how many
+        bindings exist.
+
+        Args:
+            state: the Controller that was just sampled.
+
+        """
+        current_mask = state.button_mask
+        changed = current_mask ^ state.previous_button_mask
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            button = bit.bit_length() - 1
+            if current_mask & bit:
+                callbacks = state.press_bindings.get(button)
+            else:
+                callbacks = state.release_bindings.get(button)
+            if callbacks:
+                for callback in callbacks:
+                    callback()
+
+        held = current_mask & state.held_binding_mask
+        while held:
+            bit = held & -held
+            held ^= bit
+            for callback in state.held_bindings[bit.bit_length() - 1]:
+                callback()
+
+    def get_controller_count(self):
+        """Return the number of controllers in the controller table."""
+        return len(self._controllers)
+
+    def get_snapshot_axis_count(self):
+        """Return the number of axis values in the largest snapshot."""
+        count = 0
+        for state in self._controllers:
+            if state is not None:
+                count = max(count, len(state.axis_values))
+        return count
+
+    def write_snapshot(self, axis_values, button_masks, axis_count):
+        """Append the current snapshot of every controller to arrays.
+
+        Args:
+            axis_values: the array that receives axis_count axis values per
+                controller.
+            button_masks: the array that receives one button bitmask per
+                controller.
+            axis_count: the number of axis values to write per controller.
+
+        """
+        for state in self._controllers:
+            if state is None:
+                axis_values.extend([0.0] * axis_count)
+                button_masks.append(0)
+                continue
+            values = state.axis_values
+            for axis in range(axis_count):
+                if axis < len(values):
+                    axis_values.append(values[axis])
+                else:
+                    axis_values.append(0.0)
+            button_masks.append(state.button_mask)
+
+    def read_snapshot(self, axis_values, button_masks, frame,
+                      controller_count, axis_count, live_buttons=None):
+        """Replace the current snapshot with one written by write_snapshot.
+
+        Button bindings are only called for the replaced button states when
+        this is done by the playback function passed to update.
+
+        Args:
+            axis_values: the array of axis values.
+            button_masks: the array of button bitmasks.
+            frame: the index of the snapshot in the arrays.
+            controller_count: the number of controllers per snapshot.
+            axis_count: the number of axis values per controller.
+            live_buttons: a dictionary of {controller: button bitmask} of
+                the buttons that keep their sampled states, or None.
+
+        """
+        for index in range(min(controller_count, len(self._controllers))):
+            state = self._controllers[index]
+            if state is None:
+                continue
+            values = state.axis_values
+            offset = (frame * controller_count + index) * axis_count
+            for axis in range(min(axis_count, len(values))):
+                values[axis] = axis_values[offset + axis]
+            mask = button_masks[frame * controller_count + index]
+            if live_buttons:
+                live = live_buttons.get(index, 0)
+                mask = (mask & ~live) | (state.button_mask & live)
+            state.button_mask = mask
+
     def get_axis_value(self, controller, axis):
         """Read the current axis value for the specified controller/axis.
 
+        The value is read from the snapshot taken by the last update.
+
         Args:
             controller: the controller to read the axis value from
             axis: the axis ID to read
@@ -268,60 +629,16 @@ class UserInterface(object):
             the current position fo the specified axis
 
         """
-        # Get the current axis value from the controller
-        value = 0.0
-
-        if controller == UserControllers.DRIVER:
-            if self._controller_1:
-                if axis == JoystickAxis.DPADX:
-                    value = self._controller_1.getPOV()
-                    if value == 90:
-                        value = 1.0
-                    elif value == 270:
-                        value = -1.0
-                    else:
-                        value = 0.0
-                elif axis == JoystickAxis.DPADY:
-                    value = self._controller_1.getPOV()
-                    if value == 0:
-                        value = -1.0
-                    elif value == 180:
-                        value = 1.0
-                    else:
-                        value = 0.0
-                else:
-                    value = self._controller_1.getRawAxis(axis)
-                if abs(value) < self._controller_1_dead_band:
-                    return 0.0
-                return value
-        elif controller == UserControllers.SCORING:
-            if self._controller_2:
-                if axis == JoystickAxis.DPADX:
-                    value = self._controller_2.getPOV()
-                    if value == 90:
-                        value = 1.0
-                    elif value == 270:
-                        value = -1.0
-                    else:
-                        value = 0.0
-                elif axis == JoystickAxis.DPADY:
-                    value = self._controller_2.getPOV()
-                    if value == 0:
-                        value = -1.0
-                    elif value == 180:
-                        value = 1.0
-                    else:
-                        value = 0.0
-                else:
-                    value = self._controller_2.getRawAxis(axis)
-                if abs(value) < self._controller_2_dead_band:
-                    return 0.0
-                return value
-        return 0.0
+        state = self._get_controller(controller)
+        if state is None or axis < 0 or axis >= len(state.axis_values):
+            return 0.0
+        return state.axis_values[axis]
 
     def get_button_state(self, controller, button):
         """Read the button state for the specified controller/button
 
+        The state is read from the snapshot taken by the last update.
+
         Args:
             controller: the controller to read the button state from
             button: the button ID to read the state from
@@ -330,42 +647,21 @@ class UserInterface(object):
             1 if button is currently pressed
 
         """
-        if controller == UserControllers.DRIVER:
-            if self._controller_1:
-                return self._controller_1.getRawButton(button)
-            else:
-                return 0
-        elif controller == UserControllers.SCORING:
-            if self._controller_2:
-                return self._controller_2.getRawButton(button)
-            else:
-                return 0
-        return 0
+        state = self._get_controller(controller)
+        if state is None:
+            return 0
+        return (state.button_mask >> button) & 1
 
     def store_button_states(self, controller):
         """Store the current button states for the specified controller.
 
+        The states are stored automatically by update; this is only needed to
+        clear pending changes partway through a loop iteration.
+
         Args:
             controller: the controller to read the button states from
 
         """
-        button_state = 0
-        button_count = 0
-
-        # Get the total number of buttons for the controller
-        button_count = {
-                        0: self._controller_1_buttons,
-                        1: self._controller_2_buttons
-                        }.get(controller, 0)
-
-        # Store the current state of each button for this controller
-        # +1 is used in array indexing since #defines and GeRawButton start at
-        # 1, and array starts at 0.
-        for i in range(button_count):
-            button_state = self.get_button_state(controller, i + 1)
-
-            if controller == UserControllers.DRIVER:
-                self._controller_1_previous_button_state[i + 1] = button_state
-
-            if controller == UserControllers.SCORING:
-                self._controller_2_previous_button_state[i + 1] = button_state
+        state = self._get_controller(controller)
+        if state is not None:
+            state.previous_button_mask = state.button_mask